@@ -1,6 +1,7 @@
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
 from alembic import context
+from app.config import DATABASE_URL
 from app.models import Base  # Importa o Base do seu projeto
 
 # this is the Alembic Config object, which provides
@@ -12,6 +13,9 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# A URL do banco vem de app/config.py (variável de ambiente DATABASE_URL), a mesma da API
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 target_metadata = Base.metadata  # Use o Base.metadata para associar as models
@@ -0,0 +1,48 @@
+"""Índices de busca por trigramas e prefixo em produtos e clientes
+
+Revision ID: 2992ea30df47
+Revises: 2b665903a3ea
+Create Date: 2026-10-18 14:02:37.184523
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2992ea30df47'
+down_revision: Union[str, None] = '2b665903a3ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm é uma extensão "trusted" (PostgreSQL 13+): o dono do banco pode criá-la
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # Substring (ILIKE '%termo%') e busca aproximada (%>)
+    op.create_index('ix_produtos_nome_trgm', 'produtos', ['nome'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'nome': 'gin_trgm_ops'})
+    op.create_index('ix_clientes_nome_trgm', 'clientes', ['nome'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'nome': 'gin_trgm_ops'})
+    op.create_index('ix_clientes_email_trgm', 'clientes', ['email'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+
+    # Prefixo (lower(coluna) LIKE 'termo%'), inclusive com uma ou duas letras
+    op.create_index('ix_produtos_nome_prefixo', 'produtos', [sa.text('lower(nome) text_pattern_ops')], unique=False)
+    op.create_index('ix_clientes_nome_prefixo', 'clientes', [sa.text('lower(nome) text_pattern_ops')], unique=False)
+    op.create_index('ix_clientes_email_prefixo', 'clientes', [sa.text('lower(email) text_pattern_ops')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clientes_email_prefixo', table_name='clientes')
+    op.drop_index('ix_clientes_nome_prefixo', table_name='clientes')
+    op.drop_index('ix_produtos_nome_prefixo', table_name='produtos')
+    op.drop_index('ix_clientes_email_trgm', table_name='clientes')
+    op.drop_index('ix_clientes_nome_trgm', table_name='clientes')
+    op.drop_index('ix_produtos_nome_trgm', table_name='produtos')
+    # A extensão fica: pode estar em uso por outros objetos do banco
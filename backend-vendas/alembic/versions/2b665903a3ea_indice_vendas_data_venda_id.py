@@ -0,0 +1,31 @@
+"""Índice composto vendas(data_venda, id) para paginação por cursor
+
+Revision ID: 2b665903a3ea
+Revises: 342e8b57950c
+Create Date: 2026-10-18 11:27:08.550912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b665903a3ea'
+down_revision: Union[str, None] = '342e8b57950c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # O índice composto também atende os filtros por período, então substitui o simples
+    op.create_index('ix_vendas_data_venda_id', 'vendas', ['data_venda', 'id'], unique=False)
+    op.drop_index(op.f('ix_vendas_data_venda'), table_name='vendas')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_vendas_data_venda'), 'vendas', ['data_venda'], unique=False)
+    op.drop_index('ix_vendas_data_venda_id', table_name='vendas')
@@ -0,0 +1,48 @@
+"""Cria a tabela de resumo vendas_diarias
+
+Revision ID: 342e8b57950c
+Revises: c12724d7a2a4
+Create Date: 2026-10-18 10:03:54.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '342e8b57950c'
+down_revision: Union[str, None] = 'c12724d7a2a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'vendas_diarias',
+        sa.Column('data', sa.Date(), nullable=False),
+        sa.Column('quantidade_vendas', sa.Integer(), nullable=False),
+        sa.Column('receita', sa.Float(), nullable=False),
+        sa.Column('itens_vendidos', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('data')
+    )
+    # Carga inicial a partir do histórico (equivalente a `python -m app.cli reconstruir-resumo`)
+    op.execute("""
+        INSERT INTO vendas_diarias (data, quantidade_vendas, receita, itens_vendidos)
+        SELECT v.data_venda, count(v.id), coalesce(sum(v.total), 0), coalesce(sum(i.itens), 0)
+        FROM vendas v
+        LEFT JOIN (
+            SELECT venda_id, sum(quantidade) AS itens
+            FROM venda_produto
+            GROUP BY venda_id
+        ) i ON i.venda_id = v.id
+        WHERE v.data_venda IS NOT NULL
+        GROUP BY v.data_venda
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('vendas_diarias')
@@ -0,0 +1,54 @@
+"""Grava o preço unitário nos itens de venda_produto
+
+Revision ID: 3828f1a0aa4b
+Revises: ce8e2afbf2bf
+Create Date: 2026-10-18 18:52:07.418263
+
+Os itens existentes recebem o preço atual do produto (o histórico de preços não existe
+no banco); as partições arquivadas são liberadas só durante o preenchimento.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3828f1a0aa4b'
+down_revision: Union[str, None] = 'ce8e2afbf2bf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partições de venda_produto com o trigger de somente leitura do arquivamento
+PARTICOES_ARQUIVADAS = """
+SELECT c.relname
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+JOIN pg_trigger t ON t.tgrelid = c.oid AND t.tgname = 'particao_arquivada'
+WHERE i.inhparent = 'venda_produto'::regclass
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('venda_produto', sa.Column('preco_unitario', sa.Float(), nullable=True))
+
+    arquivadas = [linha[0] for linha in op.get_bind().execute(sa.text(PARTICOES_ARQUIVADAS))]
+    for particao in arquivadas:
+        op.execute(f'ALTER TABLE "{particao}" DISABLE TRIGGER particao_arquivada')
+    op.execute("""
+        UPDATE venda_produto vp
+        SET preco_unitario = coalesce(p.preco, 0)
+        FROM produtos p
+        WHERE p.id = vp.produto_id
+    """)
+    for particao in arquivadas:
+        op.execute(f'ALTER TABLE "{particao}" ENABLE TRIGGER particao_arquivada')
+
+    op.alter_column('venda_produto', 'preco_unitario', nullable=False)
+    op.execute('ANALYZE venda_produto')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('venda_produto', 'preco_unitario')
@@ -0,0 +1,76 @@
+"""Versão do catálogo de produtos mantida por gatilho
+
+Revision ID: 6be6aed3006e
+Revises: 3828f1a0aa4b
+Create Date: 2026-10-18 19:31:44.260517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6be6aed3006e'
+down_revision: Union[str, None] = '3828f1a0aa4b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FUNCAO_ALTERACAO_CATALOGO = """
+CREATE OR REPLACE FUNCTION registrar_alteracao_catalogo() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF current_setting('catalogo.alterado', true) IS DISTINCT FROM 'sim' THEN
+        PERFORM set_config('catalogo.alterado', 'sim', true);
+        UPDATE catalogo_versao SET versao = versao + 1, atualizado_em = clock_timestamp() WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'catalogo_versao',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('versao', sa.BigInteger(), nullable=False),
+        sa.Column('atualizado_em', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO catalogo_versao (id, versao, atualizado_em) VALUES (1, 0, clock_timestamp())")
+    op.execute(FUNCAO_ALTERACAO_CATALOGO)
+    # Adiado: a versão muda no commit, uma vez por transação que alterou o catálogo;
+    # a baixa de estoque das vendas (UPDATE só de quantidade_em_estoque) fica de fora
+    op.execute("""
+        CREATE CONSTRAINT TRIGGER catalogo_alterado
+        AFTER INSERT OR DELETE ON produtos
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW EXECUTE FUNCTION registrar_alteracao_catalogo()
+    """)
+    op.execute("""
+        CREATE CONSTRAINT TRIGGER catalogo_atualizado
+        AFTER UPDATE OF nome, descricao, preco ON produtos
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW
+        WHEN (OLD.nome IS DISTINCT FROM NEW.nome
+              OR OLD.descricao IS DISTINCT FROM NEW.descricao
+              OR OLD.preco IS DISTINCT FROM NEW.preco)
+        EXECUTE FUNCTION registrar_alteracao_catalogo()
+    """)
+    op.execute("""
+        CREATE TRIGGER catalogo_truncado
+        AFTER TRUNCATE ON produtos
+        FOR EACH STATEMENT EXECUTE FUNCTION registrar_alteracao_catalogo()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER IF EXISTS catalogo_truncado ON produtos')
+    op.execute('DROP TRIGGER IF EXISTS catalogo_atualizado ON produtos')
+    op.execute('DROP TRIGGER IF EXISTS catalogo_alterado ON produtos')
+    op.execute('DROP FUNCTION IF EXISTS registrar_alteracao_catalogo()')
+    op.drop_table('catalogo_versao')
@@ -0,0 +1,194 @@
+"""Particiona vendas e venda_produto por mês de data_venda
+
+Revision ID: b4a20ce57bc7
+Revises: 2992ea30df47
+Create Date: 2026-10-18 16:40:12.903114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4a20ce57bc7'
+down_revision: Union[str, None] = '2992ea30df47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses à frente com partição já criada ao fim da migração (o startup da API mantém a janela)
+MESES_A_FRENTE = 3
+# Até o PostgreSQL 14, mover uma venda de partição (UPDATE de data_venda para outro mês) é um
+# DELETE + INSERT que dispara o ON DELETE CASCADE e apaga os itens da venda
+VERSAO_MINIMA_POSTGRES = 150000
+
+FUNCAO_CRIAR_PARTICOES = """
+CREATE OR REPLACE FUNCTION criar_particoes_mes(mes date) RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    inicio date := date_trunc('month', mes)::date;
+    fim date := (date_trunc('month', mes) + interval '1 month')::date;
+    tabela text;
+    particao text;
+BEGIN
+    FOREACH tabela IN ARRAY ARRAY['vendas', 'venda_produto'] LOOP
+        particao := tabela || '_p' || to_char(inicio, 'YYYY_MM');
+        IF to_regclass(quote_ident(particao)) IS NULL THEN
+            BEGIN
+                EXECUTE 'CREATE TABLE IF NOT EXISTS ' || quote_ident(particao)
+                    || ' PARTITION OF ' || quote_ident(tabela)
+                    || ' FOR VALUES FROM (' || quote_literal(inicio) || ') TO (' || quote_literal(fim) || ')';
+            EXCEPTION WHEN duplicate_table OR unique_violation THEN
+                NULL;
+            END;
+        END IF;
+    END LOOP;
+END;
+$$
+"""
+
+FUNCAO_REJEITAR_ESCRITA = """
+CREATE OR REPLACE FUNCTION rejeitar_escrita_arquivada() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    RAISE EXCEPTION USING
+        MESSAGE = 'Partição ' || TG_TABLE_NAME || ' arquivada: período somente leitura',
+        ERRCODE = 'read_only_sql_transaction';
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    versao = int(op.get_bind().execute(sa.text("SHOW server_version_num")).scalar())
+    if versao < VERSAO_MINIMA_POSTGRES:
+        raise RuntimeError(
+            f"PostgreSQL {versao // 10000} não suportado: o particionamento exige o "
+            f"{VERSAO_MINIMA_POSTGRES // 10000} ou mais recente"
+        )
+    op.execute(FUNCAO_CRIAR_PARTICOES)
+    op.execute(FUNCAO_REJEITAR_ESCRITA)
+
+    # As tabelas atuais saem do caminho (com nomes de restrições e índices livres) e os
+    # dados são copiados para as novas, particionadas
+    op.rename_table('venda_produto', 'venda_produto_antiga')
+    op.rename_table('vendas', 'vendas_antiga')
+    op.execute('ALTER TABLE venda_produto_antiga RENAME CONSTRAINT venda_produto_pkey TO venda_produto_antiga_pkey')
+    op.execute('ALTER TABLE vendas_antiga RENAME CONSTRAINT vendas_pkey TO vendas_antiga_pkey')
+    op.drop_index('ix_venda_produto_id', table_name='venda_produto_antiga')
+    op.drop_index('ix_vendas_data_venda_id', table_name='vendas_antiga')
+    op.drop_index('ix_vendas_id', table_name='vendas_antiga')
+    # A sequência dos ids continua a mesma: passa para a nova tabela no fim
+    op.execute('ALTER SEQUENCE vendas_id_seq OWNED BY NONE')
+
+    # A chave de partição entra nas chaves primárias; venda_produto repete a data da venda
+    # para ficar na partição do mesmo mês e referenciar (id, data_venda)
+    op.create_table(
+        'vendas',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('vendas_id_seq'::regclass)"), nullable=False),
+        sa.Column('cliente_id', sa.Integer(), nullable=True),
+        sa.Column('data_venda', sa.Date(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['cliente_id'], ['clientes.id'], name='vendas_cliente_id_fkey'),
+        sa.PrimaryKeyConstraint('id', 'data_venda', name='vendas_pkey'),
+        postgresql_partition_by='RANGE (data_venda)',
+    )
+    op.create_table(
+        'venda_produto',
+        sa.Column('venda_id', sa.Integer(), nullable=False),
+        sa.Column('produto_id', sa.Integer(), nullable=False),
+        sa.Column('data_venda', sa.Date(), nullable=False),
+        sa.Column('quantidade', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['venda_id', 'data_venda'], ['vendas.id', 'vendas.data_venda'],
+            name='venda_produto_venda_id_data_venda_fkey', onupdate='CASCADE', ondelete='CASCADE'
+        ),
+        sa.ForeignKeyConstraint(['produto_id'], ['produtos.id'], name='venda_produto_produto_id_fkey'),
+        sa.PrimaryKeyConstraint('venda_id', 'produto_id', 'data_venda', name='venda_produto_pkey'),
+        postgresql_partition_by='RANGE (data_venda)',
+    )
+
+    # Uma partição por mês, do mês da venda mais antiga até MESES_A_FRENTE meses à frente
+    op.execute(f"""
+        SELECT criar_particoes_mes(mes::date)
+        FROM generate_series(
+            date_trunc('month', coalesce((SELECT min(data_venda) FROM vendas_antiga), CURRENT_DATE)),
+            greatest(
+                date_trunc('month', CURRENT_DATE) + interval '{MESES_A_FRENTE} months',
+                date_trunc('month', coalesce((SELECT max(data_venda) FROM vendas_antiga), CURRENT_DATE))
+            ),
+            interval '1 month'
+        ) AS mes
+    """)
+
+    # Vendas sem data (a coluna era opcional) ficam com a data da migração
+    op.execute("""
+        INSERT INTO vendas (id, cliente_id, data_venda, total)
+        SELECT id, cliente_id, coalesce(data_venda, CURRENT_DATE), total FROM vendas_antiga
+    """)
+    op.execute("""
+        INSERT INTO venda_produto (venda_id, produto_id, data_venda, quantidade)
+        SELECT vp.venda_id, vp.produto_id, coalesce(v.data_venda, CURRENT_DATE), vp.quantidade
+        FROM venda_produto_antiga vp
+        JOIN vendas_antiga v ON v.id = vp.venda_id
+    """)
+
+    # Índice particionado: cada partição ganha o seu
+    op.create_index('ix_vendas_data_venda_id', 'vendas', ['data_venda', 'id'], unique=False)
+
+    op.drop_table('venda_produto_antiga')
+    op.drop_table('vendas_antiga')
+    op.execute('ALTER SEQUENCE vendas_id_seq OWNED BY vendas.id')
+    op.execute('ANALYZE vendas')
+    op.execute('ANALYZE venda_produto')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('venda_produto', 'venda_produto_particionada')
+    op.rename_table('vendas', 'vendas_particionada')
+    op.execute('ALTER TABLE venda_produto_particionada RENAME CONSTRAINT venda_produto_pkey TO venda_produto_particionada_pkey')
+    op.execute('ALTER TABLE vendas_particionada RENAME CONSTRAINT vendas_pkey TO vendas_particionada_pkey')
+    op.drop_index('ix_vendas_data_venda_id', table_name='vendas_particionada')
+    op.execute('ALTER SEQUENCE vendas_id_seq OWNED BY NONE')
+
+    op.create_table(
+        'vendas',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('vendas_id_seq'::regclass)"), nullable=False),
+        sa.Column('cliente_id', sa.Integer(), nullable=True),
+        sa.Column('data_venda', sa.Date(), nullable=True),
+        sa.Column('total', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['cliente_id'], ['clientes.id'], name='vendas_cliente_id_fkey'),
+        sa.PrimaryKeyConstraint('id', name='vendas_pkey'),
+    )
+    op.create_index('ix_vendas_id', 'vendas', ['id'], unique=False)
+    op.create_index('ix_vendas_data_venda_id', 'vendas', ['data_venda', 'id'], unique=False)
+    op.create_table(
+        'venda_produto',
+        sa.Column('venda_id', sa.Integer(), nullable=False),
+        sa.Column('produto_id', sa.Integer(), nullable=False),
+        sa.Column('quantidade', sa.Integer(), nullable=False),
+        sa.Column('id', sa.Integer(), server_default='1', nullable=False),
+        sa.ForeignKeyConstraint(['venda_id'], ['vendas.id'], name='venda_produto_venda_id_fkey'),
+        sa.ForeignKeyConstraint(['produto_id'], ['produtos.id'], name='venda_produto_produto_id_fkey'),
+        sa.PrimaryKeyConstraint('venda_id', 'produto_id', name='venda_produto_pkey'),
+    )
+    op.create_index('ix_venda_produto_id', 'venda_produto', ['id'], unique=False)
+
+    op.execute("""
+        INSERT INTO vendas (id, cliente_id, data_venda, total)
+        SELECT id, cliente_id, data_venda, total FROM vendas_particionada
+    """)
+    op.execute("""
+        INSERT INTO venda_produto (venda_id, produto_id, quantidade)
+        SELECT venda_id, produto_id, quantidade FROM venda_produto_particionada
+    """)
+
+    # Remove também as partições (inclusive as arquivadas)
+    op.drop_table('venda_produto_particionada')
+    op.drop_table('vendas_particionada')
+    op.execute('ALTER SEQUENCE vendas_id_seq OWNED BY vendas.id')
+    op.execute('DROP FUNCTION IF EXISTS criar_particoes_mes(date)')
+    op.execute('DROP FUNCTION IF EXISTS rejeitar_escrita_arquivada()')
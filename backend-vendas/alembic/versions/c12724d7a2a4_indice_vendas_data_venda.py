@@ -0,0 +1,28 @@
+"""Índice em vendas.data_venda para relatórios por período
+
+Revision ID: c12724d7a2a4
+Revises: a96d6c672c3d
+Create Date: 2026-10-18 09:12:31.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c12724d7a2a4'
+down_revision: Union[str, None] = 'a96d6c672c3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_vendas_data_venda'), 'vendas', ['data_venda'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_vendas_data_venda'), table_name='vendas')
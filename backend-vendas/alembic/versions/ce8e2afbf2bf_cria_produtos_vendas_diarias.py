@@ -0,0 +1,47 @@
+"""Cria a tabela de resumo produtos_vendas_diarias
+
+Revision ID: ce8e2afbf2bf
+Revises: b4a20ce57bc7
+Create Date: 2026-10-18 17:25:41.306958
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ce8e2afbf2bf'
+down_revision: Union[str, None] = 'b4a20ce57bc7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'produtos_vendas_diarias',
+        sa.Column('data', sa.Date(), nullable=False),
+        sa.Column('produto_id', sa.Integer(), nullable=False),
+        sa.Column('quantidade', sa.Integer(), nullable=False),
+        sa.Column('receita', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['produto_id'], ['produtos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('data', 'produto_id')
+    )
+    # Carga inicial a partir do histórico (equivalente a `python -m app.cli reconstruir-resumo`)
+    op.execute("""
+        INSERT INTO produtos_vendas_diarias (data, produto_id, quantidade, receita)
+        SELECT vp.data_venda, vp.produto_id, sum(vp.quantidade), coalesce(sum(vp.quantidade * p.preco), 0)
+        FROM venda_produto vp
+        JOIN produtos p ON p.id = vp.produto_id
+        GROUP BY vp.data_venda, vp.produto_id
+    """)
+    # Itens por produto (exclusão de produto, junções a partir de produtos)
+    op.create_index('ix_venda_produto_produto_id', 'venda_produto', ['produto_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_venda_produto_produto_id', table_name='venda_produto')
+    op.drop_table('produtos_vendas_diarias')
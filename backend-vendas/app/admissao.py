@@ -0,0 +1,169 @@
+"""
+Controle de admissão: limita as requisições que usam o banco ao mesmo tempo, em filas
+separadas para escritas (POST/PUT/DELETE, como a criação de vendas) e leituras (GET:
+listagens, relatórios, exportação).
+
+Sem ele, uma rajada empilha requisições no threadpool esperando conexão do pool e a
+latência cresce até o timeout do cliente, cujas novas tentativas só aumentam a carga.
+Aqui, cada fila tem um número de vagas, um limite de requisições esperando e um prazo de
+espera; acima disso a resposta é imediata: 503 com Retry-After. Como escritas e leituras
+têm vagas próprias, uma exportação longa (que ocupa uma vaga de leitura enquanto
+transmite) não atrasa o checkout.
+
+Os limites são por processo, como o pool de conexões.
+"""
+import asyncio
+import time
+from collections import Counter
+
+from fastapi.responses import JSONResponse
+
+from app.config import (
+    ADMISSAO_ESCRITAS,
+    ADMISSAO_ESPERA_ESCRITAS,
+    ADMISSAO_ESPERA_LEITURAS,
+    ADMISSAO_FILA_ESCRITAS,
+    ADMISSAO_FILA_LEITURAS,
+    ADMISSAO_LEITURAS,
+    ADMISSAO_RETRY_AFTER,
+)
+
+# Rotas que não passam pelo controle: sem banco ou de longa duração (o stream de eventos
+# não segura conexão) e a documentação
+ISENTAS = ("/metrics", "/eventos/stream", "/docs", "/redoc", "/openapi.json")
+METODOS_LEITURA = ("GET", "HEAD")
+
+class Saturado(Exception):
+    """Sem vaga na fila (cheia ou prazo de espera esgotado)"""
+
+    def __init__(self, motivo: str):
+        super().__init__(motivo)
+        self.motivo = motivo
+
+class Fila:
+    """
+    Vagas de uma classe de requisições, com espera limitada em tamanho e em tempo.
+    Usada só no event loop (o middleware), então os contadores dispensam lock.
+    """
+
+    def __init__(self, nome: str, vagas: int, espera_maxima: int, prazo: float):
+        self.nome = nome
+        self.vagas = vagas
+        self.espera_maxima = espera_maxima
+        self.prazo = prazo
+        self._semaforo = asyncio.Semaphore(vagas)
+        self.em_execucao = 0
+        self.aguardando = 0
+        self.admitidas = 0
+        self.tempo_espera = 0.0
+        self.rejeitadas = Counter()  # por motivo
+
+    async def entrar(self):
+        if self._semaforo.locked() and self.aguardando >= self.espera_maxima:
+            self.rejeitadas["fila_cheia"] += 1
+            raise Saturado("fila_cheia")
+        if not self._semaforo.locked():
+            # Há vaga e ninguém na frente: entra sem esperar
+            await self._semaforo.acquire()
+            self.em_execucao += 1
+            self.admitidas += 1
+            return
+        inicio = time.perf_counter()
+        self.aguardando += 1
+        try:
+            await asyncio.wait_for(self._semaforo.acquire(), self.prazo)
+        except asyncio.TimeoutError:
+            self.rejeitadas["prazo"] += 1
+            raise Saturado("prazo")
+        finally:
+            self.aguardando -= 1
+        self.em_execucao += 1
+        self.admitidas += 1
+        self.tempo_espera += time.perf_counter() - inicio
+
+    def sair(self):
+        self.em_execucao -= 1
+        self._semaforo.release()
+
+escritas = Fila("escrita", ADMISSAO_ESCRITAS, ADMISSAO_FILA_ESCRITAS, ADMISSAO_ESPERA_ESCRITAS)
+leituras = Fila("leitura", ADMISSAO_LEITURAS, ADMISSAO_FILA_LEITURAS, ADMISSAO_ESPERA_LEITURAS)
+
+def classificar(metodo: str, caminho: str):
+    """
+    Fila da requisição, ou None se ela não passa pelo controle.
+    """
+    if caminho.rstrip("/").endswith(ISENTAS) or metodo == "OPTIONS":
+        return None
+    return leituras if metodo in METODOS_LEITURA else escritas
+
+class AdmissaoMiddleware:
+    """
+    Middleware ASGI que só deixa a requisição seguir com uma vaga na sua fila; a vaga é
+    devolvida quando a resposta termina (inclusive as transmitidas em streaming).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        fila = classificar(scope["method"], scope["path"])
+        if fila is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await fila.entrar()
+        except Saturado:
+            resposta = JSONResponse(
+                status_code=503,
+                content={"detail": "Servidor sobrecarregado, tente novamente em instantes"},
+                headers={"Retry-After": str(ADMISSAO_RETRY_AFTER)},
+            )
+            await resposta(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            fila.sair()
+
+def exportar() -> str:
+    """
+    Métricas das filas no formato texto do Prometheus (acrescentadas a /metrics).
+    """
+    filas = (escritas, leituras)
+    linhas = [
+        "# HELP admissao_vagas Requisições que podem usar o banco ao mesmo tempo, por fila.",
+        "# TYPE admissao_vagas gauge",
+    ]
+    linhas += [f'admissao_vagas{{fila="{fila.nome}"}} {fila.vagas}' for fila in filas]
+    linhas += [
+        "# HELP admissao_em_execucao Requisições admitidas em andamento, por fila.",
+        "# TYPE admissao_em_execucao gauge",
+    ]
+    linhas += [f'admissao_em_execucao{{fila="{fila.nome}"}} {fila.em_execucao}' for fila in filas]
+    linhas += [
+        "# HELP admissao_aguardando Requisições esperando uma vaga, por fila.",
+        "# TYPE admissao_aguardando gauge",
+    ]
+    linhas += [f'admissao_aguardando{{fila="{fila.nome}"}} {fila.aguardando}' for fila in filas]
+    linhas += [
+        "# HELP admissao_admitidas_total Requisições admitidas, por fila.",
+        "# TYPE admissao_admitidas_total counter",
+    ]
+    linhas += [f'admissao_admitidas_total{{fila="{fila.nome}"}} {fila.admitidas}' for fila in filas]
+    linhas += [
+        "# HELP admissao_espera_segundos_total Tempo total de espera por vaga das requisições admitidas.",
+        "# TYPE admissao_espera_segundos_total counter",
+    ]
+    linhas += [f'admissao_espera_segundos_total{{fila="{fila.nome}"}} {fila.tempo_espera:.6f}' for fila in filas]
+    linhas += [
+        "# HELP admissao_rejeitadas_total Requisições recusadas com 503, por fila e motivo (fila_cheia, prazo).",
+        "# TYPE admissao_rejeitadas_total counter",
+    ]
+    for fila in filas:
+        for motivo in ("fila_cheia", "prazo"):
+            linhas.append(f'admissao_rejeitadas_total{{fila="{fila.nome}",motivo="{motivo}"}} {fila.rejeitadas[motivo]}')
+    return "\n".join(linhas) + "\n"
@@ -0,0 +1,128 @@
+"""
+Cache em memória do catálogo de produtos.
+
+O catálogo muda pouco em relação ao número de leituras: as consultas de produtos são
+guardadas num LRU limitado com expiração. A versão do catálogo vem do banco (tabela
+catalogo_versao, incrementada no commit de toda transação que altera produtos, venha de
+qualquer worker, da importação ou do app.cli): as leituras consultam a versão antes de
+tudo, e ela decide o 304, compõe o ETag e indexa as entradas do cache, que deixam de ser
+usadas assim que outra versão aparece.
+
+O estoque não muda a versão: cada venda o baixa, e um contador global no caminho da venda
+serializaria os commits e esvaziaria o cache a cada venda. Por isso o estoque servido pelo
+catálogo pode estar atrasado em até CATALOGO_CACHE_TTL segundos: as entradas do cache e o
+ETag também levam a janela de tempo corrente (relógio de parede, igual em todos os workers),
+e uma janela nova força a releitura. Telas que precisam do estoque ao vivo usam o evento
+estoque_alterado (/eventos/stream); a baixa em si é sempre validada no banco.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+from app.config import CATALOGO_CACHE_TAMANHO, CATALOGO_CACHE_TTL
+
+class CacheLRU:
+    """Cache LRU limitado com expiração por tempo (TTL), seguro para threads"""
+
+    def __init__(self, tamanho_maximo: int, ttl: float):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        """
+        Retorna (encontrado, valor); entradas expiradas contam como ausentes.
+        """
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return False, None
+            expira_em, valor = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return False, None
+            self._itens.move_to_end(chave)
+            return True, valor
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+# Duração da janela de validade do estoque servido pelo catálogo (ver docstring do módulo)
+DURACAO_JANELA_ESTOQUE = max(CATALOGO_CACHE_TTL, 1.0)
+
+def janela_estoque(agora: Optional[float] = None) -> int:
+    return int((time.time() if agora is None else agora) // DURACAO_JANELA_ESTOQUE)
+
+class CacheCatalogo:
+    """Cache do catálogo de produtos, com as entradas indexadas pela versão do banco"""
+
+    def __init__(self, tamanho_maximo: int, ttl: float):
+        self._cache = CacheLRU(tamanho_maximo, ttl)
+
+    def obter(self, versao: int, chave):
+        return self._cache.obter((versao, janela_estoque(), chave))
+
+    def guardar(self, versao: int, chave, valor):
+        # A versão é lida antes da consulta e na mesma sessão: dados lidos antes de uma
+        # alteração ficam numa versão antiga e nunca são servidos depois dela. Vale também
+        # para réplicas: catalogo_versao é replicada com os produtos, e uma réplica atrasada
+        # informa a própria versão, mais antiga, nunca a do primário com os dados antigos
+        self._cache.guardar((versao, janela_estoque(), chave), valor)
+
+catalogo = CacheCatalogo(CATALOGO_CACHE_TAMANHO, CATALOGO_CACHE_TTL)
+
+def etag_catalogo(versao, janela: int) -> str:
+    # O instante da alteração entra junto: um banco recriado ou restaurado não repete ETags
+    return f'W/"catalogo-{versao.versao}-{int(versao.atualizado_em.timestamp() * 1_000_000)}-{janela}"'
+
+def _nao_modificado(request: Request, etag: str, atualizado_em: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [valor.strip() for valor in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and atualizado_em is not None:
+        try:
+            return atualizado_em <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def condicional_catalogo(request: Request, response: Response, versao) -> Optional[Response]:
+    """
+    Trata GETs condicionais do catálogo a partir da versão lida do banco (ver
+    crud.produto.get_versao_catalogo): devolve um 304 pronto se o cliente já tem a versão
+    atual, sem consultar nem serializar mais nada; caso contrário, define ETag e Last-Modified.
+    """
+    janela = janela_estoque()
+    etag = etag_catalogo(versao, janela)
+    cabecalhos = {
+        "ETag": etag,
+        # O navegador pode guardar a resposta, mas revalida sempre (If-None-Match)
+        "Cache-Control": "no-cache",
+    }
+    # Last-Modified tem resolução de segundos: só é enviado quando a última alteração tem
+    # mais de um segundo, para que outra alteração no mesmo segundo não passe por igual.
+    # O início da janela do estoque conta como alteração
+    atualizado_em = None
+    if versao.estavel:
+        inicio_janela = datetime.fromtimestamp(janela * DURACAO_JANELA_ESTOQUE, timezone.utc)
+        atualizado_em = max(versao.atualizado_em, inicio_janela).astimezone(timezone.utc).replace(microsecond=0)
+        cabecalhos["Last-Modified"] = format_datetime(atualizado_em, usegmt=True)
+    if _nao_modificado(request, etag, atualizado_em):
+        return Response(status_code=304, headers=cabecalhos)
+    response.headers.update(cabecalhos)
+    return None
@@ -0,0 +1,179 @@
+"""
+Comandos de manutenção do sistema de vendas.
+
+Uso:
+    python -m app.cli criar-banco
+    python -m app.cli reconstruir-resumo
+    python -m app.cli importar-produtos produtos.csv [--separador ';']
+    python -m app.cli importar-clientes clientes.csv [--separador ';']
+    python -m app.cli criar-particoes [--meses 3]
+    python -m app.cli arquivar-particoes [--retencao 24] [--tablespace arquivo]
+    python -m app.cli listar-particoes
+"""
+import argparse
+import logging
+import sys
+from datetime import date
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app import config, database
+from app.database import SessionLocal, iniciar_banco
+from app.crud import importacao as crud_importacao
+from app.crud import particoes as crud_particoes
+from app.crud import produto_venda_diaria as crud_produto_venda_diaria
+from app.crud import venda_diaria as crud_venda_diaria
+from app.models import Base
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+def criar_esquema() -> bool:
+    """
+    Cria o esquema completo num banco vazio a partir dos models (create_all, com os
+    eventos after_create de app/models: partições, gatilhos e a versão do catálogo) e o
+    marca como atualizado (alembic stamp head). A primeira migração só altera tabelas que
+    já existiam, então `alembic upgrade head` não monta um banco do zero; as migrações
+    servem para atualizar bancos já criados.
+    Retorna False, sem alterar nada, se o banco já tem tabelas.
+    """
+    iniciar_banco()
+    database.verificar_versao_postgres()
+    if inspect(database.engine).get_table_names():
+        return False
+    Base.metadata.create_all(database.engine)
+    alembic = Config(str(ALEMBIC_INI))
+    alembic.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    command.stamp(alembic, "head")
+    return True
+
+def criar_banco(args):
+    if not criar_esquema():
+        sys.exit("O banco já tem tabelas: para atualizá-lo, use `alembic upgrade head`")
+    print("Banco criado e marcado na última migração (alembic stamp head)")
+
+def reconstruir_resumo(args):
+    db = SessionLocal()
+    try:
+        dias = crud_venda_diaria.reconstruir_vendas_diarias(db)
+        print(f"Resumo diário reconstruído: {dias} dia(s)")
+        linhas = crud_produto_venda_diaria.reconstruir_produtos_vendas_diarias(db)
+        print(f"Resumo diário por produto reconstruído: {linhas} linha(s) (produto, dia)")
+    finally:
+        db.close()
+
+def importar(args):
+    db = SessionLocal()
+    try:
+        with open(args.arquivo, encoding="utf-8-sig", newline="") as arquivo:
+            resultado = args.importar(db, arquivo, args.separador)
+    except crud_importacao.ArquivoInvalido as e:
+        sys.exit(f"Arquivo inválido: {e}")
+    finally:
+        db.close()
+
+    print(
+        f"{resultado.linhas_lidas} linha(s) lida(s): {resultado.inseridos} inserida(s), "
+        f"{resultado.atualizados} atualizada(s), {resultado.repetidos} repetida(s), "
+        f"{resultado.rejeitados} rejeitada(s)"
+    )
+    for erro in resultado.erros:
+        print(f"  linha {erro.linha}: {erro.erro}")
+    if resultado.rejeitados > len(resultado.erros):
+        print(f"  ... e mais {resultado.rejeitados - len(resultado.erros)} erro(s)")
+
+def criar_particoes(args):
+    db = SessionLocal()
+    try:
+        hoje = date.today()
+        meses = crud_particoes.garantir_particoes(db, hoje, crud_particoes.somar_meses(hoje, args.meses))
+        print(f"Partições garantidas até {crud_particoes.somar_meses(hoje, args.meses):%Y-%m}: {meses} mês(es) no banco")
+    finally:
+        db.close()
+
+def arquivar_particoes(args):
+    db = SessionLocal()
+    try:
+        arquivadas = crud_particoes.arquivar_particoes(db, args.retencao, tablespace=args.tablespace)
+    except ValueError as e:
+        sys.exit(str(e))
+    finally:
+        db.close()
+    print(f"{len(arquivadas)} partição(ões) arquivada(s)")
+    for particao in arquivadas:
+        print(f"  {particao}")
+
+def listar_particoes(args):
+    db = SessionLocal()
+    try:
+        particoes = crud_particoes.listar_particoes(db)
+    finally:
+        db.close()
+    for particao in particoes:
+        situacao = "arquivada" if particao["arquivada"] else "ativa"
+        print(f"{particao['particao']:28} {particao['tamanho'] / 1024 / 1024:10.1f} MB  "
+              f"{particao['tablespace']:16} {situacao}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    parser_banco = subparsers.add_parser(
+        "criar-banco",
+        help="Cria as tabelas num banco vazio e o marca na última migração (instalação nova, CI, benchmarks)"
+    )
+    parser_banco.set_defaults(func=criar_banco)
+
+    parser_resumo = subparsers.add_parser(
+        "reconstruir-resumo",
+        help="Recalcula as tabelas vendas_diarias e produtos_vendas_diarias a partir das vendas (backfill)"
+    )
+    parser_resumo.set_defaults(func=reconstruir_resumo)
+
+    for comando, funcao, descricao in (
+        ("importar-produtos", crud_importacao.importar_produtos, "produtos (upsert por id, se informado)"),
+        ("importar-clientes", crud_importacao.importar_clientes, "clientes (upsert por email)"),
+    ):
+        parser_importar = subparsers.add_parser(comando, help=f"Importa {descricao} de um arquivo CSV")
+        parser_importar.add_argument("arquivo", help="Caminho do CSV (UTF-8, com cabeçalho)")
+        parser_importar.add_argument("--separador", default=",", help="Separador de campos (padrão: ',')")
+        parser_importar.set_defaults(func=importar, importar=funcao)
+
+    parser_criar = subparsers.add_parser(
+        "criar-particoes",
+        help="Cria as partições mensais de vendas e venda_produto do mês corrente em diante"
+    )
+    parser_criar.add_argument(
+        "--meses", type=int, default=config.PARTICOES_MESES_A_FRENTE,
+        help=f"Meses à frente (padrão: {config.PARTICOES_MESES_A_FRENTE})"
+    )
+    parser_criar.set_defaults(func=criar_particoes)
+
+    parser_arquivar = subparsers.add_parser(
+        "arquivar-particoes",
+        help="Compacta as partições antigas, deixa-as somente leitura e opcionalmente as move de tablespace"
+    )
+    parser_arquivar.add_argument(
+        "--retencao", type=int, default=config.ARQUIVO_RETENCAO_MESES,
+        help=f"Meses mais recentes que não são arquivados (padrão: {config.ARQUIVO_RETENCAO_MESES})"
+    )
+    parser_arquivar.add_argument(
+        "--tablespace", default=config.ARQUIVO_TABLESPACE,
+        help="Tablespace de destino, criado antes pelo DBA (padrão: ARQUIVO_TABLESPACE; sem ele, não move)"
+    )
+    parser_arquivar.set_defaults(func=arquivar_particoes)
+
+    parser_listar = subparsers.add_parser("listar-particoes", help="Lista as partições com tamanho e situação")
+    parser_listar.set_defaults(func=listar_particoes)
+
+    args = parser.parse_args(argv)
+    iniciar_banco()
+    args.func(args)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
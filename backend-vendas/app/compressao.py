@@ -0,0 +1,75 @@
+"""
+Compressão negociada das respostas: brotli ou gzip, conforme o Accept-Encoding.
+
+Usa os responders do GZipMiddleware do Starlette, que já tratam o limite de tamanho,
+as respostas em streaming (exportação), o Vary e as respostas já codificadas; o
+text/event-stream (/eventos/stream) nunca é comprimido. O brotli é opcional: sem o
+pacote `brotli`, só gzip é oferecido.
+"""
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int = 4):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        # Em streaming, flush a cada parte: o cliente recebe os dados sem esperar o fim
+        saida = self.compressor.process(body)
+        return saida + (self.compressor.flush() if more_body else self.compressor.finish())
+
+def escolher_codificacao(accept_encoding: str) -> Optional[str]:
+    """
+    "br", "gzip" ou None a partir do Accept-Encoding, respeitando os pesos (q=0 recusa);
+    no empate, brotli (se disponível), que comprime mais o JSON.
+    """
+    pesos = {}
+    for parte in accept_encoding.lower().split(","):
+        nome, _, parametros = parte.partition(";")
+        peso = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                peso = float(parametros[2:])
+            except ValueError:
+                peso = 0.0
+        pesos[nome.strip()] = peso
+    curinga = pesos.get("*", 0.0)
+    candidatas = (["br"] if brotli is not None else []) + ["gzip"]
+    melhor = max(candidatas, key=lambda nome: pesos.get(nome, curinga))
+    return melhor if pesos.get(melhor, curinga) > 0 else None
+
+class CompressaoMiddleware:
+    """
+    Middleware ASGI que comprime as respostas com pelo menos `minimo` bytes.
+    """
+
+    def __init__(self, app, minimo: int = 1024, nivel_gzip: int = 6, nivel_brotli: int = 4):
+        self.app = app
+        self.minimo = minimo
+        self.nivel_gzip = nivel_gzip
+        self.nivel_brotli = nivel_brotli
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codificacao = escolher_codificacao(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacao == "br":
+            responder = BrotliResponder(self.app, self.minimo, quality=self.nivel_brotli)
+        elif codificacao == "gzip":
+            responder = GZipResponder(self.app, self.minimo, compresslevel=self.nivel_gzip)
+        else:
+            responder = IdentityResponder(self.app, self.minimo)
+        await responder(scope, receive, send)
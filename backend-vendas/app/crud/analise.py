@@ -0,0 +1,362 @@
+"""
+Análises de vendas com NumPy: médias móveis, crescimento entre períodos, RFM por cliente
+e previsão de receita.
+
+As vendas e as quantidades dos itens do período chegam em um COPY binário cada e viram
+arrays colunares direto do buffer, sem objetos ORM nem tuplas Python. As métricas são
+passes vetorizados sobre esses arrays: um bincount leva as linhas à série diária e o
+resto trabalha sobre ela (alguns milhares de dias, não milhões de linhas).
+
+Os arrays de um período ficam em cache para as outras análises do mesmo período e cada
+resultado fica em cache por ANALISE_CACHE_TTL segundos, então os números podem atrasar
+esse tempo em relação às escritas.
+"""
+import io
+import threading
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import Date, Integer, cast, func, literal, select
+from sqlalchemy.orm import Session
+
+from app.cache import CacheLRU
+from app.config import ANALISE_CACHE_DADOS, ANALISE_CACHE_TAMANHO, ANALISE_CACHE_TTL
+from app.models import Cliente, Venda, VendaProduto
+from app.schemas.analise import PeriodoAnalise
+
+# As datas viajam como número de dias desde EPOCA (int4 no COPY)
+EPOCA = date(2000, 1, 1)
+LIMITE_JANELA = 365
+LIMITE_PREVISAO = 365
+LIMITE_RFM = 1000
+# Dias de histórico necessários para ajustar a previsão (tendência e dia da semana)
+HISTORICO_MINIMO = 14
+
+# COPY binário: assinatura, flags (int32) e tamanho da extensão do cabeçalho (int32)
+_ASSINATURA_COPY = b"PGCOPY\n\xff\r\n\x00"
+
+def _linha_copy(*campos):
+    """
+    dtype de uma linha do COPY binário com colunas NOT NULL de tamanho fixo: número de
+    campos (int16) e, para cada campo, o tamanho (int32) e o valor, tudo big-endian.
+    """
+    formato = [("campos", ">i2")]
+    for nome, tipo in campos:
+        formato += [(f"tamanho_{nome}", ">i4"), (nome, tipo)]
+    return np.dtype(formato)
+
+_LINHA_VENDA = _linha_copy(("dia", ">i4"), ("cliente_id", ">i4"), ("total", ">f8"))
+_LINHA_ITEM = _linha_copy(("dia", ">i4"), ("quantidade", ">i4"))
+
+_dados = CacheLRU(ANALISE_CACHE_DADOS, ANALISE_CACHE_TTL)
+_resultados = CacheLRU(ANALISE_CACHE_TAMANHO, ANALISE_CACHE_TTL)
+# Uma carga por período de cada vez: as análises de um mesmo painel, pedidas juntas,
+# esperam a primeira em vez de repetir o COPY. Cada período guarda (lock, interessados);
+# o lock só sai do dicionário quando ninguém mais espera por ele
+_cargas = {}
+_lock_cargas = threading.Lock()
+
+def _dia(coluna):
+    return cast(coluna - literal(EPOCA, Date), Integer)
+
+def _filtrar_periodo(stmt, coluna, data_inicio: Optional[date], data_fim: Optional[date]):
+    if data_inicio:
+        stmt = stmt.where(coluna >= data_inicio)
+    if data_fim:
+        stmt = stmt.where(coluna <= data_fim)
+    return stmt
+
+def stmt_colunas_vendas(data_inicio: Optional[date], data_fim: Optional[date]):
+    # Sem nulos: o COPY binário tem linhas de tamanho fixo (cliente 0 = venda sem cliente)
+    stmt = select(
+        _dia(Venda.data_venda),
+        func.coalesce(Venda.cliente_id, 0),
+        func.coalesce(Venda.total, 0.0),
+    )
+    return _filtrar_periodo(stmt, Venda.data_venda, data_inicio, data_fim)
+
+def stmt_colunas_itens(data_inicio: Optional[date], data_fim: Optional[date]):
+    stmt = select(_dia(VendaProduto.data_venda), VendaProduto.quantidade)
+    return _filtrar_periodo(stmt, VendaProduto.data_venda, data_inicio, data_fim)
+
+def ler_copy_binario(conteudo, dtype: np.dtype) -> np.ndarray:
+    """
+    Linhas de um COPY ... TO STDOUT WITH (FORMAT binary) como array estruturado.
+    """
+    if bytes(conteudo[:len(_ASSINATURA_COPY)]) != _ASSINATURA_COPY:
+        raise ValueError("Formato de COPY binário inesperado")
+    extensao = int.from_bytes(conteudo[len(_ASSINATURA_COPY) + 4:len(_ASSINATURA_COPY) + 8], "big")
+    inicio = len(_ASSINATURA_COPY) + 8 + extensao
+    # O conteúdo termina com o marcador de fim (int16 -1)
+    quantidade = (len(conteudo) - inicio - 2) // dtype.itemsize
+    return np.frombuffer(conteudo, dtype=dtype, count=quantidade, offset=inicio)
+
+def _copiar(db: Session, stmt, dtype: np.dtype) -> dict:
+    compilado = stmt.compile(dialect=db.get_bind().dialect)
+    cursor = db.connection().connection.driver_connection.cursor()
+    consulta = cursor.mogrify(str(compilado), compilado.params).decode()
+    buffer = io.BytesIO()
+    cursor.copy_expert(f"COPY ({consulta}) TO STDOUT WITH (FORMAT binary)", buffer)
+    linhas = ler_copy_binario(buffer.getbuffer(), dtype)
+    # Colunas em arrays próprios, na ordem de bytes da máquina (o buffer pode ser liberado)
+    return {
+        nome: linhas[nome].astype(dtype[nome].newbyteorder("="))
+        for nome in dtype.names
+        if nome != "campos" and not nome.startswith("tamanho_")
+    }
+
+class DadosPeriodo:
+    """Vendas e itens de um período em arrays colunares, com a série diária já agregada"""
+
+    def __init__(self, inicio: date, fim: date, vendas: dict, itens: dict):
+        self.inicio = inicio
+        self.fim = fim
+        self.dias = vendas["dia"]
+        self.clientes = vendas["cliente_id"]
+        self.totais = vendas["total"]
+        # Série diária densa (dias sem venda valem zero), de inicio a fim
+        tamanho = (fim - inicio).days + 1
+        base = (inicio - EPOCA).days
+        self.receita = np.bincount(self.dias - base, weights=self.totais, minlength=tamanho)
+        self.vendas = np.bincount(self.dias - base, minlength=tamanho)
+        self.itens = np.bincount(itens["dia"] - base, weights=itens["quantidade"], minlength=tamanho).astype(np.int64)
+
+    def datas(self) -> np.ndarray:
+        return np.arange(np.datetime64(self.inicio), np.datetime64(self.fim + timedelta(days=1)))
+
+def _buscar_dados(db: Session, data_inicio: Optional[date], data_fim: Optional[date]) -> DadosPeriodo:
+    vendas = _copiar(db, stmt_colunas_vendas(data_inicio, data_fim), _LINHA_VENDA)
+    itens = _copiar(db, stmt_colunas_itens(data_inicio, data_fim), _LINHA_ITEM)
+    db.rollback()
+    dias = vendas["dia"]
+    # Sem data_fim, a série vai até hoje (ou até a última venda, se for futura);
+    # sem data_inicio, começa na primeira venda
+    fim = data_fim or date.today()
+    if data_fim is None and len(dias):
+        fim = max(fim, EPOCA + timedelta(days=int(dias.max())))
+    inicio = data_inicio or (EPOCA + timedelta(days=int(dias.min())) if len(dias) else fim)
+    return DadosPeriodo(inicio, max(inicio, fim), vendas, itens)
+
+def carregar_dados(db: Session, data_inicio: Optional[date], data_fim: Optional[date]) -> DadosPeriodo:
+    chave = (data_inicio, data_fim)
+    encontrado, dados = _dados.obter(chave)
+    if encontrado:
+        return dados
+    with _lock_cargas:
+        carga, interessados = _cargas.get(chave, (None, 0))
+        carga = carga or threading.Lock()
+        _cargas[chave] = (carga, interessados + 1)
+    try:
+        with carga:
+            encontrado, dados = _dados.obter(chave)
+            if not encontrado:
+                dados = _buscar_dados(db, data_inicio, data_fim)
+                _dados.guardar(chave, dados)
+    finally:
+        with _lock_cargas:
+            interessados = _cargas[chave][1] - 1
+            if interessados:
+                _cargas[chave] = (carga, interessados)
+            else:
+                del _cargas[chave]
+    return dados
+
+def _em_cache(chave, calcular):
+    encontrado, resultado = _resultados.obter(chave)
+    if not encontrado:
+        resultado = calcular()
+        _resultados.guardar(chave, resultado)
+    return resultado
+
+def _opcional(valores: np.ndarray) -> list:
+    # NaN (janela incompleta, período anterior zerado) vira null
+    return [None if valor != valor else valor for valor in valores.tolist()]
+
+def media_movel(valores: np.ndarray, janela: int) -> np.ndarray:
+    """
+    Média dos últimos `janela` valores em cada posição (NaN antes de a janela fechar).
+    """
+    acumulado = np.concatenate(([0.0], np.cumsum(valores, dtype=np.float64)))
+    media = np.full(len(valores), np.nan)
+    if len(valores) >= janela:
+        media[janela - 1:] = (acumulado[janela:] - acumulado[:-janela]) / janela
+    return media
+
+def variacao_percentual(valores: np.ndarray) -> np.ndarray:
+    """
+    Variação de cada posição sobre a anterior, em %; NaN na primeira e após um zero.
+    """
+    anterior = np.concatenate(([np.nan], valores[:-1].astype(np.float64)))
+    variacao = np.full(len(valores), np.nan)
+    np.divide((valores - anterior) * 100.0, anterior, out=variacao, where=anterior > 0)
+    return variacao
+
+def notas_quintil(valores: np.ndarray) -> np.ndarray:
+    """
+    Nota de 1 a 5 pela posição do valor entre todos (quintis); empates recebem a mesma
+    nota, a da posição mais alta do grupo (os maiores valores empatados ficam com 5).
+    """
+    if len(valores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    # Quantos valores são menores ou iguais: de 1 a len(valores)
+    posicao = np.searchsorted(np.sort(valores), valores, side="right")
+    return 1 + (posicao - 1) * 5 // len(valores)
+
+def get_medias_moveis(db: Session, data_inicio: Optional[date], data_fim: Optional[date], janela: int = 7):
+    janela = min(max(janela, 1), LIMITE_JANELA)
+    def calcular():
+        dados = carregar_dados(db, data_inicio, data_fim)
+        return {
+            "data_inicio": dados.inicio,
+            "data_fim": dados.fim,
+            "janela": janela,
+            "pontos": [
+                dict(zip(("data", "receita", "vendas", "itens", "media_receita", "media_vendas"), ponto))
+                for ponto in zip(
+                    dados.datas().astype(str).tolist(),
+                    dados.receita.tolist(),
+                    dados.vendas.tolist(),
+                    dados.itens.tolist(),
+                    _opcional(media_movel(dados.receita, janela)),
+                    _opcional(media_movel(dados.vendas, janela)),
+                )
+            ],
+        }
+    return _em_cache(("medias_moveis", data_inicio, data_fim, janela), calcular)
+
+def get_crescimento(
+    db: Session,
+    data_inicio: Optional[date],
+    data_fim: Optional[date],
+    agrupamento: PeriodoAnalise = PeriodoAnalise.mes,
+):
+    def calcular():
+        dados = carregar_dados(db, data_inicio, data_fim)
+        datas = dados.datas()
+        if agrupamento == PeriodoAnalise.mes:
+            chaves = datas.astype("datetime64[M]").astype("datetime64[D]")
+        elif agrupamento == PeriodoAnalise.semana:
+            # Semanas começando na segunda-feira (1970-01-01, o dia 0, foi uma quinta)
+            chaves = datas - (datas.astype(np.int64) + 3) % 7
+        else:
+            chaves = datas
+        # O primeiro e o último período podem estar incompletos (cortados pelo filtro de datas)
+        periodos, indice = np.unique(chaves, return_inverse=True)
+        receita = np.bincount(indice, weights=dados.receita)
+        vendas = np.bincount(indice, weights=dados.vendas).astype(np.int64)
+        itens = np.bincount(indice, weights=dados.itens).astype(np.int64)
+        ticket = np.divide(receita, vendas, out=np.zeros(len(receita)), where=vendas > 0)
+        return {
+            "data_inicio": dados.inicio,
+            "data_fim": dados.fim,
+            "agrupamento": agrupamento,
+            "periodos": [
+                dict(zip(
+                    ("periodo", "receita", "vendas", "itens", "ticket_medio", "crescimento_receita", "crescimento_vendas"),
+                    periodo,
+                ))
+                for periodo in zip(
+                    periodos.astype(str).tolist(),
+                    receita.tolist(),
+                    vendas.tolist(),
+                    itens.tolist(),
+                    ticket.tolist(),
+                    _opcional(variacao_percentual(receita)),
+                    _opcional(variacao_percentual(vendas)),
+                )
+            ],
+        }
+    return _em_cache(("crescimento", data_inicio, data_fim, agrupamento), calcular)
+
+def get_rfm(db: Session, data_inicio: Optional[date], data_fim: Optional[date], limit: int = 100):
+    """
+    Recência, frequência e valor das compras de cada cliente no período, com notas por
+    quintil. A recência conta a partir do fim do período. Vendas sem cliente ficam de fora.
+    """
+    limit = min(max(limit, 1), LIMITE_RFM)
+    def calcular():
+        dados = carregar_dados(db, data_inicio, data_fim)
+        identificadas = dados.clientes > 0
+        clientes, indice = np.unique(dados.clientes[identificadas], return_inverse=True)
+        frequencia = np.bincount(indice, minlength=len(clientes))
+        monetario = np.bincount(indice, weights=dados.totais[identificadas], minlength=len(clientes))
+        ultima = np.full(len(clientes), np.iinfo(np.int32).min, dtype=np.int64)
+        np.maximum.at(ultima, indice, dados.dias[identificadas])
+        recencia = (dados.fim - EPOCA).days - ultima
+
+        # Recência menor é melhor: a nota sai da recência negativa
+        nota_r, nota_f, nota_m = notas_quintil(-recencia), notas_quintil(frequencia), notas_quintil(monetario)
+        ordem = np.lexsort((clientes, -monetario, -(nota_r + nota_f + nota_m)))[:limit]
+
+        ids = clientes[ordem].tolist()
+        nomes = dict(db.execute(select(Cliente.id, Cliente.nome).where(Cliente.id.in_(ids))).all()) if ids else {}
+        db.rollback()
+        return {
+            "data_inicio": dados.inicio,
+            "data_fim": dados.fim,
+            "clientes_analisados": len(clientes),
+            "clientes": [
+                {
+                    "id": cliente_id,
+                    "nome": nomes.get(cliente_id),
+                    "recencia": r,
+                    "frequencia": f,
+                    "monetario": m,
+                    "nota_recencia": nr,
+                    "nota_frequencia": nf,
+                    "nota_monetario": nm,
+                    "rfm": f"{nr}{nf}{nm}",
+                }
+                for cliente_id, r, f, m, nr, nf, nm in zip(
+                    ids,
+                    recencia[ordem].tolist(),
+                    frequencia[ordem].tolist(),
+                    monetario[ordem].tolist(),
+                    nota_r[ordem].tolist(),
+                    nota_f[ordem].tolist(),
+                    nota_m[ordem].tolist(),
+                )
+            ],
+        }
+    return _em_cache(("rfm", data_inicio, data_fim, limit), calcular)
+
+def prever(receita: np.ndarray, inicio: date, dias: int):
+    """
+    Ajusta receita diária ~ tendência linear + efeito do dia da semana por mínimos
+    quadrados e projeta os próximos `dias`. Retorna (previsto, desvio dos resíduos, tendência).
+    """
+    historico = len(receita)
+    if historico < HISTORICO_MINIMO:
+        raise ValueError(f"Histórico insuficiente: são necessários pelo menos {HISTORICO_MINIMO} dias")
+    t = np.arange(historico + dias)
+    dia_semana = (np.datetime64(inicio) + t).astype(np.int64) % 7
+    modelo = np.column_stack([np.ones(len(t)), t, dia_semana[:, None] == np.arange(1, 7)]).astype(np.float64)
+    coeficientes, *_ = np.linalg.lstsq(modelo[:historico], receita, rcond=None)
+    ajuste = modelo @ coeficientes
+    residuos = receita - ajuste[:historico]
+    desvio = float(np.sqrt(residuos @ residuos / max(historico - modelo.shape[1], 1)))
+    return ajuste[historico:], desvio, float(coeficientes[1])
+
+def get_previsao(db: Session, data_inicio: Optional[date], data_fim: Optional[date], dias: int = 30):
+    dias = min(max(dias, 1), LIMITE_PREVISAO)
+    def calcular():
+        dados = carregar_dados(db, data_inicio, data_fim)
+        previsto, desvio, tendencia = prever(dados.receita, dados.inicio, dias)
+        # Faixa de ~95% supondo resíduos normais; receita negativa não existe
+        return {
+            "data_inicio": dados.inicio,
+            "data_fim": dados.fim,
+            "dias": dias,
+            "tendencia_diaria": tendencia,
+            "pontos": [
+                dict(zip(("data", "receita_prevista", "minimo", "maximo"), ponto))
+                for ponto in zip(
+                    np.arange(np.datetime64(dados.fim) + 1, np.datetime64(dados.fim) + 1 + dias).astype(str).tolist(),
+                    np.maximum(previsto, 0.0).tolist(),
+                    np.maximum(previsto - 1.96 * desvio, 0.0).tolist(),
+                    np.maximum(previsto + 1.96 * desvio, 0.0).tolist(),
+                )
+            ],
+        }
+    return _em_cache(("previsao", data_inicio, data_fim, dias), calcular)
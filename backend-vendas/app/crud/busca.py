@@ -0,0 +1,39 @@
+from sqlalchemy import func, or_
+
+# Resultados por busca: o suficiente para uma lista de autocompletar
+LIMITE_BUSCA = 20
+
+def escapar_like(termo: str) -> str:
+    return termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# Abaixo disto o termo não forma trigramas: a busca fica só no prefixo
+MINIMO_TRIGRAMAS = 3
+
+def criterios_busca(colunas, termo: str):
+    """
+    Filtro e ordenação da busca por texto nas colunas informadas (extensão pg_trgm):
+    - prefixo: lower(coluna) LIKE 'termo%' (índice text_pattern_ops)
+    - substring: coluna ILIKE '%termo%' (índice GIN de trigramas)
+    - aproximada: coluna %> termo, semelhança por palavra que tolera erros de digitação
+    Termos de 1 ou 2 letras (a primeira tecla do autocompletar) usam só o prefixo: sem
+    trigramas, o GIN não filtra nada e o OR com ele levaria a varrer a tabela inteira.
+    Os resultados com prefixo vêm primeiro, depois os mais parecidos com o termo.
+    Retorna (filtro, lista de expressões de ordenação).
+    """
+    termo_like = escapar_like(termo.lower())
+    prefixos = [func.lower(coluna).like(f"{termo_like}%") for coluna in colunas]
+    semelhanca = func.greatest(*(func.word_similarity(termo, coluna) for coluna in colunas))
+    if len(termo) < MINIMO_TRIGRAMAS:
+        return or_(*prefixos), [semelhanca.desc()]
+    filtro = or_(
+        *prefixos,
+        *(coluna.ilike(f"%{termo_like}%") for coluna in colunas),
+        *(coluna.op("%>")(termo) for coluna in colunas)
+    )
+    return filtro, [or_(*prefixos).desc(), semelhanca.desc()]
+
+def normalizar_busca(termo: str, limit: int):
+    """
+    Remove espaços nas pontas e limita a quantidade de resultados a LIMITE_BUSCA.
+    """
+    return termo.strip(), min(max(limit, 1), LIMITE_BUSCA)
@@ -0,0 +1,27 @@
+"""
+Campos esparsos das listagens (?fields=id,nome): só as colunas pedidas saem do banco e
+entram no JSON.
+"""
+from typing import Optional, Sequence
+
+class CamposInvalidos(ValueError):
+    """Campo pedido em ?fields= que a listagem não tem"""
+
+def selecionar_colunas(colunas: Sequence, campos: Optional[str], chave: Sequence = ()) -> tuple:
+    """
+    Colunas da listagem restritas aos nomes em `campos` (separados por vírgula), na ordem
+    da listagem. As colunas de `chave` (a da paginação por cursor) entram sempre. Sem
+    `campos`, retorna todas.
+    """
+    if not campos:
+        return tuple(colunas)
+    pedidos = {nome.strip() for nome in campos.split(",") if nome.strip()}
+    por_nome = {coluna.key: coluna for coluna in colunas}
+    desconhecidos = pedidos - por_nome.keys()
+    if desconhecidos:
+        raise CamposInvalidos(
+            f"Campos inválidos: {', '.join(sorted(desconhecidos))}. "
+            f"Disponíveis: {', '.join(por_nome)}"
+        )
+    pedidos |= {coluna.key for coluna in chave}
+    return tuple(coluna for coluna in colunas if coluna.key in pedidos)
@@ -1,15 +1,64 @@
+from typing import Optional
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from app import models, schemas
+from app.crud.busca import criterios_busca
+from app.crud.campos import selecionar_colunas
+from app.crud.paginacao import decodificar_cursor_id
+
+# Colunas da listagem (as do schema Cliente): linhas simples em vez de objetos ORM
+COLUNAS_LISTAGEM = (models.Cliente.id, models.Cliente.nome, models.Cliente.email, models.Cliente.telefone)
+
+def colunas_listagem(campos: Optional[str] = None) -> tuple:
+    # ?fields= da listagem; o id (chave do cursor) vem sempre
+    return selecionar_colunas(COLUNAS_LISTAGEM, campos, chave=(models.Cliente.id,))
+
+def stmt_criar_cliente(cliente: schemas.ClienteCreate):
+    """
+    INSERT que já devolve a linha gravada (RETURNING): sem o SELECT do refresh após o commit.
+    """
+    return insert(models.Cliente).values(
+        nome=cliente.nome, email=cliente.email, telefone=cliente.telefone
+    ).returning(*COLUNAS_LISTAGEM)
 
 def create_cliente(db: Session, cliente: schemas.ClienteCreate):
-    db_cliente = models.Cliente(nome=cliente.nome, email=cliente.email, telefone=cliente.telefone)
-    db.add(db_cliente)
+    db_cliente = db.execute(stmt_criar_cliente(cliente)).one()
     db.commit()
-    db.refresh(db_cliente)
     return db_cliente
 
 def get_cliente(db: Session, cliente_id: int):
     return db.query(models.Cliente).filter(models.Cliente.id == cliente_id).first()
 
-def get_clientes(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Cliente).offset(skip).limit(limit).all()
+def stmt_listar_clientes(
+    skip: int = 0, limit: int = 100, cursor: Optional[str] = None, colunas: tuple = COLUNAS_LISTAGEM
+):
+    stmt = select(*colunas).order_by(models.Cliente.id)
+    if cursor:
+        # Paginação por chave: busca pelo índice a partir do último id da página anterior
+        stmt = stmt.where(models.Cliente.id > decodificar_cursor_id(cursor))
+    else:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit)
+
+def get_clientes(
+    db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, colunas: tuple = COLUNAS_LISTAGEM
+):
+    return db.execute(stmt_listar_clientes(skip, limit, cursor, colunas)).all()
+
+def stmt_buscar_clientes(termo: str, limit: int):
+    """
+    Busca de clientes pelo nome ou email (prefixo, substring ou aproximada), ordenada por relevância.
+    """
+    filtro, relevancia = criterios_busca([models.Cliente.nome, models.Cliente.email], termo)
+    return (
+        select(models.Cliente)
+        .where(filtro)
+        .order_by(*relevancia, models.Cliente.nome, models.Cliente.id)
+        .limit(limit)
+    )
+
+def buscar_clientes(db: Session, termo: str, limit: int = 10):
+    return db.scalars(stmt_buscar_clientes(termo, limit)).all()
+
+def chave_cursor(cliente: models.Cliente):
+    return (cliente.id,)
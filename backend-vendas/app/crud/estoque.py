@@ -0,0 +1,77 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app import eventos
+from app.models.estoque import Produto
+
+class EstoqueInsuficiente(ValueError):
+    """Não há estoque para a quantidade pedida do produto."""
+
+    def __init__(self, produto_id: int, quantidade: int):
+        self.produto_id = produto_id
+        self.quantidade = quantidade
+        super().__init__(f"Estoque insuficiente para o produto {produto_id} (quantidade pedida: {quantidade})")
+
+def stmt_baixar(produto_id: int, quantidade: int):
+    """
+    Baixa condicional: só altera a linha se houver estoque, sem ler antes de escrever.
+    Concorrentes no mesmo produto esperam apenas o lock da linha, e o segundo reavalia a
+    condição sobre o valor já atualizado, então não há venda acima do estoque.
+    """
+    return (
+        update(Produto)
+        .where(Produto.id == produto_id, Produto.quantidade_em_estoque >= quantidade)
+        .values(quantidade_em_estoque=Produto.quantidade_em_estoque - quantidade)
+        .returning(Produto.id, Produto.quantidade_em_estoque)
+        .execution_options(synchronize_session=False)
+    )
+
+def stmt_devolver(produto_id: int, quantidade: int):
+    return (
+        update(Produto)
+        .where(Produto.id == produto_id)
+        .values(quantidade_em_estoque=Produto.quantidade_em_estoque + quantidade)
+        .returning(Produto.id, Produto.quantidade_em_estoque)
+        .execution_options(synchronize_session=False)
+    )
+
+def publicar_estoque(db, produto_id: int, quantidade_em_estoque: int):
+    """
+    Evento de estoque alterado, enviado às telas ao vivo após o commit.
+    """
+    eventos.publicar(db, "estoque_alterado", {"produto_id": produto_id, "quantidade_em_estoque": quantidade_em_estoque})
+
+def variacao_itens(antes: dict, depois: dict) -> dict:
+    """
+    Diferença de quantidade por produto entre dois conjuntos de itens ({produto_id: quantidade}).
+    """
+    return {
+        produto_id: depois.get(produto_id, 0) - antes.get(produto_id, 0)
+        for produto_id in set(antes) | set(depois)
+        if depois.get(produto_id, 0) != antes.get(produto_id, 0)
+    }
+
+def stmts_movimentar(variacoes: dict):
+    """
+    Um UPDATE por produto, sempre em ordem de id: transações que tocam os mesmos produtos
+    travam as linhas na mesma ordem e não entram em deadlock.
+    Variação positiva baixa o estoque (saída), negativa devolve.
+    """
+    for produto_id in sorted(variacoes):
+        quantidade = variacoes[produto_id]
+        if quantidade > 0:
+            yield produto_id, quantidade, stmt_baixar(produto_id, quantidade)
+        elif quantidade < 0:
+            yield produto_id, quantidade, stmt_devolver(produto_id, -quantidade)
+
+def movimentar_estoque(db: Session, variacoes: dict):
+    """
+    Aplica as variações de estoque na transação corrente; levanta EstoqueInsuficiente se
+    alguma baixa não couber. O commit (ou rollback) fica a cargo de quem chama.
+    """
+    for produto_id, quantidade, stmt in stmts_movimentar(variacoes):
+        linha = db.execute(stmt).first()
+        if linha is None:
+            if quantidade > 0:
+                raise EstoqueInsuficiente(produto_id, quantidade)
+            continue
+        publicar_estoque(db, linha.id, linha.quantidade_em_estoque)
@@ -0,0 +1,138 @@
+"""
+Exportação de vendas em CSV ou NDJSON, gerada em partes para StreamingResponse.
+
+A consulta usa yield_per: o driver lê as linhas por um cursor do lado do servidor, em
+lotes de LINHAS_POR_LOTE, e cada lote é formatado e enviado antes do próximo ser lido.
+A memória fica constante qualquer que seja o período exportado.
+"""
+import csv
+import io
+import json
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import and_, select
+from app.models.cliente import Cliente
+from app.models.estoque import Produto
+from app.models.venda import Venda
+from app.models.venda_produto import VendaProduto
+from app.schemas.exportacao import FormatoExportacao
+
+LINHAS_POR_LOTE = 2000
+
+COLUNAS_VENDA = ["venda_id", "data_venda", "cliente_id", "cliente_nome", "total"]
+COLUNAS_ITEM = ["produto_id", "produto_nome", "quantidade", "preco_unitario", "subtotal"]
+
+def _juncao_itens(data_inicio: Optional[date], data_fim: Optional[date]):
+    # Itens da mesma partição mensal da venda; a faixa de datas na condição do OUTER JOIN
+    # restringe as partições de venda_produto lidas, sem descartar vendas sem itens
+    condicao = and_(VendaProduto.venda_id == Venda.id, VendaProduto.data_venda == Venda.data_venda)
+    if data_inicio:
+        condicao = and_(condicao, VendaProduto.data_venda >= data_inicio)
+    if data_fim:
+        condicao = and_(condicao, VendaProduto.data_venda <= data_fim)
+    return condicao
+
+def stmt_exportar_vendas(data_inicio: Optional[date] = None, data_fim: Optional[date] = None, itens: bool = False):
+    """
+    Vendas do período em ordem de (data_venda, id), servida pelo índice ix_vendas_data_venda_id.
+    Com itens, uma linha por item da venda (vendas sem itens aparecem uma vez, com os campos
+    do item vazios).
+    """
+    stmt = (
+        select(
+            Venda.id.label("venda_id"),
+            Venda.data_venda,
+            Venda.cliente_id,
+            Cliente.nome.label("cliente_nome"),
+            Venda.total,
+        )
+        .outerjoin(Cliente, Cliente.id == Venda.cliente_id)
+        .order_by(Venda.data_venda, Venda.id)
+    )
+    if itens:
+        stmt = (
+            stmt.add_columns(
+                VendaProduto.produto_id,
+                Produto.nome.label("produto_nome"),
+                VendaProduto.quantidade,
+                VendaProduto.preco_unitario,
+                (VendaProduto.quantidade * VendaProduto.preco_unitario).label("subtotal"),
+            )
+            .outerjoin(VendaProduto, _juncao_itens(data_inicio, data_fim))
+            .outerjoin(Produto, Produto.id == VendaProduto.produto_id)
+            .order_by(VendaProduto.produto_id)
+        )
+    if data_inicio:
+        stmt = stmt.where(Venda.data_venda >= data_inicio)
+    if data_fim:
+        stmt = stmt.where(Venda.data_venda <= data_fim)
+    return stmt.execution_options(yield_per=LINHAS_POR_LOTE)
+
+class FormatadorCSV:
+    """Uma linha por venda (ou por item, com os dados da venda repetidos)."""
+
+    media_type = "text/csv; charset=utf-8"
+    extensao = "csv"
+
+    def __init__(self, itens: bool):
+        self.colunas = COLUNAS_VENDA + (COLUNAS_ITEM if itens else [])
+        self._buffer = io.StringIO()
+        self._escritor = csv.writer(self._buffer)
+
+    def _esvaziar(self) -> str:
+        conteudo = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return conteudo
+
+    def cabecalho(self) -> str:
+        self._escritor.writerow(self.colunas)
+        return self._esvaziar()
+
+    def lote(self, linhas) -> str:
+        self._escritor.writerows(linhas)
+        return self._esvaziar()
+
+    def fim(self) -> str:
+        return ""
+
+class FormatadorNDJSON:
+    """Um objeto JSON por venda; com itens, eles vêm aninhados na lista "itens"."""
+
+    media_type = "application/x-ndjson"
+    extensao = "ndjson"
+
+    def __init__(self, itens: bool):
+        self.itens = itens
+        self._venda = None  # venda em montagem: os itens dela podem continuar no próximo lote
+
+    @staticmethod
+    def _json(objeto) -> str:
+        return json.dumps(objeto, ensure_ascii=False, default=str) + "\n"
+
+    def cabecalho(self) -> str:
+        return ""
+
+    def lote(self, linhas) -> str:
+        if not self.itens:
+            return "".join(self._json(dict(zip(COLUNAS_VENDA, linha))) for linha in linhas)
+
+        partes = []
+        for linha in linhas:
+            venda, item = linha[:len(COLUNAS_VENDA)], linha[len(COLUNAS_VENDA):]
+            if self._venda is None or self._venda["venda_id"] != venda[0]:
+                if self._venda is not None:
+                    partes.append(self._json(self._venda))
+                self._venda = dict(zip(COLUNAS_VENDA, venda), itens=[])
+            if item[0] is not None:
+                self._venda["itens"].append(dict(zip(COLUNAS_ITEM, item)))
+        return "".join(partes)
+
+    def fim(self) -> str:
+        return self._json(self._venda) if self._venda is not None else ""
+
+def formatador(formato: FormatoExportacao, itens: bool):
+    if formato == FormatoExportacao.ndjson:
+        return FormatadorNDJSON(itens)
+    return FormatadorCSV(itens)
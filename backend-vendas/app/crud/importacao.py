@@ -0,0 +1,217 @@
+"""
+Importação em massa de produtos e clientes a partir de CSV.
+
+As linhas são validadas com os schemas Pydantic e as válidas seguem em lotes, via COPY,
+para uma tabela temporária; a gravação final é um único INSERT ... ON CONFLICT a partir
+dela. Tudo numa transação: ou o arquivo inteiro (menos as linhas rejeitadas) é gravado,
+ou nada.
+"""
+import csv
+import io
+from typing import IO, List
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import schemas
+
+# Linhas validadas juntas e enviadas num mesmo COPY para a tabela temporária
+TAMANHO_LOTE = 10_000
+# Erros detalhados no relatório (os demais entram só na contagem de rejeitados)
+LIMITE_ERROS = 1000
+# Estoque de um produto novo com a célula vazia (o padrão de ProdutoCreate)
+ESTOQUE_PADRAO = schemas.ProdutoCreate.model_fields["quantidade_em_estoque"].default
+
+class ArquivoInvalido(ValueError):
+    """O CSV não pode ser importado (cabeçalho ausente, sem as colunas obrigatórias ou malformado)."""
+
+def _mensagem_erro(erro: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in detalhe['loc'])}: {detalhe['msg']}"
+        for detalhe in erro.errors()
+    )
+
+def _carregar_temporaria(db: Session, arquivo: IO[str], separador: str, tabela: str, schema, colunas: list):
+    """
+    Valida o CSV linha a linha contra `schema` e copia as válidas para a tabela temporária,
+    que já deve existir com as colunas (linha, *colunas). Células vazias (e colunas fora do
+    cabeçalho) vão como NULL, não com o padrão do schema: numa atualização, mantêm o valor atual.
+    Retorna (linhas_lidas, erros, rejeitados, colunas presentes no cabeçalho).
+    """
+    leitor = csv.DictReader(arquivo, delimiter=separador)
+    if not leitor.fieldnames:
+        raise ArquivoInvalido("Arquivo vazio ou sem cabeçalho")
+    leitor.fieldnames = [nome.strip().lower() for nome in leitor.fieldnames]
+    obrigatorias = [nome for nome, campo in schema.model_fields.items() if campo.is_required()]
+    ausentes = [nome for nome in obrigatorias if nome not in leitor.fieldnames]
+    if ausentes:
+        raise ArquivoInvalido(f"Colunas obrigatórias ausentes: {', '.join(ausentes)}")
+
+    cursor = db.connection().connection.driver_connection.cursor()
+    comando_copy = f"COPY {tabela} (linha, {', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)"
+    validador = TypeAdapter(List[schema])
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    linhas_lidas = 0
+    rejeitados = 0
+    erros = []
+
+    def rejeitar(numero_linha: int, erro: ValidationError):
+        nonlocal rejeitados
+        rejeitados += 1
+        if len(erros) < LIMITE_ERROS:
+            erros.append(schemas.ErroImportacao(linha=numero_linha, erro=_mensagem_erro(erro)))
+
+    def enviar_lote(lote: list):
+        # O lote inteiro é validado de uma vez; só se houver erro valida linha a linha
+        # para saber quais linhas rejeitar
+        try:
+            validos = zip(lote, validador.validate_python([dados for _, dados in lote]))
+        except ValidationError:
+            validos = []
+            for numero, dados in lote:
+                try:
+                    validos.append(((numero, dados), schema.model_validate(dados)))
+                except ValidationError as erro:
+                    rejeitar(numero, erro)
+
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows(
+            (numero, *(getattr(item, coluna) if coluna in dados else None for coluna in colunas))
+            for (numero, dados), item in validos
+        )
+        buffer.seek(0)
+        cursor.copy_expert(comando_copy, buffer)
+
+    lote = []
+    try:
+        for registro in leitor:
+            linhas_lidas += 1
+            # Campos vazios ficam de fora da validação (obrigatórios falham) e vão como NULL
+            lote.append((
+                leitor.line_num,
+                {chave: valor for chave, valor in registro.items() if chave and valor not in (None, "")}
+            ))
+            if len(lote) >= TAMANHO_LOTE:
+                enviar_lote(lote)
+                lote = []
+    except csv.Error as erro:
+        raise ArquivoInvalido(f"CSV malformado na linha {leitor.line_num}: {erro}") from None
+    if lote:
+        enviar_lote(lote)
+    return linhas_lidas, erros, rejeitados, set(leitor.fieldnames)
+
+def _atualizar(colunas: list, presentes: set, tabela: str, origem: str = "EXCLUDED") -> str:
+    """
+    SET da atualização: só as colunas que vieram no arquivo e, nelas, só as células
+    preenchidas (as vazias chegam como NULL), para que um CSV sem quantidade_em_estoque, ou
+    com a célula em branco, não zere o estoque dos produtos já cadastrados.
+    """
+    return ", ".join(
+        f"{coluna} = coalesce({origem}.{coluna}, {tabela}.{coluna})" for coluna in colunas if coluna in presentes
+    )
+
+def _contar_gravados(db: Session, sql_insert: str):
+    """
+    Executa o INSERT ... RETURNING (xmax = 0) e separa inseridos de atualizados.
+    """
+    inseridos, atualizados = db.execute(text(f"""
+        WITH gravados AS ({sql_insert} RETURNING (xmax = 0) AS inserido)
+        SELECT count(*) FILTER (WHERE inserido), count(*) FILTER (WHERE NOT inserido) FROM gravados
+    """)).one()
+    return inseridos, atualizados
+
+def importar_produtos(db: Session, arquivo: IO[str], separador: str = ",") -> schemas.ResultadoImportacao:
+    """
+    Importa produtos do CSV (colunas: nome, preco e, opcionais, descricao,
+    quantidade_em_estoque e id). Linhas com id atualizam o produto existente ou o criam com
+    esse id; linhas sem id criam produtos novos. Com o mesmo id repetido, vale a última linha.
+    Na atualização, colunas ausentes do arquivo e células vazias mantêm o valor atual.
+    """
+    colunas = ["id", "nome", "descricao", "preco", "quantidade_em_estoque"]
+    db.execute(text("""
+        CREATE TEMP TABLE importacao_produtos (
+            linha integer, id integer, nome text, descricao text,
+            preco double precision, quantidade_em_estoque integer
+        ) ON COMMIT DROP
+    """))
+    linhas_lidas, erros, rejeitados, presentes = _carregar_temporaria(
+        db, arquivo, separador, "importacao_produtos", schemas.ProdutoImportacao, colunas
+    )
+
+    # Com id: atualiza os existentes e só então insere os novos. Um único ON CONFLICT não
+    # serve: a linha proposta precisaria do estoque padrão (NOT NULL) e, ao mesmo tempo,
+    # de NULL para a célula vazia manter o estoque atual
+    atualizados_com_id = db.execute(text(f"""
+        UPDATE produtos SET {_atualizar(colunas[1:], presentes, "produtos", "dados")}
+        FROM (
+            SELECT DISTINCT ON (id) * FROM importacao_produtos WHERE id IS NOT NULL ORDER BY id, linha DESC
+        ) dados
+        WHERE produtos.id = dados.id
+    """)).rowcount
+    inseridos_com_id = db.execute(text(f"""
+        INSERT INTO produtos (id, nome, descricao, preco, quantidade_em_estoque)
+        SELECT DISTINCT ON (id) id, nome, descricao, preco, coalesce(quantidade_em_estoque, {ESTOQUE_PADRAO})
+        FROM importacao_produtos
+        WHERE id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM produtos WHERE produtos.id = importacao_produtos.id)
+        ORDER BY id, linha DESC
+        ON CONFLICT (id) DO NOTHING
+    """)).rowcount
+    com_id = (inseridos_com_id, atualizados_com_id)
+    if sum(com_id):
+        # Ids explícitos não avançam a sequência: ajusta antes de inserir os produtos sem id
+        db.execute(text(
+            "SELECT setval(pg_get_serial_sequence('produtos', 'id'), (SELECT max(id) FROM produtos))"
+        ))
+    sem_id = _contar_gravados(db, f"""
+        INSERT INTO produtos (nome, descricao, preco, quantidade_em_estoque)
+        SELECT nome, descricao, preco, coalesce(quantidade_em_estoque, {ESTOQUE_PADRAO})
+        FROM importacao_produtos WHERE id IS NULL
+        ORDER BY linha
+    """)
+
+    inseridos, atualizados = com_id[0] + sem_id[0], com_id[1] + sem_id[1]
+    db.commit()
+    return schemas.ResultadoImportacao(
+        linhas_lidas=linhas_lidas,
+        inseridos=inseridos,
+        atualizados=atualizados,
+        rejeitados=rejeitados,
+        repetidos=linhas_lidas - rejeitados - inseridos - atualizados,
+        erros=erros,
+    )
+
+def importar_clientes(db: Session, arquivo: IO[str], separador: str = ",") -> schemas.ResultadoImportacao:
+    """
+    Importa clientes do CSV (colunas: nome, email e, opcional, telefone). O email é a
+    chave: cliente já cadastrado tem nome e telefone (se a coluna vier no arquivo e a
+    célula estiver preenchida) atualizados. Com o mesmo email repetido no arquivo, vale a última linha.
+    """
+    colunas = ["nome", "email", "telefone"]
+    db.execute(text("""
+        CREATE TEMP TABLE importacao_clientes (
+            linha integer, nome text, email text, telefone text
+        ) ON COMMIT DROP
+    """))
+    linhas_lidas, erros, rejeitados, presentes = _carregar_temporaria(
+        db, arquivo, separador, "importacao_clientes", schemas.ClienteCreate, colunas
+    )
+
+    inseridos, atualizados = _contar_gravados(db, f"""
+        INSERT INTO clientes (nome, email, telefone)
+        SELECT DISTINCT ON (email) nome, email, telefone
+        FROM importacao_clientes
+        ORDER BY email, linha DESC
+        ON CONFLICT (email) DO UPDATE SET {_atualizar(["nome", "telefone"], presentes, "clientes")}
+    """)
+    db.commit()
+    return schemas.ResultadoImportacao(
+        linhas_lidas=linhas_lidas,
+        inseridos=inseridos,
+        atualizados=atualizados,
+        rejeitados=rejeitados,
+        repetidos=linhas_lidas - rejeitados - inseridos - atualizados,
+        erros=erros,
+    )
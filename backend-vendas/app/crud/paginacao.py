@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import date
+from typing import Callable, Optional, Sequence, Tuple
+
+class CursorInvalido(ValueError):
+    """Cursor de paginação malformado ou adulterado"""
+
+def codificar_cursor(*valores) -> str:
+    """
+    Codifica a chave do último item da página num cursor opaco (base64 de JSON).
+    """
+    dados = json.dumps(list(valores), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str, quantidade: int) -> list:
+    """
+    Decodifica um cursor gerado por codificar_cursor, validando o número de valores.
+    """
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido("Cursor inválido") from e
+    if not isinstance(valores, list) or len(valores) != quantidade:
+        raise CursorInvalido("Cursor inválido")
+    return valores
+
+def decodificar_cursor_id(cursor: str) -> int:
+    """
+    Decodifica o cursor das listagens ordenadas por id.
+    """
+    (ultimo_id,) = decodificar_cursor(cursor, 1)
+    if not isinstance(ultimo_id, int):
+        raise CursorInvalido("Cursor inválido")
+    return ultimo_id
+
+def decodificar_cursor_venda(cursor: str) -> Tuple[date, int]:
+    """
+    Decodifica o cursor da listagem de vendas, ordenada por (data_venda, id).
+    """
+    data_venda, ultimo_id = decodificar_cursor(cursor, 2)
+    try:
+        data_venda = date.fromisoformat(data_venda)
+    except (TypeError, ValueError) as e:
+        raise CursorInvalido("Cursor inválido") from e
+    if not isinstance(ultimo_id, int):
+        raise CursorInvalido("Cursor inválido")
+    return data_venda, ultimo_id
+
+def proximo_cursor(itens: Sequence, limit: int, chave: Callable) -> Optional[str]:
+    """
+    Retorna o cursor da próxima página, ou None se esta foi a última.
+    """
+    if limit <= 0 or len(itens) < limit:
+        return None
+    return codificar_cursor(*chave(itens[-1]))
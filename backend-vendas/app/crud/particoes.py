@@ -0,0 +1,157 @@
+"""
+Partições mensais de vendas e venda_produto: criação antecipada e arquivamento.
+
+As escritas chamam garantir_particao() com a data da venda antes de gravá-la. Os meses
+já garantidos no startup ficam num cache do processo e não custam nada; para os demais
+(vendas retroativas, datas muito à frente) a função criar_particoes_mes roda na própria
+transação, que a desfaz junto se a escrita falhar.
+
+O arquivamento compacta as partições antigas (VACUUM FULL, FREEZE), move-as para o
+tablespace de arquivo, se configurado, e as deixa somente leitura com um gatilho. Elas
+continuam ligadas às tabelas: relatórios e exportações do período as leem normalmente.
+"""
+import re
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.models.particoes import TABELAS_PARTICIONADAS
+
+# SQLSTATE read_only_sql_transaction, levantado pelo gatilho das partições arquivadas
+SQLSTATE_ARQUIVADA = "25006"
+GATILHO_ARQUIVADA = "particao_arquivada"
+_SUFIXO_MES = re.compile(r"_p(\d{4})_(\d{2})$")
+
+# Meses com partição nas duas tabelas, conhecidos por este processo
+_meses_existentes = set()
+
+def inicio_do_mes(data: date) -> date:
+    return data.replace(day=1)
+
+def somar_meses(mes: date, meses: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+def stmt_criar_particoes(mes: date):
+    return text("SELECT criar_particoes_mes(:mes)").bindparams(mes=inicio_do_mes(mes))
+
+def precisa_criar(data_venda: Optional[date]) -> bool:
+    return data_venda is not None and inicio_do_mes(data_venda) not in _meses_existentes
+
+def garantir_particao(db: Session, data_venda: Optional[date]):
+    """
+    Garante, na transação corrente, as partições do mês de `data_venda`.
+    """
+    if precisa_criar(data_venda):
+        db.execute(stmt_criar_particoes(data_venda))
+
+def garantir_particoes(db: Session, inicio: date, fim: date) -> int:
+    """
+    Cria (e faz o commit) as partições de todos os meses de `inicio` a `fim` que ainda
+    não existem. Retorna o número de meses com partição no banco.
+    """
+    mes = inicio_do_mes(inicio)
+    while mes <= fim:
+        db.execute(stmt_criar_particoes(mes))
+        mes = somar_meses(mes, 1)
+    db.commit()
+    return carregar_meses(db)
+
+def carregar_meses(db: Session) -> int:
+    """
+    Atualiza o cache com os meses que já têm partição nas duas tabelas.
+    """
+    por_tabela = {tabela: set() for tabela in TABELAS_PARTICIONADAS}
+    for particao in listar_particoes(db):
+        if particao["mes"]:
+            por_tabela[particao["tabela"]].add(particao["mes"])
+    meses = set.intersection(*por_tabela.values())
+    _meses_existentes.update(meses)
+    return len(meses)
+
+def listar_particoes(db: Session) -> list:
+    """
+    Partições de vendas e venda_produto com mês, tamanho em disco, tablespace e situação.
+    """
+    linhas = db.execute(
+        text(
+            """
+            SELECT pai.relname AS tabela,
+                   filha.relname AS particao,
+                   filha.oid::regclass::text AS identificador,
+                   pg_total_relation_size(filha.oid) AS tamanho,
+                   coalesce(ts.spcname, 'pg_default') AS tablespace,
+                   EXISTS (
+                       SELECT 1 FROM pg_trigger t
+                       WHERE t.tgrelid = filha.oid AND t.tgname = :gatilho
+                   ) AS arquivada
+            FROM pg_inherits heranca
+            JOIN pg_class filha ON filha.oid = heranca.inhrelid
+            JOIN pg_class pai ON pai.oid = heranca.inhparent
+            LEFT JOIN pg_tablespace ts ON ts.oid = filha.reltablespace
+            WHERE pai.oid IN ('vendas'::regclass, 'venda_produto'::regclass)
+            ORDER BY filha.relname
+            """
+        ),
+        {"gatilho": GATILHO_ARQUIVADA},
+    ).mappings()
+    particoes = []
+    for linha in linhas:
+        sufixo = _SUFIXO_MES.search(linha["particao"])
+        particoes.append(dict(linha, mes=date(int(sufixo[1]), int(sufixo[2]), 1) if sufixo else None))
+    return particoes
+
+def arquivar_particoes(
+    db: Session,
+    meses_retencao: int,
+    tablespace: Optional[str] = None,
+    hoje: Optional[date] = None,
+) -> list:
+    """
+    Arquiva as partições de meses anteriores aos últimos `meses_retencao` meses (contando o
+    corrente). Retorna os nomes das partições arquivadas nesta execução.
+    """
+    if meses_retencao < 1:
+        raise ValueError("A retenção deve ser de pelo menos 1 mês (o mês corrente)")
+    limite = somar_meses(inicio_do_mes(hoje or date.today()), -(meses_retencao - 1))
+    pendentes = [
+        particao for particao in listar_particoes(db)
+        if particao["mes"] and particao["mes"] < limite and not particao["arquivada"]
+    ]
+    db.commit()
+
+    # VACUUM não roda dentro de transação: conexão própria em autocommit
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conexao:
+        destino = conexao.dialect.identifier_preparer.quote(tablespace) if tablespace else None
+        for particao in pendentes:
+            tabela = particao["identificador"]
+            # Reescreve a partição sem espaço morto e com as linhas congeladas: o autovacuum
+            # não precisa mais voltar a ela
+            conexao.execute(text(f"VACUUM (FULL, FREEZE, ANALYZE) {tabela}"))
+            if destino:
+                conexao.execute(text(f"ALTER TABLE {tabela} SET TABLESPACE {destino}"))
+                indices = conexao.execute(
+                    text("SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = CAST(:tabela AS regclass)"),
+                    {"tabela": tabela},
+                ).scalars().all()
+                for indice in indices:
+                    conexao.execute(text(f"ALTER INDEX {indice} SET TABLESPACE {destino}"))
+            # Gatilho por último: uma execução interrompida é refeita por inteiro na próxima
+            conexao.execute(text(
+                f"CREATE TRIGGER {GATILHO_ARQUIVADA} BEFORE INSERT OR UPDATE OR DELETE ON {tabela} "
+                f"FOR EACH ROW EXECUTE FUNCTION rejeitar_escrita_arquivada()"
+            ))
+            conexao.execute(text(
+                f"CREATE TRIGGER {GATILHO_ARQUIVADA}_truncate BEFORE TRUNCATE ON {tabela} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION rejeitar_escrita_arquivada()"
+            ))
+    return [particao["particao"] for particao in pendentes]
+
+def periodo_arquivado(erro: Exception) -> bool:
+    """
+    Verdadeiro se o erro veio de uma escrita numa partição arquivada.
+    """
+    return isinstance(erro, DBAPIError) and getattr(erro.orig, "pgcode", None) == SQLSTATE_ARQUIVADA
@@ -1,54 +1,220 @@
+from datetime import timedelta
+from typing import List, Optional
+from sqlalchemy import ARRAY, Integer, any_, bindparam, delete, func, insert, select, update
 from sqlalchemy.orm import Session
 from app import models, schemas
+from app.cache import catalogo
+from app.crud.estoque import publicar_estoque
+from app.crud.busca import criterios_busca
+from app.crud.campos import selecionar_colunas
+from app.crud.paginacao import decodificar_cursor_id
 
-def create_produto(db: Session, produto: schemas.ProdutoCreate):
-    """
-    Cria um novo produto no banco de dados.
-    """
-    db_produto = models.Produto(
+# Colunas da listagem (as do schema Produto): linhas simples em vez de objetos ORM
+COLUNAS_LISTAGEM = (
+    models.Produto.id,
+    models.Produto.nome,
+    models.Produto.descricao,
+    models.Produto.preco,
+    models.Produto.quantidade_em_estoque,
+)
+
+def colunas_listagem(campos: Optional[str] = None) -> tuple:
+    # ?fields= da listagem; o id (chave do cursor) vem sempre
+    return selecionar_colunas(COLUNAS_LISTAGEM, campos, chave=(models.Produto.id,))
+
+# Escritas com RETURNING: o próprio INSERT/UPDATE/DELETE devolve a linha da resposta,
+# sem SELECT antes (para achar o produto) nem depois do commit (refresh)
+def stmt_criar_produto(produto: schemas.ProdutoCreate):
+    return insert(models.Produto).values(
         nome=produto.nome,
         descricao=produto.descricao,
         preco=produto.preco,
         quantidade_em_estoque=produto.quantidade_em_estoque,
+    ).returning(*COLUNAS_LISTAGEM)
+
+def stmt_atualizar_produto(produto_id: int, produto: schemas.ProdutoUpdate):
+    """
+    UPDATE só dos campos informados; sem campos, apenas lê o produto.
+    """
+    valores = produto.model_dump(exclude_unset=True)
+    if not valores:
+        return select(*COLUNAS_LISTAGEM).where(models.Produto.id == produto_id)
+    return (
+        update(models.Produto)
+        .where(models.Produto.id == produto_id)
+        .values(**valores)
+        .returning(*COLUNAS_LISTAGEM)
+        .execution_options(synchronize_session=False)
     )
-    db.add(db_produto)
+
+def stmt_excluir_produto(produto_id: int):
+    return (
+        delete(models.Produto)
+        .where(models.Produto.id == produto_id)
+        .returning(*COLUNAS_LISTAGEM)
+        .execution_options(synchronize_session=False)
+    )
+
+def stmt_versao_catalogo():
+    """
+    Versão do catálogo, o instante da última alteração e se ela tem mais de um segundo
+    (só então o Last-Modified é enviado, ver cache.condicional_catalogo).
+    """
+    return select(
+        models.CatalogoVersao.versao,
+        models.CatalogoVersao.atualizado_em,
+        (models.CatalogoVersao.atualizado_em < func.clock_timestamp() - timedelta(seconds=1)).label("estavel"),
+    ).where(models.CatalogoVersao.id == 1)
+
+def get_versao_catalogo(db: Session):
+    return db.execute(stmt_versao_catalogo()).one()
+
+def create_produto(db: Session, produto: schemas.ProdutoCreate):
+    """
+    Cria um novo produto no banco de dados.
+    """
+    db_produto = db.execute(stmt_criar_produto(produto)).one()
     db.commit()
-    db.refresh(db_produto)
     return db_produto
 
-def get_produto(db: Session, produto_id: int):
+def get_produto(db: Session, produto_id: int, versao: Optional[int] = None):
+    """
+    Retorna um produto pelo ID, servido pelo cache do catálogo quando possível. `versao` é
+    a do catálogo já lida pela rota; sem ela, é lida aqui.
+    """
+    if versao is None:
+        versao = get_versao_catalogo(db).versao
+    encontrado, produto = catalogo.obter(versao, ("produto", produto_id))
+    if encontrado:
+        return produto
+
+    db_produto = db.query(models.Produto).filter(models.Produto.id == produto_id).first()
+    produto = schemas.Produto.model_validate(db_produto) if db_produto else None
+    catalogo.guardar(versao, ("produto", produto_id), produto)
+    return produto
+
+def stmt_listar_produtos(
+    skip: int = 0, limit: int = 100, cursor: Optional[str] = None, colunas: tuple = COLUNAS_LISTAGEM
+):
+    stmt = select(*colunas).order_by(models.Produto.id)
+    if cursor:
+        stmt = stmt.where(models.Produto.id > decodificar_cursor_id(cursor))
+    else:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit)
+
+def get_produtos(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    colunas: tuple = COLUNAS_LISTAGEM,
+    versao: Optional[int] = None,
+):
+    """
+    Retorna uma lista de produtos ordenada por id, paginada por offset ou por cursor,
+    só com as `colunas` pedidas. As páginas são servidas pelo cache do catálogo quando possível.
+    """
+    if versao is None:
+        versao = get_versao_catalogo(db).versao
+    chave = ("lista", skip, limit, cursor, tuple(coluna.key for coluna in colunas))
+    encontrado, produtos = catalogo.obter(versao, chave)
+    if encontrado:
+        return produtos
+
+    produtos = db.execute(stmt_listar_produtos(skip, limit, cursor, colunas)).all()
+    catalogo.guardar(versao, chave, produtos)
+    return produtos
+
+# Máximo de ids numa consulta em lote
+LIMITE_LOTE = 500
+
+def ler_ids_lote(valores: List[str]) -> List[int]:
+    """
+    Ids de `?ids=1,2,3` (ou `?ids=1&ids=2`), sem repetição e na ordem informada.
+    Levanta ValueError se algum não for inteiro ou se passarem de LIMITE_LOTE.
+    """
+    ids = []
+    for valor in valores:
+        for parte in valor.split(","):
+            if parte.strip():
+                try:
+                    ids.append(int(parte))
+                except ValueError:
+                    raise ValueError(f"Id inválido: {parte.strip()!r}") from None
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > LIMITE_LOTE:
+        raise ValueError(f"No máximo {LIMITE_LOTE} ids por consulta")
+    return ids
+
+def stmt_produtos_por_ids(ids: List[int]):
+    """
+    Produtos dos ids informados, ordenados por id. Os ids vão num único parâmetro (array):
+    `id = ANY(:ids)` tem sempre o mesmo texto, qualquer que seja a quantidade de ids.
+    """
+    return (
+        select(*COLUNAS_LISTAGEM)
+        .where(models.Produto.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))))
+        .order_by(models.Produto.id)
+    )
+
+def get_produtos_por_ids(db: Session, ids: List[int], versao: Optional[int] = None):
+    """
+    Os produtos dos ids informados numa única consulta; ids inexistentes são ignorados.
+    Servido pelo cache do catálogo quando possível.
+    """
+    if not ids:
+        return []
+    if versao is None:
+        versao = get_versao_catalogo(db).versao
+    chave = ("lote", tuple(sorted(ids)))
+    encontrado, produtos = catalogo.obter(versao, chave)
+    if encontrado:
+        return produtos
+
+    produtos = db.execute(stmt_produtos_por_ids(ids)).all()
+    catalogo.guardar(versao, chave, produtos)
+    return produtos
+
+def stmt_buscar_produtos(termo: str, limit: int):
     """
-    Retorna um produto pelo ID.
+    Busca de produtos pelo nome (prefixo, substring ou aproximada), ordenada por relevância.
     """
-    return db.query(models.Produto).filter(models.Produto.id == produto_id).first()
+    filtro, relevancia = criterios_busca([models.Produto.nome], termo)
+    return (
+        select(models.Produto)
+        .where(filtro)
+        .order_by(*relevancia, models.Produto.nome, models.Produto.id)
+        .limit(limit)
+    )
+
+def buscar_produtos(db: Session, termo: str, limit: int = 10):
+    return db.scalars(stmt_buscar_produtos(termo, limit)).all()
 
-def get_produtos(db: Session, skip: int = 0, limit: int = 100):
+def chave_cursor(produto: models.Produto):
     """
-    Retorna uma lista de produtos com paginação.
+    Chave de paginação do produto (usada para gerar o próximo cursor).
     """
-    return db.query(models.Produto).offset(skip).limit(limit).all()
+    return (produto.id,)
 
 def update_produto(db: Session, produto_id: int, produto: schemas.ProdutoUpdate):
-    db_produto = db.query(models.Produto).filter(models.Produto.id == produto_id).first()
+    # Atualiza apenas os campos fornecidos; None se o produto não for encontrado
+    db_produto = db.execute(stmt_atualizar_produto(produto_id, produto)).first()
     if not db_produto:
-        return None  # Retorna None se o produto não for encontrado
-
-    # Atualiza apenas os campos fornecidos
-    for key, value in produto.dict(exclude_unset=True).items():
-        setattr(db_produto, key, value)
+        return None
 
+    if produto.quantidade_em_estoque is not None:
+        publicar_estoque(db, db_produto.id, db_produto.quantidade_em_estoque)
     db.commit()
-    db.refresh(db_produto)
     return db_produto
 
 def delete_produto(db: Session, produto_id: int):
     """
     Remove um produto do banco de dados.
     """
-    db_produto = db.query(models.Produto).filter(models.Produto.id == produto_id).first()
+    db_produto = db.execute(stmt_excluir_produto(produto_id)).first()
     if not db_produto:
         return None  # Retorna None se o produto não for encontrado
 
-    db.delete(db_produto)
     db.commit()
     return db_produto
\ No newline at end of file
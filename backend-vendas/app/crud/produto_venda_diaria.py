@@ -0,0 +1,111 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy import Date, Float, Integer, column, desc, func, literal, select, text, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models import Produto, ProdutoVendaDiaria, VendaProduto
+from app.schemas.relatorio import CriterioRanking
+
+# Máximo de produtos por ranking
+LIMITE_RANKING = 100
+
+def stmt_variacao_itens(data_venda: Optional[date], variacoes: dict, precos: dict):
+    """
+    Upsert que soma as variações de quantidade por produto ({produto_id: quantidade}) aos
+    totais do dia, com a receita pelo preço unitário gravado nos itens ({produto_id:
+    preco_unitario}), ou None se não há o que registrar.
+    """
+    variacoes = {produto_id: quantidade for produto_id, quantidade in variacoes.items() if quantidade}
+    if data_venda is None or not variacoes:
+        return None
+
+    # Em ordem de produto_id: escritas concorrentes no mesmo dia travam as linhas na mesma ordem
+    itens = values(
+        column("produto_id", Integer), column("quantidade", Integer), column("receita", Float), name="itens"
+    ).data([
+        (produto_id, quantidade, quantidade * (precos.get(produto_id) or 0.0))
+        for produto_id, quantidade in sorted(variacoes.items())
+    ])
+    linhas = select(literal(data_venda, Date), itens.c.produto_id, itens.c.quantidade, itens.c.receita)
+    stmt = insert(ProdutoVendaDiaria).from_select(["data", "produto_id", "quantidade", "receita"], linhas)
+    return stmt.on_conflict_do_update(
+        index_elements=[ProdutoVendaDiaria.data, ProdutoVendaDiaria.produto_id],
+        set_={
+            "quantidade": ProdutoVendaDiaria.quantidade + stmt.excluded.quantidade,
+            "receita": ProdutoVendaDiaria.receita + stmt.excluded.receita,
+        },
+    )
+
+def registrar_itens(db: Session, data_venda: Optional[date], variacoes: dict, precos: dict):
+    """
+    Soma as variações dos itens aos totais do dia por produto, na mesma transação da escrita
+    que as originou. O commit fica a cargo de quem chama.
+    """
+    stmt = stmt_variacao_itens(data_venda, variacoes, precos)
+    if stmt is not None:
+        db.execute(stmt)
+
+def stmt_mais_vendidos(
+    criterio: CriterioRanking,
+    limit: int = 10,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+):
+    """
+    Os `limit` produtos com mais quantidade (ou receita) vendida no período: agrega a faixa
+    de datas da tabela diária e só então junta os produtos do topo.
+    """
+    quantidade = func.sum(ProdutoVendaDiaria.quantidade).label("quantidade")
+    receita = func.sum(ProdutoVendaDiaria.receita).label("receita")
+    ordem = quantidade if criterio == CriterioRanking.quantidade else receita
+    topo = select(ProdutoVendaDiaria.produto_id, quantidade, receita)
+    if data_inicio:
+        topo = topo.where(ProdutoVendaDiaria.data >= data_inicio)
+    if data_fim:
+        topo = topo.where(ProdutoVendaDiaria.data <= data_fim)
+    topo = (
+        topo.group_by(ProdutoVendaDiaria.produto_id)
+        .having(func.sum(ProdutoVendaDiaria.quantidade) > 0)
+        .order_by(desc(ordem), ProdutoVendaDiaria.produto_id)
+        .limit(min(max(limit, 1), LIMITE_RANKING))
+        .subquery()
+    )
+    ordem_topo = topo.c.quantidade if criterio == CriterioRanking.quantidade else topo.c.receita
+    return (
+        select(Produto.id, Produto.nome, topo.c.quantidade, topo.c.receita)
+        .join_from(topo, Produto, Produto.id == topo.c.produto_id)
+        .order_by(desc(ordem_topo), topo.c.produto_id)
+    )
+
+def get_mais_vendidos(
+    db: Session,
+    criterio: CriterioRanking,
+    limit: int = 10,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+):
+    return db.execute(stmt_mais_vendidos(criterio, limit, data_inicio, data_fim)).all()
+
+def reconstruir_produtos_vendas_diarias(db: Session) -> int:
+    """
+    Recalcula produtos_vendas_diarias a partir de venda_produto (carga inicial ou correção).
+    Retorna o número de linhas (produto, dia) gravadas.
+    """
+    # Bloqueia as escritas incrementais enquanto a tabela é refeita
+    db.execute(text("LOCK TABLE produtos_vendas_diarias IN SHARE ROW EXCLUSIVE MODE"))
+    db.query(ProdutoVendaDiaria).delete(synchronize_session=False)
+
+    totais = (
+        select(
+            VendaProduto.data_venda,
+            VendaProduto.produto_id,
+            func.sum(VendaProduto.quantidade),
+            func.sum(VendaProduto.quantidade * VendaProduto.preco_unitario),
+        )
+        .group_by(VendaProduto.data_venda, VendaProduto.produto_id)
+    )
+    resultado = db.execute(
+        insert(ProdutoVendaDiaria).from_select(["data", "produto_id", "quantidade", "receita"], totais)
+    )
+    db.commit()
+    return resultado.rowcount
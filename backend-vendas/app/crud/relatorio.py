@@ -0,0 +1,129 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy import Date, cast, desc, func
+from sqlalchemy.orm import Session
+from app.models import Cliente, Produto, Venda, VendaProduto
+from app.schemas.relatorio import Agrupamento
+
+# Unidade do date_trunc do Postgres para cada agrupamento por período
+_UNIDADES_PERIODO = {
+    Agrupamento.dia: "day",
+    Agrupamento.semana: "week",
+    Agrupamento.mes: "month",
+}
+
+def _filtrar_periodo(query, data_inicio: Optional[date], data_fim: Optional[date], coluna=Venda.data_venda):
+    # Filtro por faixa de data_venda: o planejador lê só as partições dos meses do período
+    # e, dentro delas, usa o índice ix_vendas_data_venda_id
+    if data_inicio:
+        query = query.filter(coluna >= data_inicio)
+    if data_fim:
+        query = query.filter(coluna <= data_fim)
+    return query
+
+def _ticket_medio(total, quantidade) -> float:
+    return float(total) / quantidade if quantidade else 0.0
+
+def _linhas_por_periodo(db: Session, agrupamento: Agrupamento, data_inicio, data_fim):
+    periodo = cast(func.date_trunc(_UNIDADES_PERIODO[agrupamento], Venda.data_venda), Date)
+    query = db.query(
+        periodo.label("periodo"),
+        func.count(Venda.id).label("quantidade_vendas"),
+        func.coalesce(func.sum(Venda.total), 0).label("total"),
+    )
+    query = _filtrar_periodo(query, data_inicio, data_fim)
+    query = query.group_by(periodo).order_by(periodo)
+    return [
+        {
+            "periodo": linha.periodo,
+            "quantidade_vendas": linha.quantidade_vendas,
+            "total": float(linha.total),
+            "ticket_medio": _ticket_medio(linha.total, linha.quantidade_vendas),
+        }
+        for linha in query.all()
+    ]
+
+def _linhas_por_cliente(db: Session, data_inicio, data_fim):
+    total = func.coalesce(func.sum(Venda.total), 0)
+    query = db.query(
+        Venda.cliente_id,
+        Cliente.nome,
+        func.count(Venda.id).label("quantidade_vendas"),
+        total.label("total"),
+    ).outerjoin(Cliente, Cliente.id == Venda.cliente_id)
+    query = _filtrar_periodo(query, data_inicio, data_fim)
+    query = query.group_by(Venda.cliente_id, Cliente.nome).order_by(desc(total))
+    return [
+        {
+            "id": linha.cliente_id,
+            "nome": linha.nome,
+            "quantidade_vendas": linha.quantidade_vendas,
+            "total": float(linha.total),
+            "ticket_medio": _ticket_medio(linha.total, linha.quantidade_vendas),
+        }
+        for linha in query.all()
+    ]
+
+def _linhas_por_produto(db: Session, data_inicio, data_fim):
+    # Receita do produto = soma de quantidade * preço gravado nas linhas das vendas do período
+    total = func.coalesce(func.sum(VendaProduto.quantidade * VendaProduto.preco_unitario), 0)
+    query = (
+        db.query(
+            Produto.id,
+            Produto.nome,
+            func.count(func.distinct(VendaProduto.venda_id)).label("quantidade_vendas"),
+            total.label("total"),
+        )
+        .select_from(VendaProduto)
+        .join(Venda, (Venda.id == VendaProduto.venda_id) & (Venda.data_venda == VendaProduto.data_venda))
+        .join(Produto, Produto.id == VendaProduto.produto_id)
+    )
+    # O filtro repetido em venda_produto.data_venda limita também as partições dos itens
+    query = _filtrar_periodo(query, data_inicio, data_fim)
+    query = _filtrar_periodo(query, data_inicio, data_fim, coluna=VendaProduto.data_venda)
+    query = query.group_by(Produto.id, Produto.nome).order_by(desc(total))
+    return [
+        {
+            "id": linha.id,
+            "nome": linha.nome,
+            "quantidade_vendas": linha.quantidade_vendas,
+            "total": float(linha.total),
+            "ticket_medio": _ticket_medio(linha.total, linha.quantidade_vendas),
+        }
+        for linha in query.all()
+    ]
+
+def relatorio_vendas(
+    db: Session,
+    agrupamento: Agrupamento,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+):
+    """
+    Agrega as vendas do período no banco (GROUP BY), sem trazer as vendas para a aplicação.
+    """
+    resumo = _filtrar_periodo(
+        db.query(
+            func.count(Venda.id).label("quantidade_vendas"),
+            func.coalesce(func.sum(Venda.total), 0).label("total"),
+        ),
+        data_inicio,
+        data_fim,
+    ).one()
+
+    if agrupamento == Agrupamento.cliente:
+        linhas = _linhas_por_cliente(db, data_inicio, data_fim)
+    elif agrupamento == Agrupamento.produto:
+        linhas = _linhas_por_produto(db, data_inicio, data_fim)
+    else:
+        linhas = _linhas_por_periodo(db, agrupamento, data_inicio, data_fim)
+
+    return {
+        "data_inicio": data_inicio,
+        "data_fim": data_fim,
+        "agrupamento": agrupamento,
+        "quantidade_vendas": resumo.quantidade_vendas,
+        "total": float(resumo.total),
+        "ticket_medio": _ticket_medio(resumo.total, resumo.quantidade_vendas),
+        "linhas": linhas,
+    }
@@ -1,42 +1,337 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import JSON, and_, delete, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session, selectinload
+from app.models.estoque import Produto
 from app.models.venda import Venda
+from app.models.venda_produto import VendaProduto
 from app.schemas.venda import VendaCreate, VendaUpdate
+from app.crud.estoque import movimentar_estoque
+from app.crud.particoes import garantir_particao
+from app.crud.produto_venda_diaria import registrar_itens
+from app.crud.campos import selecionar_colunas
+from app.crud.paginacao import decodificar_cursor_venda
 from datetime import date
+from typing import Optional
 
-def get_venda(db: Session, venda_id: int):
-    return db.query(Venda).filter(Venda.id == venda_id).first()
+# Colunas da listagem (as do schema Venda): linhas simples em vez de objetos ORM
+COLUNAS_LISTAGEM = (Venda.id, Venda.cliente_id, Venda.data_venda, Venda.total)
 
-def get_vendas(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Venda).offset(skip).limit(limit).all()
+def colunas_listagem(campos: Optional[str] = None) -> tuple:
+    # ?fields= da listagem; data_venda e id (chave do cursor) vêm sempre
+    return selecionar_colunas(COLUNAS_LISTAGEM, campos, chave=(Venda.data_venda, Venda.id))
 
-def create_venda(db: Session, venda: VendaCreate):
-    db_venda = Venda(
-        cliente_id=venda.cliente_id,
-        data_venda=venda.data_venda if venda.data_venda else date.today(),
-        total=venda.total if venda.total else 0.0
+def get_venda(db: Session, venda_id: int, carregar_produtos: bool = False):
+    query = db.query(Venda).filter(Venda.id == venda_id)
+    if carregar_produtos:
+        # Carrega os itens numa única consulta extra, em vez de um lazy load por acesso
+        query = query.options(selectinload(Venda.produtos))
+    return query.first()
+
+def stmt_venda_detalhada(venda_id: int):
+    """
+    A venda e os seus itens com o nome do produto e o preço gravado no item numa única
+    consulta (LEFT JOIN: uma venda sem itens vem numa linha só, com as colunas dos itens nulas).
+    """
+    return (
+        select(
+            *COLUNAS_LISTAGEM,
+            VendaProduto.produto_id,
+            VendaProduto.quantidade,
+            Produto.nome,
+            VendaProduto.preco_unitario,
+        )
+        .select_from(Venda)
+        .outerjoin(
+            VendaProduto,
+            and_(VendaProduto.venda_id == Venda.id, VendaProduto.data_venda == Venda.data_venda),
+        )
+        .outerjoin(Produto, Produto.id == VendaProduto.produto_id)
+        .where(Venda.id == venda_id)
+        .order_by(VendaProduto.produto_id)
     )
-    db.add(db_venda)
-    db.commit()
-    db.refresh(db_venda)
-    return db_venda
 
-def update_venda(db: Session, venda_id: int, venda: VendaUpdate):
-    db_venda = get_venda(db, venda_id)
+def montar_venda_detalhada(linhas) -> Optional[dict]:
+    """
+    Agrupa as linhas de stmt_venda_detalhada() na forma do schema VendaDetalhada.
+    """
+    if not linhas:
+        return None
+    venda = linhas[0]
+    return {
+        "id": venda.id,
+        "cliente_id": venda.cliente_id,
+        "data_venda": venda.data_venda,
+        "total": venda.total,
+        "produtos": [
+            {
+                "venda_id": linha.id,
+                "produto_id": linha.produto_id,
+                "quantidade": linha.quantidade,
+                "nome": linha.nome,
+                "preco_unitario": linha.preco_unitario,
+            }
+            for linha in linhas if linha.produto_id is not None
+        ],
+    }
+
+def get_venda_detalhada(db: Session, venda_id: int) -> Optional[dict]:
+    return montar_venda_detalhada(db.execute(stmt_venda_detalhada(venda_id)).all())
+
+def stmt_recalcular_total(venda_id: int, data_venda: Optional[date] = None):
+    """
+    UPDATE único que grava o total da venda a partir da soma dos itens (pelo preço gravado
+    em cada um, sem consultar produtos) e devolve (RETURNING) a data, o total novo e o
+    anterior, este lido da linha travada pelo UPDATE.
+    Com a data da venda, o UPDATE e a soma leem só as partições do mês dela.
+    """
+    subtotal = (
+        select(func.coalesce(func.sum(VendaProduto.quantidade * VendaProduto.preco_unitario), 0.0))
+        .where(VendaProduto.venda_id == venda_id)
+    )
+    anterior = select(Venda.id, Venda.data_venda, Venda.total).where(Venda.id == venda_id)
+    stmt = update(Venda).where(Venda.id == venda_id)
+    if data_venda is not None:
+        subtotal = subtotal.where(VendaProduto.data_venda == data_venda)
+        anterior = anterior.where(Venda.data_venda == data_venda)
+        stmt = stmt.where(Venda.data_venda == data_venda)
+    anterior = anterior.with_for_update().subquery("anterior")
+    return (
+        stmt.where(Venda.id == anterior.c.id, Venda.data_venda == anterior.c.data_venda)
+        .values(total=subtotal.scalar_subquery())
+        .returning(Venda.data_venda, Venda.total, anterior.c.total.label("total_anterior"))
+        .execution_options(synchronize_session=False)
+    )
+
+def recalcular_total(db: Session, venda_id: int, data_venda: Optional[date] = None):
+    """
+    Recalcula o total gravado da venda com um único UPDATE (SUM sobre os itens).
+    Retorna a linha (data_venda, total, total_anterior), ou None se a venda não existe.
+    O commit fica a cargo de quem chama.
+    """
+    return db.execute(stmt_recalcular_total(venda_id, data_venda)).first()
+
+def stmt_listar_vendas(
+    skip: int = 0, limit: int = 100, cursor: Optional[str] = None, colunas: tuple = COLUNAS_LISTAGEM
+):
+    stmt = select(*colunas).order_by(Venda.data_venda, Venda.id)
+    if cursor:
+        # Paginação por chave (data_venda, id), servida pelo índice ix_vendas_data_venda_id
+        data_venda, ultimo_id = decodificar_cursor_venda(cursor)
+        stmt = stmt.where(tuple_(Venda.data_venda, Venda.id) > tuple_(data_venda, ultimo_id))
+    else:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit)
+
+def get_vendas(
+    db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, colunas: tuple = COLUNAS_LISTAGEM
+):
+    return db.execute(stmt_listar_vendas(skip, limit, cursor, colunas)).all()
+
+def stmt_quantidades(venda_id: int, data_venda: date):
+    """
+    (produto_id, quantidade, preco_unitario) dos itens da venda, lidos só da partição do mês dela.
+    """
+    return select(VendaProduto.produto_id, VendaProduto.quantidade, VendaProduto.preco_unitario).where(
+        VendaProduto.venda_id == venda_id, VendaProduto.data_venda == data_venda
+    )
+
+def separar_itens(linhas) -> tuple:
+    """
+    ({produto_id: quantidade}, {produto_id: preco_unitario}) a partir de linhas
+    (produto_id, quantidade, preco_unitario).
+    """
+    quantidades = {produto_id: quantidade for produto_id, quantidade, _ in linhas}
+    precos = {produto_id: preco for produto_id, _, preco in linhas}
+    return quantidades, precos
+
+def chave_cursor(venda: Venda):
+    return (venda.data_venda.isoformat(), venda.id)
+
+def agrupar_itens(venda: VendaCreate) -> dict:
+    """
+    Soma as quantidades de itens repetidos do carrinho (a chave de venda_produto é venda_id + produto_id).
+    """
+    quantidades = {}
+    for item in venda.produtos:
+        quantidades[item.produto_id] = quantidades.get(item.produto_id, 0) + item.quantidade
+    return quantidades
+
+def stmt_precos(produto_ids):
+    return select(Produto.id, func.coalesce(Produto.preco, 0.0)).where(Produto.id.in_(produto_ids))
+
+def total_dos_itens(quantidades: dict, precos: dict) -> float:
+    """
+    Total da venda calculado uma única vez a partir dos preços já consultados.
+    """
+    nao_encontrados = sorted(set(quantidades) - set(precos))
+    if nao_encontrados:
+        raise ValueError(f"Produto(s) não encontrado(s): {nao_encontrados}")
+    return sum(precos[produto_id] * quantidade for produto_id, quantidade in quantidades.items())
+
+# As escritas usam INSERT/UPDATE/DELETE ... RETURNING: cada uma devolve as colunas da
+# resposta no próprio comando, sem SELECT antes (para achar a venda) nem refresh depois
+def stmt_inserir_venda(cliente_id: Optional[int], data_venda: date, total: float):
+    return insert(Venda).values(cliente_id=cliente_id, data_venda=data_venda, total=total).returning(*COLUNAS_LISTAGEM)
+
+def stmt_inserir_itens(venda_id: int, data_venda: date, quantidades: dict, precos: dict):
+    """
+    Um único INSERT de várias linhas com os itens da venda, em ordem de produto_id, cada
+    um com o preço do produto lido para o total.
+    """
+    return insert(VendaProduto).values([
+        {
+            "venda_id": venda_id,
+            "produto_id": produto_id,
+            "data_venda": data_venda,
+            "quantidade": quantidade,
+            "preco_unitario": precos[produto_id],
+        }
+        for produto_id, quantidade in sorted(quantidades.items())
+    ])
+
+def montar_venda(linha, quantidades: dict, precos: dict) -> dict:
+    """
+    A venda recém-criada na forma do schema VendaWithProdutos.
+    """
+    return {
+        **linha._asdict(),
+        "produtos": [
+            {
+                "venda_id": linha.id,
+                "produto_id": produto_id,
+                "quantidade": quantidade,
+                "preco_unitario": precos[produto_id],
+            }
+            for produto_id, quantidade in sorted(quantidades.items())
+        ],
+    }
+
+def _soma_itens(venda_id, data_venda):
+    return (
+        select(func.coalesce(func.sum(VendaProduto.quantidade), 0))
+        .where(VendaProduto.venda_id == venda_id, VendaProduto.data_venda == data_venda)
+        .scalar_subquery()
+        .label("quantidade_itens")
+    )
+
+def stmt_atualizar_venda(venda_id: int, venda: VendaUpdate):
+    """
+    UPDATE dos campos informados que devolve a venda atualizada e, da linha travada antes
+    da alteração, a data e o total anteriores, além da soma das quantidades dos itens.
+    """
+    valores = {campo: valor for campo, valor in venda.model_dump().items() if valor is not None}
+    if not valores:
+        return select(
+            *COLUNAS_LISTAGEM,
+            Venda.data_venda.label("data_anterior"),
+            Venda.total.label("total_anterior"),
+            _soma_itens(Venda.id, Venda.data_venda),
+        ).where(Venda.id == venda_id)
+
+    anterior = (
+        select(Venda.id, Venda.data_venda, Venda.total)
+        .where(Venda.id == venda_id)
+        .with_for_update()
+        .subquery("anterior")
+    )
+    return (
+        update(Venda)
+        .where(Venda.id == venda_id, Venda.id == anterior.c.id, Venda.data_venda == anterior.c.data_venda)
+        .values(**valores)
+        .returning(
+            *COLUNAS_LISTAGEM,
+            anterior.c.data_venda.label("data_anterior"),
+            anterior.c.total.label("total_anterior"),
+            _soma_itens(anterior.c.id, anterior.c.data_venda),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def stmt_excluir_venda(venda_id: int):
+    """
+    DELETE da venda que remove antes os itens num CTE, devolvendo os itens
+    [produto_id, quantidade, preco_unitario] e a soma das quantidades: a exclusão em
+    cascata da chave estrangeira não diria o que voltar ao estoque e aos totais por produto.
+    """
+    itens = (
+        delete(VendaProduto)
+        .where(VendaProduto.venda_id == venda_id)
+        .returning(VendaProduto.produto_id, VendaProduto.quantidade, VendaProduto.preco_unitario)
+        .cte("itens")
+    )
+    lista_itens = select(
+        func.json_agg(
+            func.json_build_array(itens.c.produto_id, itens.c.quantidade, itens.c.preco_unitario),
+            type_=JSON,
+        )
+    ).scalar_subquery()
+    quantidade_itens = select(func.coalesce(func.sum(itens.c.quantidade), 0)).scalar_subquery()
+    return (
+        delete(Venda)
+        .where(Venda.id == venda_id)
+        .returning(*COLUNAS_LISTAGEM, lista_itens.label("itens"), quantidade_itens.label("quantidade_itens"))
+        .add_cte(itens)
+        .execution_options(synchronize_session=False)
+    )
+
+def create_venda(db: Session, venda: VendaCreate, commit: bool = True) -> dict:
+    """
+    Cria a venda e, se informados, os seus itens, com o total calculado uma única vez.
+    Os itens são gravados num único INSERT de várias linhas, com baixa do estoque de cada produto.
+    """
+    data_venda = venda.data_venda or date.today()
+    garantir_particao(db, data_venda)
+
+    total = venda.total or 0.0
+    quantidades = agrupar_itens(venda)
+    precos = {}
+    if quantidades:
+        # O preço lido aqui é o que fica gravado em cada item
+        precos = dict(db.execute(stmt_precos(quantidades)).all())
+        total = total_dos_itens(quantidades, precos)
+        movimentar_estoque(db, quantidades)
+        registrar_itens(db, data_venda, quantidades, precos)
+
+    db_venda = db.execute(stmt_inserir_venda(venda.cliente_id, data_venda, total)).one()
+    if quantidades:
+        db.execute(stmt_inserir_itens(db_venda.id, data_venda, quantidades, precos))
+    if commit:
+        db.commit()
+    return montar_venda(db_venda, quantidades, precos)
+
+def update_venda(db: Session, venda_id: int, venda: VendaUpdate, commit: bool = True):
+    """
+    Atualiza os campos informados. Retorna a linha da venda com data_anterior,
+    total_anterior e quantidade_itens, ou None se a venda não existe.
+    """
+    if venda.data_venda:
+        # Uma troca de data move a venda (e os itens, em cascata) para a partição do novo mês
+        garantir_particao(db, venda.data_venda)
+    db_venda = db.execute(stmt_atualizar_venda(venda_id, venda)).first()
     if db_venda is None:
         return None
-    
-    for var, value in vars(venda).items():
-        if value is not None:
-            setattr(db_venda, var, value)
-    
-    db.commit()
-    db.refresh(db_venda)
+    if db_venda.data_venda != db_venda.data_anterior:
+        # e as quantidades dos itens de um dia para o outro nos totais por produto
+        quantidades, precos = separar_itens(db.execute(stmt_quantidades(venda_id, db_venda.data_venda)).all())
+        registrar_itens(db, db_venda.data_anterior, {produto_id: -quantidade for produto_id, quantidade in quantidades.items()}, precos)
+        registrar_itens(db, db_venda.data_venda, quantidades, precos)
+
+    if commit:
+        db.commit()
     return db_venda
 
-def delete_venda(db: Session, venda_id: int):
-    db_venda = get_venda(db, venda_id)
+def delete_venda(db: Session, venda_id: int, commit: bool = True):
+    """
+    Exclui a venda e os itens num único comando. Retorna a linha da venda com
+    quantidade_itens, ou None se a venda não existe.
+    """
+    db_venda = db.execute(stmt_excluir_venda(venda_id)).first()
     if db_venda is None:
         return None
-    db.delete(db_venda)
-    db.commit()
-    return db_venda
\ No newline at end of file
+    # Devolve ao estoque o que os itens tinham baixado e tira os itens dos totais por produto
+    quantidades, precos = separar_itens(db_venda.itens or [])
+    devolucoes = {produto_id: -quantidade for produto_id, quantidade in quantidades.items()}
+    movimentar_estoque(db, devolucoes)
+    registrar_itens(db, db_venda.data_venda, devolucoes, precos)
+    if commit:
+        db.commit()
+    return db_venda
@@ -0,0 +1,126 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy import Date, cast, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models import Venda, VendaDiaria, VendaProduto
+
+def stmt_variacao(
+    data_venda: Optional[date],
+    vendas: int = 0,
+    receita: float = 0.0,
+    itens: int = 0,
+):
+    """
+    Upsert que soma a variação aos totais do dia, ou None se não há o que registrar.
+    """
+    if data_venda is None or not (vendas or receita or itens):
+        return None
+
+    stmt = insert(VendaDiaria).values(
+        data=data_venda,
+        quantidade_vendas=vendas,
+        receita=receita,
+        itens_vendidos=itens,
+    )
+    # Upsert incremental: escritas concorrentes no mesmo dia somam sem perder atualização
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VendaDiaria.data],
+        set_={
+            "quantidade_vendas": VendaDiaria.quantidade_vendas + stmt.excluded.quantidade_vendas,
+            "receita": VendaDiaria.receita + stmt.excluded.receita,
+            "itens_vendidos": VendaDiaria.itens_vendidos + stmt.excluded.itens_vendidos,
+        },
+    )
+    return stmt
+
+def registrar_variacao(
+    db: Session,
+    data_venda: Optional[date],
+    vendas: int = 0,
+    receita: float = 0.0,
+    itens: int = 0,
+):
+    """
+    Soma a variação aos totais do dia, na mesma transação da escrita que a originou.
+    O commit fica a cargo de quem chama.
+    """
+    stmt = stmt_variacao(data_venda, vendas=vendas, receita=receita, itens=itens)
+    if stmt is not None:
+        db.execute(stmt)
+
+def get_resumo(db: Session, data_inicio: Optional[date] = None, data_fim: Optional[date] = None):
+    """
+    Retorna os totais e a série mensal lendo apenas a tabela vendas_diarias.
+    """
+    mes = cast(func.date_trunc("month", VendaDiaria.data), Date)
+    query = db.query(
+        mes.label("mes"),
+        func.sum(VendaDiaria.quantidade_vendas).label("quantidade_vendas"),
+        func.sum(VendaDiaria.receita).label("receita"),
+        func.sum(VendaDiaria.itens_vendidos).label("itens_vendidos"),
+    ).filter(VendaDiaria.quantidade_vendas > 0)  # dias que ficaram zerados após exclusões
+    if data_inicio:
+        query = query.filter(VendaDiaria.data >= data_inicio)
+    if data_fim:
+        query = query.filter(VendaDiaria.data <= data_fim)
+    meses = [
+        {
+            "mes": linha.mes,
+            "quantidade_vendas": int(linha.quantidade_vendas),
+            "receita": float(linha.receita),
+            "itens_vendidos": int(linha.itens_vendidos),
+        }
+        for linha in query.group_by(mes).order_by(mes).all()
+    ]
+
+    quantidade_vendas = sum(m["quantidade_vendas"] for m in meses)
+    receita = sum(m["receita"] for m in meses)
+    return {
+        "quantidade_vendas": quantidade_vendas,
+        "receita": receita,
+        "itens_vendidos": sum(m["itens_vendidos"] for m in meses),
+        "ticket_medio": receita / quantidade_vendas if quantidade_vendas else 0.0,
+        "media_mensal": receita / len(meses) if meses else 0.0,
+        "meses": meses,
+    }
+
+def reconstruir_vendas_diarias(db: Session) -> int:
+    """
+    Recalcula vendas_diarias a partir de vendas e venda_produto (carga inicial ou correção).
+    Retorna o número de dias gravados.
+    """
+    # Bloqueia as escritas incrementais enquanto a tabela é refeita
+    db.execute(text("LOCK TABLE vendas_diarias IN SHARE ROW EXCLUSIVE MODE"))
+    db.query(VendaDiaria).delete(synchronize_session=False)
+
+    itens_por_venda = (
+        select(
+            VendaProduto.venda_id,
+            VendaProduto.data_venda,
+            func.sum(VendaProduto.quantidade).label("itens"),
+        )
+        .group_by(VendaProduto.venda_id, VendaProduto.data_venda)
+        .subquery()
+    )
+    totais = (
+        select(
+            Venda.data_venda,
+            func.count(Venda.id),
+            func.coalesce(func.sum(Venda.total), 0),
+            func.coalesce(func.sum(itens_por_venda.c.itens), 0),
+        )
+        .outerjoin(
+            itens_por_venda,
+            (itens_por_venda.c.venda_id == Venda.id) & (itens_por_venda.c.data_venda == Venda.data_venda)
+        )
+        .where(Venda.data_venda.isnot(None))
+        .group_by(Venda.data_venda)
+    )
+    resultado = db.execute(
+        insert(VendaDiaria).from_select(
+            ["data", "quantidade_vendas", "receita", "itens_vendidos"], totais
+        )
+    )
+    db.commit()
+    return resultado.rowcount
@@ -1,7 +1,21 @@
+from typing import Optional
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.orm import Session
+from app import eventos
+from app.crud.estoque import movimentar_estoque, variacao_itens
+from app.crud.produto_venda_diaria import registrar_itens
+from app.models.estoque import Produto
+from app.models.venda import Venda
 from app.models.venda_produto import VendaProduto
 from app.schemas.venda_produto import VendaProdutoCreate, VendaProdutoUpdate
 
+# Colunas do schema VendaProduto, devolvidas pelas escritas (RETURNING)
+COLUNAS_ITEM = (VendaProduto.venda_id, VendaProduto.produto_id, VendaProduto.quantidade, VendaProduto.preco_unitario)
+
+def _preco_atual(produto_id: int):
+    # O preço que o item grava ao entrar na venda (ou ao trocar de produto)
+    return select(func.coalesce(Produto.preco, 0.0)).where(Produto.id == produto_id).scalar_subquery()
+
 def get_venda_produto(db: Session, venda_id: int, produto_id: int):
     return db.query(VendaProduto).filter(
         VendaProduto.venda_id == venda_id,
@@ -11,34 +25,164 @@ def get_venda_produto(db: Session, venda_id: int, produto_id: int):
 def get_venda_produtos(db: Session, venda_id: int):
     return db.query(VendaProduto).filter(VendaProduto.venda_id == venda_id).all()
 
-def create_venda_produto(db: Session, venda_produto: VendaProdutoCreate):
-    db_venda_produto = VendaProduto(**venda_produto.model_dump())
-    db.add(db_venda_produto)
-    db.commit()
-    db.refresh(db_venda_produto)
+def stmt_inserir_item(venda_produto: VendaProdutoCreate, data_venda):
+    return insert(VendaProduto).values(
+        **venda_produto.model_dump(), data_venda=data_venda, preco_unitario=_preco_atual(venda_produto.produto_id)
+    ).returning(*COLUNAS_ITEM)
+
+def stmt_atualizar_item(venda_id: int, produto_id: int, venda_produto: VendaProdutoUpdate):
+    """
+    UPDATE do item que devolve os valores novos e, da linha travada antes da alteração,
+    o produto, a quantidade, o preço e a data anteriores: sem SELECT prévio. O preço
+    gravado só muda se o item trocar de produto.
+    """
+    anterior = (
+        select(
+            VendaProduto.venda_id,
+            VendaProduto.produto_id,
+            VendaProduto.data_venda,
+            VendaProduto.quantidade,
+            VendaProduto.preco_unitario,
+        )
+        .where(VendaProduto.venda_id == venda_id, VendaProduto.produto_id == produto_id)
+        .with_for_update()
+        .subquery("anterior")
+    )
+    valores = venda_produto.model_dump()
+    if venda_produto.produto_id != produto_id:
+        valores["preco_unitario"] = _preco_atual(venda_produto.produto_id)
+    if venda_produto.venda_id != venda_id:
+        # Item trocado de venda: acompanha a data (e a partição) da nova venda
+        valores["data_venda"] = func.coalesce(
+            select(Venda.data_venda).where(Venda.id == venda_produto.venda_id).scalar_subquery(),
+            anterior.c.data_venda,
+        )
+    return (
+        update(VendaProduto)
+        .where(
+            VendaProduto.venda_id == venda_id,
+            VendaProduto.produto_id == produto_id,
+            VendaProduto.data_venda == anterior.c.data_venda,
+        )
+        .values(**valores)
+        .returning(
+            *COLUNAS_ITEM,
+            VendaProduto.data_venda,
+            anterior.c.produto_id.label("produto_anterior"),
+            anterior.c.quantidade.label("quantidade_anterior"),
+            anterior.c.preco_unitario.label("preco_anterior"),
+            anterior.c.data_venda.label("data_anterior"),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def stmt_excluir_item(venda_id: int, produto_id: int):
+    return (
+        delete(VendaProduto)
+        .where(VendaProduto.venda_id == venda_id, VendaProduto.produto_id == produto_id)
+        .returning(*COLUNAS_ITEM, VendaProduto.data_venda)
+        .execution_options(synchronize_session=False)
+    )
+
+def variacoes_atualizacao(db_venda_produto):
+    """
+    A partir da linha devolvida por stmt_atualizar_item(): os itens antes e depois
+    ({produto_id: quantidade}), a diferença entre eles e os preços gravados
+    ({produto_id: preco_unitario}).
+    """
+    antes = {db_venda_produto.produto_anterior: db_venda_produto.quantidade_anterior}
+    depois = {db_venda_produto.produto_id: db_venda_produto.quantidade}
+    precos = {
+        db_venda_produto.produto_anterior: db_venda_produto.preco_anterior,
+        db_venda_produto.produto_id: db_venda_produto.preco_unitario,
+    }
+    return antes, depois, variacao_itens(antes, depois), precos
+
+def publicar_item(db, venda_id: int, produto_id: int, quantidade: int, total: Optional[float]):
+    """
+    Evento de item alterado para as telas ao vivo; quantidade 0 é item removido da venda.
+    """
+    eventos.publicar(db, "item_alterado", {
+        "venda_id": venda_id, "produto_id": produto_id, "quantidade": quantidade, "total": total
+    })
+
+def variacao_itens_vendas(db_venda_produto, venda_id: int) -> tuple:
+    """
+    Variação de itens vendidos no dia da venda de origem e no da venda de destino de um
+    PUT no item: se ele trocou de venda, sai inteiro de uma e entra inteiro na outra.
+    """
+    if db_venda_produto.venda_id == venda_id:
+        return db_venda_produto.quantidade - db_venda_produto.quantidade_anterior, 0
+    return -db_venda_produto.quantidade_anterior, db_venda_produto.quantidade
+
+def publicar_alteracao_item(db, venda_id: int, produto_id: int, db_venda_produto, totais, totais_destino=None):
+    """
+    Eventos de um PUT no item (venda_id, produto_id), que pode trocá-lo de venda ou de
+    produto: nesse caso o par antigo sai da venda. `totais` e `totais_destino` (venda
+    nova do item, se mudou) vêm de recalcular_total().
+    """
+    total = totais.total if totais else None
+    novo = (db_venda_produto.venda_id, db_venda_produto.produto_id)
+    if novo != (venda_id, produto_id):
+        publicar_item(db, venda_id, produto_id, 0, total)
+    if novo[0] != venda_id:
+        total = totais_destino.total if totais_destino else None
+    publicar_item(db, *novo, db_venda_produto.quantidade, total)
+
+def create_venda_produto(db: Session, venda_produto: VendaProdutoCreate, commit: bool = True):
+    # O item vai para a partição do mês da venda (em geral já carregada por quem chama)
+    venda = db.get(Venda, venda_produto.venda_id)
+    if venda is None:
+        raise ValueError("Venda não encontrada")
+    movimentar_estoque(db, {venda_produto.produto_id: venda_produto.quantidade})
+    db_venda_produto = db.execute(stmt_inserir_item(venda_produto, venda.data_venda)).one()
+    registrar_itens(
+        db, venda.data_venda, {db_venda_produto.produto_id: db_venda_produto.quantidade},
+        {db_venda_produto.produto_id: db_venda_produto.preco_unitario}
+    )
+    if commit:
+        db.commit()
     return db_venda_produto
 
 def update_venda_produto(
     db: Session, 
     venda_id: int, 
     produto_id: int, 
-    venda_produto: VendaProdutoUpdate
+    venda_produto: VendaProdutoUpdate,
+    commit: bool = True
 ):
-    db_venda_produto = get_venda_produto(db, venda_id, produto_id)
+    """
+    Atualiza o item. Retorna a linha com os valores novos e os anteriores
+    (produto_anterior, quantidade_anterior, data_anterior), ou None se o item não existe.
+    """
+    db_venda_produto = db.execute(stmt_atualizar_item(venda_id, produto_id, venda_produto)).first()
     if db_venda_produto is None:
         return None
-    
-    for var, value in vars(venda_produto).items():
-        setattr(db_venda_produto, var, value)
-    
-    db.commit()
-    db.refresh(db_venda_produto)
+
+    # A troca de quantidade (ou de produto) baixa ou devolve só a diferença
+    antes, depois, variacao, precos = variacoes_atualizacao(db_venda_produto)
+    movimentar_estoque(db, variacao)
+
+    # Totais por produto: a diferença no mesmo dia ou, se o item mudou de dia, a saída de um e a entrada no outro
+    if db_venda_produto.data_venda == db_venda_produto.data_anterior:
+        registrar_itens(db, db_venda_produto.data_venda, variacao, precos)
+    else:
+        registrar_itens(db, db_venda_produto.data_anterior, {produto: -quantidade for produto, quantidade in antes.items()}, precos)
+        registrar_itens(db, db_venda_produto.data_venda, depois, precos)
+
+    if commit:
+        db.commit()
     return db_venda_produto
 
-def delete_venda_produto(db: Session, venda_id: int, produto_id: int):
-    db_venda_produto = get_venda_produto(db, venda_id, produto_id)
+def delete_venda_produto(db: Session, venda_id: int, produto_id: int, commit: bool = True):
+    db_venda_produto = db.execute(stmt_excluir_item(venda_id, produto_id)).first()
     if db_venda_produto is None:
         return None
-    db.delete(db_venda_produto)
-    db.commit()
-    return db_venda_produto
\ No newline at end of file
+    movimentar_estoque(db, {produto_id: -db_venda_produto.quantidade})
+    registrar_itens(
+        db, db_venda_produto.data_venda, {produto_id: -db_venda_produto.quantidade},
+        {produto_id: db_venda_produto.preco_unitario}
+    )
+    if commit:
+        db.commit()
+    return db_venda_produto
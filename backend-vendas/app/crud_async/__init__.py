@@ -0,0 +1,2 @@
+# Versões async dos módulos de app/crud, usadas no modo DB_MODE=async (AsyncSession/asyncpg).
+# As consultas são as mesmas do modo síncrono; só a execução passa a ser aguardada.
@@ -0,0 +1,20 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schemas
+from app.crud.cliente import COLUNAS_LISTAGEM, stmt_buscar_clientes, stmt_criar_cliente, stmt_listar_clientes
+
+async def create_cliente(db: AsyncSession, cliente: schemas.ClienteCreate):
+    db_cliente = (await db.execute(stmt_criar_cliente(cliente))).one()
+    await db.commit()
+    return db_cliente
+
+async def get_cliente(db: AsyncSession, cliente_id: int):
+    return await db.get(models.Cliente, cliente_id)
+
+async def get_clientes(
+    db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, colunas: tuple = COLUNAS_LISTAGEM
+):
+    return (await db.execute(stmt_listar_clientes(skip, limit, cursor, colunas))).all()
+
+async def buscar_clientes(db: AsyncSession, termo: str, limit: int = 10):
+    return (await db.scalars(stmt_buscar_clientes(termo, limit))).all()
@@ -0,0 +1,15 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.estoque import EstoqueInsuficiente, publicar_estoque, stmts_movimentar
+
+async def movimentar_estoque(db: AsyncSession, variacoes: dict):
+    """
+    Aplica as variações de estoque na transação corrente; levanta EstoqueInsuficiente se
+    alguma baixa não couber. O commit (ou rollback) fica a cargo de quem chama.
+    """
+    for produto_id, quantidade, stmt in stmts_movimentar(variacoes):
+        linha = (await db.execute(stmt)).first()
+        if linha is None:
+            if quantidade > 0:
+                raise EstoqueInsuficiente(produto_id, quantidade)
+            continue
+        publicar_estoque(db, linha.id, linha.quantidade_em_estoque)
@@ -0,0 +1,11 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.particoes import precisa_criar, stmt_criar_particoes
+
+async def garantir_particao(db: AsyncSession, data_venda: Optional[date]):
+    """
+    Garante, na transação corrente, as partições do mês de `data_venda`.
+    """
+    if precisa_criar(data_venda):
+        await db.execute(stmt_criar_particoes(data_venda))
@@ -0,0 +1,108 @@
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schemas
+from app.cache import catalogo
+from app.crud.estoque import publicar_estoque
+from app.crud.produto import (
+    COLUNAS_LISTAGEM,
+    stmt_atualizar_produto,
+    stmt_buscar_produtos,
+    stmt_criar_produto,
+    stmt_excluir_produto,
+    stmt_listar_produtos,
+    stmt_produtos_por_ids,
+    stmt_versao_catalogo,
+)
+
+async def get_versao_catalogo(db: AsyncSession):
+    return (await db.execute(stmt_versao_catalogo())).one()
+
+async def create_produto(db: AsyncSession, produto: schemas.ProdutoCreate):
+    """
+    Cria um novo produto no banco de dados.
+    """
+    db_produto = (await db.execute(stmt_criar_produto(produto))).one()
+    await db.commit()
+    return db_produto
+
+async def get_produto(db: AsyncSession, produto_id: int, versao: Optional[int] = None):
+    """
+    Retorna um produto pelo ID, servido pelo cache do catálogo quando possível. `versao` é
+    a do catálogo já lida pela rota; sem ela, é lida aqui.
+    """
+    if versao is None:
+        versao = (await get_versao_catalogo(db)).versao
+    encontrado, produto = catalogo.obter(versao, ("produto", produto_id))
+    if encontrado:
+        return produto
+
+    db_produto = await db.get(models.Produto, produto_id)
+    produto = schemas.Produto.model_validate(db_produto) if db_produto else None
+    catalogo.guardar(versao, ("produto", produto_id), produto)
+    return produto
+
+async def get_produtos(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    colunas: tuple = COLUNAS_LISTAGEM,
+    versao: Optional[int] = None,
+):
+    """
+    Retorna uma lista de produtos ordenada por id, paginada por offset ou por cursor,
+    só com as `colunas` pedidas. As páginas são servidas pelo cache do catálogo quando possível.
+    """
+    if versao is None:
+        versao = (await get_versao_catalogo(db)).versao
+    chave = ("lista", skip, limit, cursor, tuple(coluna.key for coluna in colunas))
+    encontrado, produtos = catalogo.obter(versao, chave)
+    if encontrado:
+        return produtos
+
+    produtos = (await db.execute(stmt_listar_produtos(skip, limit, cursor, colunas))).all()
+    catalogo.guardar(versao, chave, produtos)
+    return produtos
+
+async def get_produtos_por_ids(db: AsyncSession, ids: List[int], versao: Optional[int] = None):
+    """
+    Os produtos dos ids informados numa única consulta; ids inexistentes são ignorados.
+    Servido pelo cache do catálogo quando possível.
+    """
+    if not ids:
+        return []
+    if versao is None:
+        versao = (await get_versao_catalogo(db)).versao
+    chave = ("lote", tuple(sorted(ids)))
+    encontrado, produtos = catalogo.obter(versao, chave)
+    if encontrado:
+        return produtos
+
+    produtos = (await db.execute(stmt_produtos_por_ids(ids))).all()
+    catalogo.guardar(versao, chave, produtos)
+    return produtos
+
+async def update_produto(db: AsyncSession, produto_id: int, produto: schemas.ProdutoUpdate):
+    # Atualiza apenas os campos fornecidos; None se o produto não for encontrado
+    db_produto = (await db.execute(stmt_atualizar_produto(produto_id, produto))).first()
+    if not db_produto:
+        return None
+
+    if produto.quantidade_em_estoque is not None:
+        publicar_estoque(db, db_produto.id, db_produto.quantidade_em_estoque)
+    await db.commit()
+    return db_produto
+
+async def delete_produto(db: AsyncSession, produto_id: int):
+    """
+    Remove um produto do banco de dados.
+    """
+    db_produto = (await db.execute(stmt_excluir_produto(produto_id))).first()
+    if not db_produto:
+        return None  # Retorna None se o produto não for encontrado
+
+    await db.commit()
+    return db_produto
+
+async def buscar_produtos(db: AsyncSession, termo: str, limit: int = 10):
+    return (await db.scalars(stmt_buscar_produtos(termo, limit))).all()
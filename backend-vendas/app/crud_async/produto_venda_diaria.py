@@ -0,0 +1,23 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import produto_venda_diaria as crud_produto_venda_diaria
+from app.schemas.relatorio import CriterioRanking
+
+async def registrar_itens(db: AsyncSession, data_venda: Optional[date], variacoes: dict, precos: dict):
+    """
+    Soma as variações dos itens aos totais do dia por produto, na mesma transação da escrita.
+    """
+    stmt = crud_produto_venda_diaria.stmt_variacao_itens(data_venda, variacoes, precos)
+    if stmt is not None:
+        await db.execute(stmt)
+
+async def get_mais_vendidos(
+    db: AsyncSession,
+    criterio: CriterioRanking,
+    limit: int = 10,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+):
+    stmt = crud_produto_venda_diaria.stmt_mais_vendidos(criterio, limit, data_inicio, data_fim)
+    return (await db.execute(stmt)).all()
@@ -0,0 +1,19 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import relatorio as crud_relatorio
+from app.schemas.relatorio import Agrupamento
+
+async def relatorio_vendas(
+    db: AsyncSession,
+    agrupamento: Agrupamento,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+):
+    # Reaproveita as agregações síncronas; run_sync executa sobre a mesma conexão asyncpg
+    return await db.run_sync(
+        crud_relatorio.relatorio_vendas,
+        agrupamento=agrupamento,
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+    )
@@ -0,0 +1,100 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.models.venda import Venda
+from app.schemas.venda import VendaCreate, VendaUpdate
+from app.crud_async.estoque import movimentar_estoque
+from app.crud_async.particoes import garantir_particao
+from app.crud_async.produto_venda_diaria import registrar_itens
+from app.crud.venda import (
+    COLUNAS_LISTAGEM,
+    agrupar_itens,
+    montar_venda,
+    montar_venda_detalhada,
+    separar_itens,
+    stmt_atualizar_venda,
+    stmt_excluir_venda,
+    stmt_inserir_itens,
+    stmt_inserir_venda,
+    stmt_listar_vendas,
+    stmt_precos,
+    stmt_quantidades,
+    stmt_recalcular_total,
+    stmt_venda_detalhada,
+    total_dos_itens,
+)
+from datetime import date
+from typing import Optional
+
+async def get_venda(db: AsyncSession, venda_id: int, carregar_produtos: bool = False):
+    stmt = select(Venda).where(Venda.id == venda_id)
+    if carregar_produtos:
+        stmt = stmt.options(selectinload(Venda.produtos))
+    return (await db.scalars(stmt)).first()
+
+async def get_venda_detalhada(db: AsyncSession, venda_id: int) -> Optional[dict]:
+    return montar_venda_detalhada((await db.execute(stmt_venda_detalhada(venda_id))).all())
+
+async def recalcular_total(db: AsyncSession, venda_id: int, data_venda: Optional[date] = None):
+    """
+    Recalcula o total gravado da venda com um único UPDATE (SUM sobre os itens).
+    Retorna a linha (data_venda, total, total_anterior), ou None se a venda não existe.
+    """
+    return (await db.execute(stmt_recalcular_total(venda_id, data_venda))).first()
+
+async def get_vendas(
+    db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, colunas: tuple = COLUNAS_LISTAGEM
+):
+    return (await db.execute(stmt_listar_vendas(skip, limit, cursor, colunas))).all()
+
+async def create_venda(db: AsyncSession, venda: VendaCreate, commit: bool = True) -> dict:
+    """
+    Cria a venda e, se informados, os seus itens, com o total calculado uma única vez.
+    """
+    data_venda = venda.data_venda or date.today()
+    await garantir_particao(db, data_venda)
+
+    total = venda.total or 0.0
+    quantidades = agrupar_itens(venda)
+    precos = {}
+    if quantidades:
+        # O preço lido aqui é o que fica gravado em cada item
+        precos = dict((await db.execute(stmt_precos(quantidades))).all())
+        total = total_dos_itens(quantidades, precos)
+        await movimentar_estoque(db, quantidades)
+        await registrar_itens(db, data_venda, quantidades, precos)
+
+    db_venda = (await db.execute(stmt_inserir_venda(venda.cliente_id, data_venda, total))).one()
+    if quantidades:
+        await db.execute(stmt_inserir_itens(db_venda.id, data_venda, quantidades, precos))
+    if commit:
+        await db.commit()
+    return montar_venda(db_venda, quantidades, precos)
+
+async def update_venda(db: AsyncSession, venda_id: int, venda: VendaUpdate, commit: bool = True):
+    if venda.data_venda:
+        await garantir_particao(db, venda.data_venda)
+    db_venda = (await db.execute(stmt_atualizar_venda(venda_id, venda))).first()
+    if db_venda is None:
+        return None
+    if db_venda.data_venda != db_venda.data_anterior:
+        quantidades, precos = separar_itens((await db.execute(stmt_quantidades(venda_id, db_venda.data_venda))).all())
+        await registrar_itens(db, db_venda.data_anterior, {produto_id: -quantidade for produto_id, quantidade in quantidades.items()}, precos)
+        await registrar_itens(db, db_venda.data_venda, quantidades, precos)
+
+    if commit:
+        await db.commit()
+    return db_venda
+
+async def delete_venda(db: AsyncSession, venda_id: int, commit: bool = True):
+    db_venda = (await db.execute(stmt_excluir_venda(venda_id))).first()
+    if db_venda is None:
+        return None
+    # Devolve ao estoque o que os itens tinham baixado e tira os itens dos totais por produto
+    quantidades, precos = separar_itens(db_venda.itens or [])
+    devolucoes = {produto_id: -quantidade for produto_id, quantidade in quantidades.items()}
+    await movimentar_estoque(db, devolucoes)
+    await registrar_itens(db, db_venda.data_venda, devolucoes, precos)
+    if commit:
+        await db.commit()
+    return db_venda
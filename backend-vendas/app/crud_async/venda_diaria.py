@@ -0,0 +1,24 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import venda_diaria as crud_venda_diaria
+
+async def registrar_variacao(
+    db: AsyncSession,
+    data_venda: Optional[date],
+    vendas: int = 0,
+    receita: float = 0.0,
+    itens: int = 0,
+):
+    """
+    Soma a variação aos totais do dia, na mesma transação da escrita que a originou.
+    """
+    stmt = crud_venda_diaria.stmt_variacao(data_venda, vendas=vendas, receita=receita, itens=itens)
+    if stmt is not None:
+        await db.execute(stmt)
+
+async def get_resumo(db: AsyncSession, data_inicio: Optional[date] = None, data_fim: Optional[date] = None):
+    # Reaproveita a consulta síncrona; run_sync executa sobre a mesma conexão asyncpg
+    return await db.run_sync(
+        crud_venda_diaria.get_resumo, data_inicio=data_inicio, data_fim=data_fim
+    )
@@ -0,0 +1,73 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.venda_produto import (
+    stmt_atualizar_item,
+    stmt_excluir_item,
+    stmt_inserir_item,
+    variacoes_atualizacao,
+)
+from app.crud_async.estoque import movimentar_estoque
+from app.crud_async.produto_venda_diaria import registrar_itens
+from app.models.venda import Venda
+from app.models.venda_produto import VendaProduto
+from app.schemas.venda_produto import VendaProdutoCreate, VendaProdutoUpdate
+
+async def get_venda_produto(db: AsyncSession, venda_id: int, produto_id: int):
+    return await db.get(VendaProduto, (venda_id, produto_id))
+
+async def get_venda_produtos(db: AsyncSession, venda_id: int):
+    stmt = select(VendaProduto).where(VendaProduto.venda_id == venda_id)
+    return (await db.scalars(stmt)).all()
+
+async def create_venda_produto(db: AsyncSession, venda_produto: VendaProdutoCreate, commit: bool = True):
+    venda = await db.get(Venda, venda_produto.venda_id)
+    if venda is None:
+        raise ValueError("Venda não encontrada")
+    await movimentar_estoque(db, {venda_produto.produto_id: venda_produto.quantidade})
+    db_venda_produto = (await db.execute(stmt_inserir_item(venda_produto, venda.data_venda))).one()
+    await registrar_itens(
+        db, venda.data_venda, {db_venda_produto.produto_id: db_venda_produto.quantidade},
+        {db_venda_produto.produto_id: db_venda_produto.preco_unitario}
+    )
+    if commit:
+        await db.commit()
+    return db_venda_produto
+
+async def update_venda_produto(
+    db: AsyncSession,
+    venda_id: int,
+    produto_id: int,
+    venda_produto: VendaProdutoUpdate,
+    commit: bool = True
+):
+    db_venda_produto = (await db.execute(stmt_atualizar_item(venda_id, produto_id, venda_produto))).first()
+    if db_venda_produto is None:
+        return None
+
+    # A troca de quantidade (ou de produto) baixa ou devolve só a diferença
+    antes, depois, variacao, precos = variacoes_atualizacao(db_venda_produto)
+    await movimentar_estoque(db, variacao)
+
+    # Totais por produto: a diferença no mesmo dia ou, se o item mudou de dia, a saída de um e a entrada no outro
+    if db_venda_produto.data_venda == db_venda_produto.data_anterior:
+        await registrar_itens(db, db_venda_produto.data_venda, variacao, precos)
+    else:
+        await registrar_itens(db, db_venda_produto.data_anterior, {produto: -quantidade for produto, quantidade in antes.items()}, precos)
+        await registrar_itens(db, db_venda_produto.data_venda, depois, precos)
+
+    if commit:
+        await db.commit()
+    return db_venda_produto
+
+async def delete_venda_produto(db: AsyncSession, venda_id: int, produto_id: int, commit: bool = True):
+    db_venda_produto = (await db.execute(stmt_excluir_item(venda_id, produto_id))).first()
+    if db_venda_produto is None:
+        return None
+    await movimentar_estoque(db, {produto_id: -db_venda_produto.quantidade})
+    await registrar_itens(
+        db, db_venda_produto.data_venda, {produto_id: -db_venda_produto.quantidade},
+        {produto_id: db_venda_produto.preco_unitario}
+    )
+    if commit:
+        await db.commit()
+    return db_venda_produto
@@ -1,14 +1,230 @@
 # app/database.py
-from sqlalchemy import create_engine
+import itertools
+import logging
+import os
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.config import DATABASE_URL  # Importa a URL do banco de dados configurada
+from app import config
+from app.metricas import instrumentar_engine
+
+logger = logging.getLogger(__name__)
 
 # Define a base para as models
 Base = declarative_base()
 
-# Criação do motor de banco de dados (engine)
-engine = create_engine(DATABASE_URL)
+# Os engines são criados por iniciar_banco() (no startup da aplicação ou pelos comandos
+# de linha), não na importação: importar os modelos ou o app não abre conexões, e cada
+# processo (worker) monta o próprio pool
+engine = None
+async_engine = None
+# Réplicas de leitura (config.DATABASE_REPLICA_URLS), na mesma ordem da configuração
+replicas = []
+async_replicas = []
+# Réplica -> instante (time.monotonic) até o qual ela fica fora do rodízio após uma falha
+_replica_indisponivel_ate = {}
+_rodizio = itertools.count()
+
+# Sessões para interagir com o banco de dados; o bind é feito em iniciar_banco()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+# expire_on_commit=False: após o commit os atributos continuam legíveis sem novo I/O
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+def _opcoes_pool() -> dict:
+    return {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+    }
+
+def _criar_engine(url: str):
+    connect_args = {}
+    if config.DB_STATEMENT_TIMEOUT:
+        connect_args["options"] = f"-c statement_timeout={config.DB_STATEMENT_TIMEOUT}"
+    novo_engine = create_engine(url, connect_args=connect_args, **_opcoes_pool())
+    instrumentar_engine(novo_engine)
+    return novo_engine
+
+def _criar_async_engine(url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    connect_args = {}
+    if config.DB_STATEMENT_TIMEOUT:
+        connect_args["server_settings"] = {"statement_timeout": str(config.DB_STATEMENT_TIMEOUT)}
+    novo_engine = create_async_engine(url, connect_args=connect_args, **_opcoes_pool())
+    instrumentar_engine(novo_engine.sync_engine)
+    return novo_engine
+
+def iniciar_banco():
+    """
+    Cria o engine (e, no modo DB_MODE=async, o engine assíncrono) com as opções de pool
+    de app/config.py e associa as sessões a eles; cria também os engines das réplicas de
+    leitura, se configuradas. Chamadas repetidas não fazem nada.
+    """
+    global engine, async_engine
+    if engine is None:
+        engine = _criar_engine(config.DATABASE_URL)
+        replicas[:] = [_criar_engine(url) for url in config.DATABASE_REPLICA_URLS]
+        SessionLocal.configure(bind=engine)
+
+    if config.DB_MODE == "async" and async_engine is None:
+        async_engine = _criar_async_engine(config.ASYNC_DATABASE_URL)
+        async_replicas[:] = [_criar_async_engine(url) for url in config.ASYNC_DATABASE_REPLICA_URLS]
+        AsyncSessionLocal.configure(bind=async_engine)
+    return engine
+
+# PostgreSQL mínimo (server_version_num). Mudar a data de uma venda para outro mês move a
+# linha de partição; até o 14, isso vira DELETE + INSERT e dispara o ON DELETE CASCADE de
+# venda_produto, apagando os itens em vez de movê-los (ON UPDATE CASCADE). Os eventos
+# (pg_current_xact_id) exigem o 13
+VERSAO_MINIMA_POSTGRES = 150000
+
+def verificar_versao_postgres():
+    """
+    No startup: levanta RuntimeError se o servidor é anterior a VERSAO_MINIMA_POSTGRES.
+    """
+    with engine.connect() as conexao:
+        versao = int(conexao.execute(text("SHOW server_version_num")).scalar())
+    if versao < VERSAO_MINIMA_POSTGRES:
+        raise RuntimeError(
+            f"PostgreSQL {versao // 10000} não suportado: é preciso o {VERSAO_MINIMA_POSTGRES // 10000} ou mais recente"
+        )
+
+def _escolher_replica(candidatas: list):
+    """
+    Próxima réplica do rodízio entre as disponíveis, ou None se não há nenhuma.
+    """
+    agora = time.monotonic()
+    disponiveis = [replica for replica in candidatas if _replica_indisponivel_ate.get(replica, 0.0) <= agora]
+    if not disponiveis:
+        return None
+    return disponiveis[next(_rodizio) % len(disponiveis)]
+
+def _marcar_indisponivel(replica, erro: Exception):
+    logger.warning(
+        "Réplica %s indisponível, leituras no primário por %ss: %s",
+        replica.url.render_as_string(hide_password=True), config.REPLICA_PAUSA_FALHA, erro
+    )
+    _replica_indisponivel_ate[replica] = time.monotonic() + config.REPLICA_PAUSA_FALHA
+
+# Leitura após escrita: a resposta de uma escrita traz neste cabeçalho até quando (epoch do
+# servidor, LEITURA_JANELA_PRIMARIO segundos à frente) o cliente deve ler do primário, sem
+# o atraso de replicação; o cliente o devolve nas requisições seguintes. Um cabeçalho, e não
+# um cookie: o frontend (localhost:5173) chama a API em outro site (127.0.0.1:8000), e o
+# navegador não guarda nem envia cookies SameSite nessas chamadas
+CABECALHO_LEITURA_PRIMARIO = "X-Leitura-Primario-Ate"
+
+def registrar_escrita(request, response):
+    """
+    Numa requisição de escrita, com réplicas configuradas, informa ao cliente a janela de
+    leitura no primário.
+    """
+    if (replicas or async_replicas) and request.method not in ("GET", "HEAD", "OPTIONS"):
+        response.headers[CABECALHO_LEITURA_PRIMARIO] = str(int(time.time()) + config.LEITURA_JANELA_PRIMARIO)
+
+def escrita_recente(request) -> bool:
+    valor = request.headers.get(CABECALHO_LEITURA_PRIMARIO, "")
+    return valor.isdigit() and int(valor) >= time.time()
+
+def abrir_sessao_leitura(primario: bool = False):
+    """
+    Sessão para consultas somente de leitura, numa réplica. Usa o primário se não houver
+    réplica disponível, se `primario` for verdadeiro (leitura logo após uma escrita) ou se
+    a réplica escolhida não conectar.
+    """
+    replica = None if primario else _escolher_replica(replicas)
+    if replica is None:
+        return SessionLocal()
+    db = SessionLocal(bind=replica)
+    try:
+        # Conecta já, para que uma réplica fora do ar seja trocada pelo primário antes da consulta
+        db.connection()
+    except DBAPIError as erro:
+        db.close()
+        _marcar_indisponivel(replica, erro)
+        return SessionLocal()
+    return db
+
+async def abrir_sessao_leitura_async(primario: bool = False):
+    """
+    Versão de abrir_sessao_leitura() para o modo assíncrono.
+    """
+    replica = None if primario else _escolher_replica(async_replicas)
+    if replica is None:
+        return AsyncSessionLocal()
+    db = AsyncSessionLocal(bind=replica)
+    try:
+        await db.connection()
+    except (DBAPIError, OSError) as erro:
+        await db.close()
+        _marcar_indisponivel(replica, erro)
+        return AsyncSessionLocal()
+    return db
+
+def aquecer_pool(quantidade: int = None):
+    """
+    Abre `quantidade` conexões (padrão: DB_POOL_AQUECIMENTO) e as devolve ao pool, para que
+    as primeiras requisições não paguem o custo de conectar.
+    """
+    quantidade = config.DB_POOL_AQUECIMENTO if quantidade is None else quantidade
+    conexoes = []
+    try:
+        for _ in range(min(quantidade, config.DB_POOL_SIZE)):
+            conexao = engine.connect()
+            conexoes.append(conexao)
+            conexao.execute(text("SELECT 1"))
+    finally:
+        for conexao in conexoes:
+            conexao.close()
+
+async def aquecer_pool_async(quantidade: int = None):
+    """
+    Versão de aquecer_pool() para o engine assíncrono.
+    """
+    quantidade = config.DB_POOL_AQUECIMENTO if quantidade is None else quantidade
+    conexoes = []
+    try:
+        for _ in range(min(quantidade, config.DB_POOL_SIZE)):
+            conexao = await async_engine.connect()
+            conexoes.append(conexao)
+            await conexao.execute(text("SELECT 1"))
+    finally:
+        for conexao in conexoes:
+            await conexao.close()
+
+async def encerrar_banco():
+    """
+    Fecha as conexões dos pools (no shutdown da aplicação).
+    """
+    global engine, async_engine
+    if async_engine is not None:
+        for replica in async_replicas:
+            await replica.dispose()
+        async_replicas.clear()
+        await async_engine.dispose()
+        async_engine = None
+    if engine is not None:
+        for replica in replicas:
+            replica.dispose()
+        replicas.clear()
+        engine.dispose()
+        engine = None
+
+def _descartar_pool_herdado():
+    # Processo filho (fork de workers do gunicorn/uvicorn): as conexões do pool herdado
+    # pertencem ao processo pai. close=False abandona o pool sem fechar os sockets do pai;
+    # o filho abre as próprias conexões sob demanda
+    for herdado in [engine, *replicas]:
+        if herdado is not None:
+            herdado.dispose(close=False)
+    for herdado in [async_engine, *async_replicas]:
+        if herdado is not None:
+            herdado.sync_engine.dispose(close=False)
 
-# Sessão para interagir com o banco de dados
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_descartar_pool_herdado)
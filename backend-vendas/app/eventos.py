@@ -0,0 +1,241 @@
+"""
+Eventos das escritas para as telas ao vivo (GET /eventos/stream, Server-Sent Events).
+
+As escritas registram os eventos na sessão com publicar(); eles só saem depois do commit
+e são descartados num rollback. Com EVENTOS_BACKEND=postgres, o commit leva junto um
+NOTIFY por evento no canal `eventos`: o Postgres entrega as notificações só após o commit
+e, a todos os ouvintes, na ordem dos commits. Cada worker mantém uma conexão em LISTEN e
+repassa o que recebe aos próprios clientes. Com EVENTOS_BACKEND=memoria (um único worker),
+o commit entrega os eventos direto ao distribuidor do processo.
+
+Cada worker guarda os últimos EVENTOS_HISTORICO eventos, na mesma ordem em todos os
+workers. Quem reconecta com Last-Event-ID recebe o que perdeu; se o id já saiu do
+histórico (ou o worker perdeu notificações), recebe o evento `ressincronizar` e deve
+recarregar as telas. Os ids são opacos: servem para a retomada, não para ordenar.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import uuid
+from collections import deque
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Text, bindparam, event, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.config import (
+    DATABASE_URL,
+    EVENTOS_BACKEND,
+    EVENTOS_FILA_MAXIMA,
+    EVENTOS_HISTORICO,
+    EVENTOS_KEEPALIVE,
+)
+
+logger = logging.getLogger(__name__)
+
+CANAL = "eventos"
+# Segundos entre tentativas de reconectar o LISTEN
+PAUSA_RECONEXAO = 5.0
+# Sugestão ao navegador (EventSource) de espera antes de reconectar, em milissegundos
+RETRY_MS = 3000
+
+# Um NOTIFY por evento ("<id> <tipo> <dados>"), todos no mesmo comando; o id é o da
+# transação mais a posição do evento nela, igual em todos os workers
+_SQL_NOTIFICAR = text(
+    f"SELECT pg_notify('{CANAL}', pg_current_xact_id()::text || '-' || e.n || ' ' || e.evento) "
+    "FROM unnest(:eventos) WITH ORDINALITY AS e(evento, n) ORDER BY e.n"
+).bindparams(bindparam("eventos", type_=ARRAY(Text)))
+
+def _json_padrao(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+def publicar(db, tipo: str, dados: dict):
+    """
+    Registra um evento na transação corrente da sessão (Session ou AsyncSession); ele é
+    enviado no commit e descartado num rollback.
+    """
+    evento = f"{tipo} {json.dumps(dados, separators=(',', ':'), default=_json_padrao)}"
+    db.info.setdefault("eventos", []).append(evento)
+
+def formatar(evento_id: str, tipo: str, dados: str) -> str:
+    return f"id: {evento_id}\nevent: {tipo}\ndata: {dados}\n\n"
+
+class Distribuidor:
+    """
+    Repassa os eventos às conexões abertas do processo e guarda o histórico para a
+    retomada. Todos os métodos rodam no event loop (de outras threads, via entregar_lote).
+    """
+
+    def __init__(self, historico: int, fila_maxima: int):
+        self.fila_maxima = fila_maxima
+        self.loop = None
+        self._historico = deque(maxlen=historico)
+        # id do evento -> posição no histórico (contador do processo)
+        self._posicoes = {}
+        self._contador = itertools.count(1)
+        self._assinantes = set()
+        # Ids do modo memória: o prefixo do processo evita confundir ids de antes de um restart
+        self._instancia = uuid.uuid4().hex[:8]
+        self._lotes = itertools.count(1)
+
+    def entregar(self, evento_id: str, evento: str):
+        tipo, _, dados = evento.partition(" ")
+        mensagem = formatar(evento_id, tipo, dados)
+        posicao = next(self._contador)
+        if len(self._historico) == self._historico.maxlen:
+            self._posicoes.pop(self._historico[0][1], None)
+        self._historico.append((posicao, evento_id, mensagem))
+        self._posicoes[evento_id] = posicao
+        for fila in list(self._assinantes):
+            self._enfileirar(fila, mensagem)
+
+    def entregar_lote(self, eventos: list):
+        """
+        Entrega os eventos de uma transação no modo memória. Pode ser chamado de qualquer
+        thread (as rotas síncronas rodam no threadpool).
+        """
+        if self.loop is None or self.loop.is_closed():
+            return
+        lote = next(self._lotes)
+        for n, evento in enumerate(eventos, start=1):
+            self.loop.call_soon_threadsafe(self.entregar, f"{self._instancia}.{lote}-{n}", evento)
+
+    def ressincronizar(self):
+        """
+        Houve eventos que este processo não viu: o histórico deixa de valer para a retomada
+        e os clientes conectados recarregam as telas.
+        """
+        self._historico.clear()
+        self._posicoes.clear()
+        for fila in list(self._assinantes):
+            self._enfileirar(fila, formatar("", "ressincronizar", "{}"))
+
+    def _enfileirar(self, fila: asyncio.Queue, mensagem: str):
+        if fila.qsize() >= self.fila_maxima:
+            # Cliente lento: a conexão é encerrada e ele retoma do histórico ao reconectar
+            self._assinantes.discard(fila)
+            while not fila.empty():
+                fila.get_nowait()
+            fila.put_nowait(None)
+            return
+        fila.put_nowait(mensagem)
+
+    def assinar(self, ultimo_id: Optional[str]) -> asyncio.Queue:
+        """
+        Nova conexão: a fila já vem com os eventos posteriores a `ultimo_id` (ou com
+        `ressincronizar`, se ele não está mais no histórico).
+        """
+        fila = asyncio.Queue()
+        if ultimo_id:
+            posicao = self._posicoes.get(ultimo_id)
+            if posicao is None:
+                fila.put_nowait(formatar("", "ressincronizar", "{}"))
+            else:
+                for seguinte, _, mensagem in self._historico:
+                    if seguinte > posicao:
+                        fila.put_nowait(mensagem)
+        self._assinantes.add(fila)
+        return fila
+
+    def cancelar(self, fila: asyncio.Queue):
+        self._assinantes.discard(fila)
+
+distribuidor = Distribuidor(EVENTOS_HISTORICO, EVENTOS_FILA_MAXIMA)
+
+@event.listens_for(Session, "before_commit")
+def _notificar_antes_do_commit(session):
+    # NOTIFY dentro da transação: o Postgres só entrega se o commit acontecer
+    if EVENTOS_BACKEND == "postgres" and session.info.get("eventos"):
+        session.execute(_SQL_NOTIFICAR, {"eventos": session.info.pop("eventos")})
+
+@event.listens_for(Session, "after_commit")
+def _entregar_apos_commit(session):
+    eventos = session.info.pop("eventos", None)
+    if eventos:
+        distribuidor.entregar_lote(eventos)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_apos_rollback(session):
+    session.info.pop("eventos", None)
+
+def _ao_notificar(conexao, pid, canal, payload):
+    evento_id, _, evento = payload.partition(" ")
+    distribuidor.entregar(evento_id, evento)
+
+async def _ouvir():
+    """
+    Mantém a conexão em LISTEN, reconectando se ela cair. Notificações enviadas enquanto
+    não havia conexão se perdem: ao reconectar, os clientes são ressincronizados.
+    """
+    import asyncpg
+
+    dsn = make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+    primeira = True
+    while True:
+        try:
+            conexao = await asyncpg.connect(dsn)
+        except (OSError, asyncpg.PostgresError) as erro:
+            logger.warning("LISTEN de eventos indisponível, nova tentativa em %ss: %s", PAUSA_RECONEXAO, erro)
+            await asyncio.sleep(PAUSA_RECONEXAO)
+            continue
+        try:
+            await conexao.add_listener(CANAL, _ao_notificar)
+            if not primeira:
+                distribuidor.ressincronizar()
+            primeira = False
+            # Verifica a conexão periodicamente: uma queda silenciosa da rede não avisa
+            while True:
+                await asyncio.sleep(EVENTOS_KEEPALIVE)
+                await conexao.execute("SELECT 1")
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as erro:
+            logger.warning("Conexão do LISTEN de eventos perdida: %s", erro)
+        finally:
+            conexao.terminate()
+
+_tarefa_ouvinte = None
+
+def iniciar():
+    """
+    No startup: associa o distribuidor ao event loop e, no modo postgres, abre o LISTEN.
+    """
+    global _tarefa_ouvinte
+    distribuidor.loop = asyncio.get_running_loop()
+    if EVENTOS_BACKEND == "postgres" and _tarefa_ouvinte is None:
+        _tarefa_ouvinte = asyncio.create_task(_ouvir())
+
+async def encerrar():
+    global _tarefa_ouvinte
+    if _tarefa_ouvinte is not None:
+        _tarefa_ouvinte.cancel()
+        try:
+            await _tarefa_ouvinte
+        except asyncio.CancelledError:
+            pass
+        _tarefa_ouvinte = None
+    distribuidor.loop = None
+
+async def transmitir(ultimo_id: Optional[str]):
+    """
+    Corpo da resposta text/event-stream de uma conexão: a retomada, se houver, e depois
+    os eventos ao vivo, com comentários de keep-alive nos intervalos sem eventos.
+    """
+    fila = distribuidor.assinar(ultimo_id)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            try:
+                mensagem = await asyncio.wait_for(fila.get(), timeout=EVENTOS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if mensagem is None:
+                break
+            yield mensagem
+    finally:
+        distribuidor.cancelar(fila)
@@ -1,87 +1,301 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import APIRouter, FastAPI, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
-from typing import List
+from contextlib import asynccontextmanager
+from typing import List, Optional
 from datetime import date
+import io
 import logging
+import tempfile
 
 # Importações de modelos e schemas
-from app import models, schemas
+from app import admissao, database, eventos, metricas, schemas
+from app.cache import condicional_catalogo
+from app.serializacao import resposta_lista
 # Importações de CRUD organizadas
 from app.crud import (
     cliente as crud_cliente,
     produto as crud_produto,
     venda as crud_venda,
-    venda_produto as crud_venda_produto
+    venda_produto as crud_venda_produto,
+    relatorio as crud_relatorio,
+    venda_diaria as crud_venda_diaria,
+    produto_venda_diaria as crud_produto_venda_diaria,
+    importacao as crud_importacao,
+    exportacao as crud_exportacao,
+    particoes as crud_particoes,
+    analise as crud_analise
 )
-from app.database import SessionLocal, engine
+from app.crud.busca import normalizar_busca
+from app.crud.campos import CamposInvalidos
+from app.crud.estoque import EstoqueInsuficiente
+from app.crud.paginacao import CursorInvalido, proximo_cursor
+from app.compressao import CompressaoMiddleware
+from app.config import (
+    ADMISSAO_ATIVA,
+    COMPRESSAO_MINIMO,
+    COMPRESSAO_NIVEL_BROTLI,
+    COMPRESSAO_NIVEL_GZIP,
+    DB_MODE,
+    IMPORTACAO_TAMANHO_MAXIMO,
+    PARTICOES_MESES_A_FRENTE,
+)
+from app.database import SessionLocal
 
-# Cria as tabelas no banco de dados
-models.Base.metadata.create_all(bind=engine)
+# A API não cria nem altera tabelas: um banco novo é criado por `python -m app.cli criar-banco`
+# e os existentes são atualizados pelas migrações (alembic upgrade head)
+router = APIRouter()
 
-app = FastAPI()
+# Startup: um único engine por processo, criado depois do fork dos workers, com as
+# conexões do pool já abertas; shutdown: fecha as conexões
+def preparar_particoes():
+    # Partições do mês corrente e dos próximos meses, já no cache do processo: as escritas
+    # do dia a dia não precisam criar partição
+    db = SessionLocal()
+    try:
+        hoje = date.today()
+        crud_particoes.garantir_particoes(db, hoje, crud_particoes.somar_meses(hoje, PARTICOES_MESES_A_FRENTE))
+    finally:
+        db.close()
 
-# Configuração do CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    database.iniciar_banco()
+    await run_in_threadpool(database.verificar_versao_postgres)
+    await run_in_threadpool(database.aquecer_pool)
+    await run_in_threadpool(preparar_particoes)
+    if DB_MODE == "async":
+        await database.aquecer_pool_async()
+    eventos.iniciar()
+    yield
+    await eventos.encerrar()
+    await database.encerrar_banco()
+
+# Falta de estoque em qualquer escrita de venda: a transação já foi desfeita e nada foi gravado
+def estoque_insuficiente(request: Request, exc: EstoqueInsuficiente):
+    return JSONResponse(status_code=409, content={"detail": str(exc), "produto_id": exc.produto_id})
 
-# Dependência para obter a sessão do banco de dados
-def get_db():
+# ?fields= com um campo que a listagem não tem
+def campos_invalidos(request: Request, exc: CamposInvalidos):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+# Escrita num mês arquivado (partição somente leitura); outros erros do banco seguem como 500
+def erro_banco(request: Request, exc: DBAPIError):
+    if crud_particoes.periodo_arquivado(exc):
+        return JSONResponse(status_code=409, content={"detail": "Período arquivado: as vendas deste mês são somente leitura"})
+    raise exc
+
+# Dependência para obter a sessão do banco de dados (primário)
+def get_db(request: Request, response: Response):
+    database.registrar_escrita(request, response)
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+# Dependência das rotas somente de leitura: réplica, se configurada (DATABASE_REPLICA_URLS),
+# ou o primário logo após uma escrita do mesmo cliente e quando a réplica está fora do ar
+def get_db_leitura(request: Request):
+    db = database.abrir_sessao_leitura(primario=database.escrita_recente(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
 # Configuração do logger
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Paginação por cursor: o cursor da próxima página vai no cabeçalho X-Next-Cursor,
+# mantendo o corpo das listagens compatível com quem usa skip/limit
+def listar_paginado(response: Response, listar, chave, limit: int, cursor: Optional[str]):
+    try:
+        itens = listar(cursor=cursor)
+    except CursorInvalido:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    next_cursor = proximo_cursor(itens, limit, chave)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return itens
+
+# Importação em CSV: o corpo da requisição é o próprio arquivo (Content-Type: text/csv),
+# recebido em streaming para um arquivo temporário (em memória até 8 MB, depois em disco),
+# até IMPORTACAO_TAMANHO_MAXIMO bytes
+async def importar_csv(request: Request, importar, separador: str, db: Session):
+    if len(separador) != 1:
+        raise HTTPException(status_code=400, detail="O separador deve ter um único caractere")
+    muito_grande = HTTPException(
+        status_code=413, detail=f"O arquivo deve ter no máximo {IMPORTACAO_TAMANHO_MAXIMO} bytes"
+    )
+    tamanho_declarado = request.headers.get("content-length", "")
+    if tamanho_declarado.isdigit() and int(tamanho_declarado) > IMPORTACAO_TAMANHO_MAXIMO:
+        raise muito_grande
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as arquivo:
+        recebidos = 0
+        async for parte in request.stream():
+            # Sem Content-Length (chunked) ou com um valor falso, conta o que chega
+            recebidos += len(parte)
+            if recebidos > IMPORTACAO_TAMANHO_MAXIMO:
+                raise muito_grande
+            arquivo.write(parte)
+        arquivo.seek(0)
+        texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+        try:
+            # Validação e COPY são bloqueantes: rodam no threadpool
+            return await run_in_threadpool(importar, db, texto, separador)
+        except crud_importacao.ArquivoInvalido as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+        except UnicodeDecodeError:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="O arquivo deve estar em UTF-8")
+
 # Rotas para Clientes
-@app.post("/clientes/", response_model=schemas.Cliente)
+@router.post("/clientes/", response_model=schemas.Cliente)
 def create_cliente(cliente: schemas.ClienteCreate, db: Session = Depends(get_db)):
     return crud_cliente.create_cliente(db=db, cliente=cliente)
 
-@app.get("/clientes/{cliente_id}", response_model=schemas.Cliente)
-def read_cliente(cliente_id: int, db: Session = Depends(get_db)):
+@router.post("/clientes/importar", response_model=schemas.ResultadoImportacao)
+async def importar_clientes(request: Request, separador: str = ",", db: Session = Depends(get_db)):
+    return await importar_csv(request, crud_importacao.importar_clientes, separador, db)
+
+# Busca para autocompletar (declarada antes de /clientes/{cliente_id})
+@router.get("/clientes/busca", response_model=List[schemas.Cliente])
+def buscar_clientes(q: str, limit: int = 10, db: Session = Depends(get_db_leitura)):
+    termo, limit = normalizar_busca(q, limit)
+    if not termo:
+        return []
+    return crud_cliente.buscar_clientes(db, termo=termo, limit=limit)
+
+@router.get("/clientes/{cliente_id}", response_model=schemas.Cliente)
+def read_cliente(cliente_id: int, db: Session = Depends(get_db_leitura)):
     db_cliente = crud_cliente.get_cliente(db, cliente_id=cliente_id)
     if not db_cliente:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     return db_cliente
 
-@app.get("/clientes/", response_model=List[schemas.Cliente])
-def read_clientes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud_cliente.get_clientes(db=db, skip=skip, limit=limit)
+@router.get("/clientes/", response_model=List[schemas.Cliente])
+def read_clientes(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db_leitura)
+):
+    colunas = crud_cliente.colunas_listagem(fields)
+    itens = listar_paginado(
+        response,
+        lambda cursor: crud_cliente.get_clientes(db=db, skip=skip, limit=limit, cursor=cursor, colunas=colunas),
+        crud_cliente.chave_cursor,
+        limit,
+        cursor
+    )
+    return resposta_lista(itens, response)
 
 # Rotas para Produtos
-@app.post("/produtos/", response_model=schemas.Produto)
+@router.post("/produtos/", response_model=schemas.Produto)
 def create_produto(produto: schemas.ProdutoCreate, db: Session = Depends(get_db)):
     return crud_produto.create_produto(db=db, produto=produto)
 
-@app.get("/produtos/{produto_id}", response_model=schemas.Produto)
-def read_produto(produto_id: int, db: Session = Depends(get_db)):
-    db_produto = crud_produto.get_produto(db, produto_id=produto_id)
+@router.post("/produtos/importar", response_model=schemas.ResultadoImportacao)
+async def importar_produtos(request: Request, separador: str = ",", db: Session = Depends(get_db)):
+    return await importar_csv(request, crud_importacao.importar_produtos, separador, db)
+
+# Busca para autocompletar (declarada antes de /produtos/{produto_id})
+@router.get("/produtos/busca", response_model=List[schemas.Produto])
+def buscar_produtos(q: str, limit: int = 10, db: Session = Depends(get_db_leitura)):
+    termo, limit = normalizar_busca(q, limit)
+    if not termo:
+        return []
+    return crud_produto.buscar_produtos(db, termo=termo, limit=limit)
+
+# Vários produtos numa só consulta: ?ids=1,2,3 (declarada antes de /produtos/{produto_id})
+@router.get("/produtos/batch", response_model=List[schemas.Produto])
+def read_produtos_lote(
+    request: Request,
+    response: Response,
+    ids: List[str] = Query(...),
+    db: Session = Depends(get_db_leitura)
+):
+    try:
+        ids = crud_produto.ler_ids_lote(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    versao = crud_produto.get_versao_catalogo(db)
+    nao_modificado = condicional_catalogo(request, response, versao)
+    if nao_modificado:
+        return nao_modificado
+    return resposta_lista(crud_produto.get_produtos_por_ids(db, ids, versao.versao), response)
+
+# Ranking de mais vendidos, lido do resumo diário por produto (declarado antes de /produtos/{produto_id})
+@router.get("/produtos/mais-vendidos", response_model=List[schemas.ProdutoMaisVendido])
+def read_produtos_mais_vendidos(
+    response: Response,
+    criterio: schemas.CriterioRanking = schemas.CriterioRanking.quantidade,
+    limit: int = 10,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: Session = Depends(get_db_leitura)
+):
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise HTTPException(status_code=400, detail="data_inicio deve ser anterior ou igual a data_fim")
+    linhas = crud_produto_venda_diaria.get_mais_vendidos(
+        db, criterio=criterio, limit=limit, data_inicio=data_inicio, data_fim=data_fim
+    )
+    return resposta_lista(linhas, response)
+
+# As leituras do catálogo respondem 304 quando o cliente já tem a versão atual (ETag)
+@router.get("/produtos/{produto_id}", response_model=schemas.Produto)
+def read_produto(produto_id: int, request: Request, response: Response, db: Session = Depends(get_db_leitura)):
+    # O produto (em geral do cache) é procurado antes: id inexistente é 404, não 304
+    versao = crud_produto.get_versao_catalogo(db)
+    db_produto = crud_produto.get_produto(db, produto_id=produto_id, versao=versao.versao)
     if not db_produto:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
+    nao_modificado = condicional_catalogo(request, response, versao)
+    if nao_modificado:
+        return nao_modificado
     return db_produto
 
-@app.get("/produtos/", response_model=List[schemas.Produto])
-def read_produtos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud_produto.get_produtos(db=db, skip=skip, limit=limit)
+@router.get("/produtos/", response_model=List[schemas.Produto])
+def read_produtos(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db_leitura)
+):
+    colunas = crud_produto.colunas_listagem(fields)
+    versao = crud_produto.get_versao_catalogo(db)
+    nao_modificado = condicional_catalogo(request, response, versao)
+    if nao_modificado:
+        return nao_modificado
+    itens = listar_paginado(
+        response,
+        lambda cursor: crud_produto.get_produtos(
+            db=db, skip=skip, limit=limit, cursor=cursor, colunas=colunas, versao=versao.versao
+        ),
+        crud_produto.chave_cursor,
+        limit,
+        cursor
+    )
+    return resposta_lista(itens, response)
 
-@app.put("/produtos/{produto_id}", response_model=schemas.Produto)
+@router.put("/produtos/{produto_id}", response_model=schemas.Produto)
 def update_produto(produto_id: int, produto: schemas.ProdutoUpdate, db: Session = Depends(get_db)):
     db_produto = crud_produto.update_produto(db, produto_id=produto_id, produto=produto)
     if not db_produto:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     return db_produto
 
-@app.delete("/produtos/{produto_id}", response_model=schemas.Produto)
+@router.delete("/produtos/{produto_id}", response_model=schemas.Produto)
 def delete_produto(produto_id: int, db: Session = Depends(get_db)):
     db_produto = crud_produto.delete_produto(db, produto_id=produto_id)
     if not db_produto:
@@ -89,61 +303,158 @@ def delete_produto(produto_id: int, db: Session = Depends(get_db)):
     return db_produto
 
 # Rotas para Vendas
-@app.post("/vendas/", response_model=schemas.Venda)
+@router.post("/vendas/", response_model=schemas.VendaWithProdutos)
 def create_venda(venda: schemas.VendaCreate, db: Session = Depends(get_db)):
     try:
         # Garante que a data é hoje se não for fornecida
         if not venda.data_venda:
             venda.data_venda = date.today()
             
-        db_venda = models.Venda(
-            cliente_id=venda.cliente_id,
-            data_venda=venda.data_venda,
-            total=venda.total
-        )
+        # Venda e itens numa única transação: ou grava tudo, ou nada
+        db_venda = crud_venda.create_venda(db, venda=venda, commit=False)
         
-        db.add(db_venda)
+        crud_venda_diaria.registrar_variacao(
+            db,
+            db_venda["data_venda"],
+            vendas=1,
+            receita=db_venda["total"] or 0.0,
+            itens=sum(item["quantidade"] for item in db_venda["produtos"])
+        )
+        eventos.publicar(db, "venda_criada", {
+            "id": db_venda["id"],
+            "cliente_id": db_venda["cliente_id"],
+            "data_venda": db_venda["data_venda"],
+            "total": db_venda["total"],
+            "itens": len(db_venda["produtos"]),
+        })
+        # A resposta já veio dos INSERTs (RETURNING): nada a recarregar após o commit
         db.commit()
-        db.refresh(db_venda)
         return db_venda
+    except EstoqueInsuficiente:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
+        if crud_particoes.periodo_arquivado(e):
+            raise
         logger.error(f"Erro ao criar venda: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/vendas/{venda_id}", response_model=schemas.VendaWithProdutos)
-def read_venda(venda_id: int, db: Session = Depends(get_db)):
-    db_venda = crud_venda.get_venda(db, venda_id=venda_id)
+# Exportação em streaming (declarada antes de /vendas/{venda_id})
+@router.get("/vendas/export")
+def exportar_vendas(
+    request: Request,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    itens: bool = False,
+    formato: schemas.FormatoExportacao = schemas.FormatoExportacao.csv
+):
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise HTTPException(status_code=400, detail="data_inicio deve ser anterior ou igual a data_fim")
+    formatador = crud_exportacao.formatador(formato, itens)
+    primario = database.escrita_recente(request)
+
+    def gerar():
+        yield formatador.cabecalho()
+        # Sessão própria: a de uma dependência é fechada antes de o streaming começar
+        db = database.abrir_sessao_leitura(primario=primario)
+        try:
+            resultado = db.execute(crud_exportacao.stmt_exportar_vendas(data_inicio, data_fim, itens))
+            for linhas in resultado.partitions():
+                yield formatador.lote(linhas)
+            yield formatador.fim()
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        gerar(),
+        media_type=formatador.media_type,
+        headers={"Content-Disposition": f'attachment; filename="vendas.{formatador.extensao}"'}
+    )
+
+# Com detalhar_itens=true, cada item traz nome e preço do produto, na mesma consulta
+@router.get(
+    "/vendas/{venda_id}",
+    response_model=None,
+    responses={200: {"model": schemas.VendaComItens}},
+)
+def read_venda(venda_id: int, detalhar_itens: bool = False, db: Session = Depends(get_db_leitura)):
+    # Somente leitura: o total já é mantido pelas escritas nos itens
+    if detalhar_itens:
+        db_venda = crud_venda.get_venda_detalhada(db, venda_id=venda_id)
+        modelo = schemas.VendaDetalhada
+    else:
+        db_venda = crud_venda.get_venda(db, venda_id=venda_id, carregar_produtos=True)
+        modelo = schemas.VendaWithProdutos
     if not db_venda:
         raise HTTPException(status_code=404, detail="Venda não encontrada")
-    
-    # Atualiza o total
-    db_venda.calcular_total()
-    db.commit()
-    db.refresh(db_venda)
-    
-    return db_venda
+    return modelo.model_validate(db_venda)
 
-@app.get("/vendas/", response_model=List[schemas.Venda])
-def read_vendas(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud_venda.get_vendas(db=db, skip=skip, limit=limit)
+@router.get("/vendas/", response_model=List[schemas.Venda])
+def read_vendas(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db_leitura)
+):
+    colunas = crud_venda.colunas_listagem(fields)
+    itens = listar_paginado(
+        response,
+        lambda cursor: crud_venda.get_vendas(db=db, skip=skip, limit=limit, cursor=cursor, colunas=colunas),
+        crud_venda.chave_cursor,
+        limit,
+        cursor
+    )
+    return resposta_lista(itens, response)
 
-@app.put("/vendas/{venda_id}", response_model=schemas.Venda)
+@router.put("/vendas/{venda_id}", response_model=schemas.Venda)
 def update_venda(venda_id: int, venda: schemas.VendaUpdate, db: Session = Depends(get_db)):
-    db_venda = crud_venda.update_venda(db, venda_id=venda_id, venda=venda)
+    # O UPDATE devolve a venda atualizada junto com a data e o total anteriores
+    db_venda = crud_venda.update_venda(db, venda_id=venda_id, venda=venda, commit=False)
     if not db_venda:
         raise HTTPException(status_code=404, detail="Venda não encontrada")
+
+    # Mantém o resumo diário: troca de data move a venda inteira de um dia para outro
+    total = db_venda.total or 0.0
+    total_anterior = db_venda.total_anterior or 0.0
+    if db_venda.data_venda != db_venda.data_anterior:
+        itens = db_venda.quantidade_itens
+        crud_venda_diaria.registrar_variacao(
+            db, db_venda.data_anterior, vendas=-1, receita=-total_anterior, itens=-itens
+        )
+        crud_venda_diaria.registrar_variacao(
+            db, db_venda.data_venda, vendas=1, receita=total, itens=itens
+        )
+    else:
+        crud_venda_diaria.registrar_variacao(
+            db, db_venda.data_venda, receita=total - total_anterior
+        )
+    eventos.publicar(db, "venda_alterada", {
+        "id": db_venda.id,
+        "cliente_id": db_venda.cliente_id,
+        "data_venda": db_venda.data_venda,
+        "total": db_venda.total,
+    })
+    db.commit()
     return db_venda
 
-@app.delete("/vendas/{venda_id}", response_model=schemas.Venda)
+@router.delete("/vendas/{venda_id}", response_model=schemas.Venda)
 def delete_venda(venda_id: int, db: Session = Depends(get_db)):
-    db_venda = crud_venda.delete_venda(db, venda_id=venda_id)
+    db_venda = crud_venda.delete_venda(db, venda_id=venda_id, commit=False)
     if not db_venda:
         raise HTTPException(status_code=404, detail="Venda não encontrada")
+
+    crud_venda_diaria.registrar_variacao(
+        db, db_venda.data_venda, vendas=-1, receita=-(db_venda.total or 0.0), itens=-db_venda.quantidade_itens
+    )
+    eventos.publicar(db, "venda_excluida", {"id": db_venda.id, "data_venda": db_venda.data_venda})
+    db.commit()
     return db_venda
 
 # Rotas para VendaProduto
-@app.post("/venda_produto/", response_model=schemas.VendaProduto)
+@router.post("/venda_produto/", response_model=schemas.VendaProduto)
 def create_venda_produto(
     venda_produto: schemas.VendaProdutoCreate, 
     db: Session = Depends(get_db)
@@ -155,72 +466,263 @@ def create_venda_produto(
             raise HTTPException(status_code=404, detail="Venda não encontrada")
         
         # Cria a relação
-        db_venda_produto = crud_venda_produto.create_venda_produto(db=db, venda_produto=venda_produto)
+        db_venda_produto = crud_venda_produto.create_venda_produto(
+            db=db, venda_produto=venda_produto, commit=False
+        )
         
-        # Atualiza o total da venda
-        venda.calcular_total()
+        # Atualiza o total da venda e o resumo diário na mesma transação
+        totais = crud_venda.recalcular_total(db, venda_id=venda.id, data_venda=venda.data_venda)
+        crud_venda_diaria.registrar_variacao(
+            db,
+            venda.data_venda,
+            receita=totais.total - (totais.total_anterior or 0.0),
+            itens=db_venda_produto.quantidade
+        )
+        crud_venda_produto.publicar_item(db, venda.id, db_venda_produto.produto_id, db_venda_produto.quantidade, totais.total)
         db.commit()
         
         return db_venda_produto
+    except EstoqueInsuficiente:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
+        if crud_particoes.periodo_arquivado(e):
+            raise
         logger.error(f"Erro ao adicionar produto à venda: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/vendas/{venda_id}/produtos/", response_model=List[schemas.VendaProduto])
-def read_venda_produtos(venda_id: int, db: Session = Depends(get_db)):
+@router.get("/vendas/{venda_id}/produtos/", response_model=List[schemas.VendaProduto])
+def read_venda_produtos(venda_id: int, db: Session = Depends(get_db_leitura)):
     return crud_venda_produto.get_venda_produtos(db, venda_id=venda_id)
 
-@app.get("/venda_produto/{venda_id}/{produto_id}", response_model=schemas.VendaProduto)
+@router.get("/venda_produto/{venda_id}/{produto_id}", response_model=schemas.VendaProduto)
 def read_venda_produto(
     venda_id: int, 
     produto_id: int, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     db_venda_produto = crud_venda_produto.get_venda_produto(db, venda_id=venda_id, produto_id=produto_id)
     if not db_venda_produto:
         raise HTTPException(status_code=404, detail="Relação Venda-Produto não encontrada")
     return db_venda_produto
 
-@app.put("/venda_produto/{venda_id}/{produto_id}", response_model=schemas.VendaProduto)
+@router.put("/venda_produto/{venda_id}/{produto_id}", response_model=schemas.VendaProduto)
 def update_venda_produto(
     venda_id: int, 
     produto_id: int, 
     venda_produto: schemas.VendaProdutoUpdate, 
     db: Session = Depends(get_db)
 ):
+    # Item trocado de venda: a venda nova precisa existir
+    if venda_produto.venda_id != venda_id and not crud_venda.get_venda(db, venda_id=venda_produto.venda_id):
+        raise HTTPException(status_code=404, detail="Venda não encontrada")
+
+    # O UPDATE devolve o item atualizado junto com a quantidade e a data anteriores
     db_venda_produto = crud_venda_produto.update_venda_produto(
         db, 
         venda_id=venda_id, 
         produto_id=produto_id, 
-        venda_produto=venda_produto
+        venda_produto=venda_produto,
+        commit=False
     )
-    
     if not db_venda_produto:
         raise HTTPException(status_code=404, detail="Relação Venda-Produto não encontrada")
     
-    # Atualiza o total da venda
-    venda = crud_venda.get_venda(db, venda_id=venda_id)
-    if venda:
-        venda.calcular_total()
-        db.commit()
+    # Atualiza o total da venda e o resumo diário na mesma transação
+    itens_origem, itens_destino = crud_venda_produto.variacao_itens_vendas(db_venda_produto, venda_id)
+    totais = crud_venda.recalcular_total(db, venda_id=venda_id, data_venda=db_venda_produto.data_anterior)
+    if totais:
+        crud_venda_diaria.registrar_variacao(
+            db,
+            totais.data_venda,
+            receita=totais.total - (totais.total_anterior or 0.0),
+            itens=itens_origem
+        )
+    # Se o item foi para outra venda, o total e o dia dela também mudam
+    totais_destino = None
+    if db_venda_produto.venda_id != venda_id:
+        totais_destino = crud_venda.recalcular_total(
+            db, venda_id=db_venda_produto.venda_id, data_venda=db_venda_produto.data_venda
+        )
+        if totais_destino:
+            crud_venda_diaria.registrar_variacao(
+                db,
+                totais_destino.data_venda,
+                receita=totais_destino.total - (totais_destino.total_anterior or 0.0),
+                itens=itens_destino
+            )
+    crud_venda_produto.publicar_alteracao_item(db, venda_id, produto_id, db_venda_produto, totais, totais_destino)
+    db.commit()
     
     return db_venda_produto
 
-@app.delete("/venda_produto/{venda_id}/{produto_id}", response_model=schemas.VendaProduto)
+@router.delete("/venda_produto/{venda_id}/{produto_id}", response_model=schemas.VendaProduto)
 def delete_venda_produto(
     venda_id: int, 
     produto_id: int, 
     db: Session = Depends(get_db)
 ):
-    db_venda_produto = crud_venda_produto.delete_venda_produto(db, venda_id=venda_id, produto_id=produto_id)
+    db_venda_produto = crud_venda_produto.delete_venda_produto(
+        db, venda_id=venda_id, produto_id=produto_id, commit=False
+    )
     if not db_venda_produto:
         raise HTTPException(status_code=404, detail="Relação Venda-Produto não encontrada")
     
-    # Atualiza o total da venda
-    venda = crud_venda.get_venda(db, venda_id=venda_id)
-    if venda:
-        venda.calcular_total()
-        db.commit()
+    # Atualiza o total da venda e o resumo diário na mesma transação
+    totais = crud_venda.recalcular_total(db, venda_id=venda_id, data_venda=db_venda_produto.data_venda)
+    if totais:
+        crud_venda_diaria.registrar_variacao(
+            db,
+            totais.data_venda,
+            receita=totais.total - (totais.total_anterior or 0.0),
+            itens=-db_venda_produto.quantidade
+        )
+    crud_venda_produto.publicar_item(db, venda_id, produto_id, 0, totais.total if totais else None)
+    db.commit()
     
-    return db_venda_produto
\ No newline at end of file
+    return db_venda_produto
+
+# Rotas para Relatórios
+@router.get("/relatorios/vendas", response_model=schemas.RelatorioVendas)
+def read_relatorio_vendas(
+    agrupamento: schemas.Agrupamento = schemas.Agrupamento.dia,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: Session = Depends(get_db_leitura)
+):
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise HTTPException(status_code=400, detail="data_inicio deve ser anterior ou igual a data_fim")
+    return crud_relatorio.relatorio_vendas(
+        db,
+        agrupamento=agrupamento,
+        data_inicio=data_inicio,
+        data_fim=data_fim
+    )
+
+# Rotas para Dashboard
+@router.get("/dashboard/resumo", response_model=schemas.ResumoDashboard)
+def read_dashboard_resumo(
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: Session = Depends(get_db_leitura)
+):
+    return crud_venda_diaria.get_resumo(db, data_inicio=data_inicio, data_fim=data_fim)
+
+# Rotas para Análises (NumPy sobre as vendas do período; resultados em cache por
+# ANALISE_CACHE_TTL segundos)
+def validar_periodo(data_inicio: Optional[date], data_fim: Optional[date]):
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise HTTPException(status_code=400, detail="data_inicio deve ser anterior ou igual a data_fim")
+
+@router.get("/analytics/medias-moveis", response_model=schemas.MediasMoveis)
+def read_medias_moveis(
+    janela: int = 7,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: Session = Depends(get_db_leitura)
+):
+    validar_periodo(data_inicio, data_fim)
+    return ORJSONResponse(crud_analise.get_medias_moveis(db, data_inicio, data_fim, janela))
+
+@router.get("/analytics/crescimento", response_model=schemas.Crescimento)
+def read_crescimento(
+    agrupamento: schemas.PeriodoAnalise = schemas.PeriodoAnalise.mes,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: Session = Depends(get_db_leitura)
+):
+    validar_periodo(data_inicio, data_fim)
+    return ORJSONResponse(crud_analise.get_crescimento(db, data_inicio, data_fim, agrupamento))
+
+@router.get("/analytics/rfm", response_model=schemas.AnaliseRFM)
+def read_rfm(
+    limit: int = 100,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: Session = Depends(get_db_leitura)
+):
+    validar_periodo(data_inicio, data_fim)
+    return ORJSONResponse(crud_analise.get_rfm(db, data_inicio, data_fim, limit))
+
+@router.get("/analytics/previsao", response_model=schemas.PrevisaoReceita)
+def read_previsao(
+    dias: int = 30,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: Session = Depends(get_db_leitura)
+):
+    validar_periodo(data_inicio, data_fim)
+    try:
+        previsao = crud_analise.get_previsao(db, data_inicio, data_fim, dias)
+    except ValueError as erro:
+        raise HTTPException(status_code=400, detail=str(erro))
+    return ORJSONResponse(previsao)
+
+# Eventos ao vivo (Server-Sent Events): vendas criadas, alteradas e excluídas, itens e
+# estoque. Ao reconectar, o EventSource envia Last-Event-ID e recebe o que perdeu; quem
+# guarda o id entre sessões pode passá-lo em ?ultimo_evento=
+@router.get("/eventos/stream")
+async def stream_eventos(
+    ultimo_evento: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    return StreamingResponse(
+        eventos.transmitir(last_event_id or ultimo_evento),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Métricas no formato do Prometheus
+@router.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    return PlainTextResponse(metricas.exportar() + admissao.exportar(), media_type="text/plain; version=0.0.4")
+
+def create_app() -> FastAPI:
+    """
+    Monta a aplicação. Com vários workers (uvicorn --workers, gunicorn), cada processo
+    cria a sua e abre o próprio pool no startup.
+    """
+    app = FastAPI(lifespan=ciclo_de_vida)
+
+    # Controle de admissão (filas de escrita e de leitura na frente do pool de conexões).
+    # Registrado antes do CORS para ficar dentro dele: o 503 também leva os cabeçalhos CORS
+    if ADMISSAO_ATIVA:
+        app.add_middleware(admissao.AdmissaoMiddleware)
+
+    # Configuração do CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:5173"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Retry-After", database.CABECALHO_LEITURA_PRIMARIO],
+    )
+
+    # Latência, consultas SQL e detecção de N+1 por rota (expostas em /metrics)
+    app.add_middleware(metricas.MetricasMiddleware)
+
+    # Compressão negociada (brotli ou gzip) das respostas acima de COMPRESSAO_MINIMO bytes
+    app.add_middleware(
+        CompressaoMiddleware,
+        minimo=COMPRESSAO_MINIMO,
+        nivel_gzip=COMPRESSAO_NIVEL_GZIP,
+        nivel_brotli=COMPRESSAO_NIVEL_BROTLI,
+    )
+
+    app.add_exception_handler(EstoqueInsuficiente, estoque_insuficiente)
+    app.add_exception_handler(CamposInvalidos, campos_invalidos)
+    app.add_exception_handler(DBAPIError, erro_banco)
+
+    # Modo assíncrono (DB_MODE=async): as rotas async são registradas antes das síncronas e
+    # atendem os mesmos caminhos; rotas sem versão async continuam no modo síncrono.
+    # Ficam fora do OpenAPI porque o contrato é idêntico ao das rotas documentadas acima.
+    if DB_MODE == "async":
+        from app.rotas_async import router as rotas_async
+        app.include_router(rotas_async, include_in_schema=False)
+    app.include_router(router)
+    return app
+
+# uvicorn app.main:app (ou uvicorn --factory app.main:create_app)
+app = create_app()
@@ -0,0 +1,198 @@
+"""
+Instrumentação por requisição: latência, número de consultas SQL, tempo total no banco,
+consulta mais lenta e detecção de N+1 (a mesma consulta repetida muitas vezes).
+
+Os dados são acumulados por rota e expostos em /metrics no formato texto do Prometheus.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.config import METRICAS_LIMITE_REPETICOES
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class ConsultasDaRequisicao:
+    """Consultas executadas durante uma requisição (compartilhado com o threadpool via contextvar)"""
+
+    def __init__(self):
+        self.quantidade = 0
+        self.tempo = 0.0
+        self.mais_lenta = 0.0
+        self.sql_mais_lenta = ""
+        self.formatos = Counter()
+        self.repetidas = set()
+
+    def registrar(self, sql: str, duracao: float):
+        self.quantidade += 1
+        self.tempo += duracao
+        if duracao > self.mais_lenta:
+            self.mais_lenta = duracao
+            self.sql_mais_lenta = sql
+        # O SQL já chega parametrizado, então o texto identifica o formato da consulta
+        self.formatos[sql] += 1
+        if self.formatos[sql] > METRICAS_LIMITE_REPETICOES:
+            self.repetidas.add(sql)
+
+_consultas_atuais: ContextVar[Optional[ConsultasDaRequisicao]] = ContextVar("consultas_atuais", default=None)
+
+class _MetricasRota:
+    def __init__(self):
+        self.requisicoes = Counter()  # por status
+        self.buckets = [0] * len(BUCKETS_LATENCIA)
+        self.latencia_total = 0.0
+        self.consultas = 0
+        self.tempo_banco = 0.0
+        self.mais_lenta = 0.0
+        self.sql_mais_lenta = ""
+        self.repeticoes = 0
+
+_lock = threading.Lock()
+_rotas = defaultdict(_MetricasRota)
+
+# Uma conexão executa um comando por vez: basta um início por conexão. Um comando que falha
+# não dispara after_cursor_execute, e o valor que sobra é sobrescrito pelo próximo
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    conn.info["inicio_consulta"] = time.perf_counter()
+
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info.pop("inicio_consulta", None)
+    if inicio is None:
+        return
+    consultas = _consultas_atuais.get()
+    if consultas is not None:
+        consultas.registrar(statement, time.perf_counter() - inicio)
+
+def instrumentar_engine(engine):
+    """
+    Registra os eventos de cursor no engine (para AsyncEngine, passe engine.sync_engine).
+    """
+    event.listen(engine, "before_cursor_execute", _antes_da_consulta)
+    event.listen(engine, "after_cursor_execute", _depois_da_consulta)
+
+def _registrar_requisicao(metodo: str, rota: str, status: int, duracao: float, consultas: ConsultasDaRequisicao):
+    with _lock:
+        m = _rotas[(metodo, rota)]
+        m.requisicoes[status] += 1
+        m.latencia_total += duracao
+        for i, limite in enumerate(BUCKETS_LATENCIA):
+            if duracao <= limite:
+                m.buckets[i] += 1
+        m.consultas += consultas.quantidade
+        m.tempo_banco += consultas.tempo
+        if consultas.mais_lenta > m.mais_lenta:
+            m.mais_lenta = consultas.mais_lenta
+            m.sql_mais_lenta = consultas.sql_mais_lenta
+        m.repeticoes += len(consultas.repetidas)
+
+    for sql in consultas.repetidas:
+        logger.warning(
+            "Possível N+1 em %s %s: consulta repetida %d vezes: %s",
+            metodo, rota, consultas.formatos[sql], " ".join(sql.split())[:200]
+        )
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI que mede cada requisição HTTP e as consultas feitas durante ela.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        consultas = ConsultasDaRequisicao()
+        token = _consultas_atuais.set(consultas)
+        status = 500
+        inicio = time.perf_counter()
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            _consultas_atuais.reset(token)
+            # Usa o caminho da rota (ex.: /vendas/{venda_id}) para não explodir a cardinalidade
+            rota = getattr(scope.get("route"), "path", "<sem rota>")
+            _registrar_requisicao(scope["method"], rota, status, duracao, consultas)
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", " ").replace('"', '\\"')
+
+def exportar() -> str:
+    """
+    Gera as métricas no formato texto do Prometheus (version 0.0.4).
+    """
+    linhas = [
+        "# HELP http_requisicoes_total Requisições HTTP atendidas.",
+        "# TYPE http_requisicoes_total counter",
+    ]
+    with _lock:
+        rotas = sorted(_rotas.items())
+        for (metodo, rota), m in rotas:
+            for status, quantidade in sorted(m.requisicoes.items()):
+                linhas.append(
+                    f'http_requisicoes_total{{metodo="{metodo}",rota="{rota}",status="{status}"}} {quantidade}'
+                )
+
+        linhas += [
+            "# HELP http_requisicao_duracao_segundos Latência das requisições HTTP.",
+            "# TYPE http_requisicao_duracao_segundos histogram",
+        ]
+        for (metodo, rota), m in rotas:
+            rotulos = f'metodo="{metodo}",rota="{rota}"'
+            total = sum(m.requisicoes.values())
+            for limite, quantidade in zip(BUCKETS_LATENCIA, m.buckets):
+                linhas.append(f'http_requisicao_duracao_segundos_bucket{{{rotulos},le="{limite}"}} {quantidade}')
+            linhas.append(f'http_requisicao_duracao_segundos_bucket{{{rotulos},le="+Inf"}} {total}')
+            linhas.append(f"http_requisicao_duracao_segundos_sum{{{rotulos}}} {m.latencia_total:.6f}")
+            linhas.append(f"http_requisicao_duracao_segundos_count{{{rotulos}}} {total}")
+
+        linhas += [
+            "# HELP db_consultas_total Consultas SQL executadas, por rota.",
+            "# TYPE db_consultas_total counter",
+        ]
+        for (metodo, rota), m in rotas:
+            linhas.append(f'db_consultas_total{{metodo="{metodo}",rota="{rota}"}} {m.consultas}')
+
+        linhas += [
+            "# HELP db_tempo_segundos_total Tempo gasto em consultas SQL, por rota.",
+            "# TYPE db_tempo_segundos_total counter",
+        ]
+        for (metodo, rota), m in rotas:
+            linhas.append(f'db_tempo_segundos_total{{metodo="{metodo}",rota="{rota}"}} {m.tempo_banco:.6f}')
+
+        linhas += [
+            "# HELP db_consulta_mais_lenta_segundos Duração da consulta SQL mais lenta já vista na rota.",
+            "# TYPE db_consulta_mais_lenta_segundos gauge",
+        ]
+        for (metodo, rota), m in rotas:
+            if m.sql_mais_lenta:
+                sql = _escapar(" ".join(m.sql_mais_lenta.split())[:200])
+                linhas.append(
+                    f'db_consulta_mais_lenta_segundos{{metodo="{metodo}",rota="{rota}",sql="{sql}"}} {m.mais_lenta:.6f}'
+                )
+
+        linhas += [
+            f"# HELP db_consultas_repetidas_total Requisições com uma consulta repetida mais de {METRICAS_LIMITE_REPETICOES} vezes (possível N+1).",
+            "# TYPE db_consultas_repetidas_total counter",
+        ]
+        for (metodo, rota), m in rotas:
+            linhas.append(f'db_consultas_repetidas_total{{metodo="{metodo}",rota="{rota}"}} {m.repeticoes}')
+
+    return "\n".join(linhas) + "\n"
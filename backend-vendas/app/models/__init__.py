@@ -1,8 +1,40 @@
+from sqlalchemy import DDL, event, text
+from app import config
 from app.database import Base  
 from .cliente import Cliente
 from .estoque import Produto
 from .venda import Venda
 from .venda_produto import VendaProduto
+from .venda_diaria import VendaDiaria
+from .produto_venda_diaria import ProdutoVendaDiaria
+from .catalogo import CatalogoVersao, FUNCAO_ALTERACAO_CATALOGO, GATILHOS_CATALOGO, VERSAO_INICIAL
+from .particoes import FUNCAO_CRIAR_PARTICOES, FUNCAO_REJEITAR_ESCRITA
 
 # Agora o Base estará acessível ao Alembic
 
+# Os índices de busca por trigramas dependem da extensão pg_trgm
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+# Bancos montados com create_all (python -m app.cli criar-banco): funções do particionamento e as
+# partições do mês corrente e dos PARTICOES_MESES_A_FRENTE meses seguintes
+@event.listens_for(Base.metadata, "after_create")
+def _criar_particoes_iniciais(target, connection, **kw):
+    connection.execute(text(FUNCAO_CRIAR_PARTICOES))
+    connection.execute(text(FUNCAO_REJEITAR_ESCRITA))
+    connection.execute(
+        text(
+            "SELECT criar_particoes_mes(mes::date) FROM generate_series("
+            "date_trunc('month', CURRENT_DATE), "
+            "date_trunc('month', CURRENT_DATE) + make_interval(months => :meses), "
+            "interval '1 month') AS mes"
+        ),
+        {"meses": config.PARTICOES_MESES_A_FRENTE},
+    )
+
+# Idem para a versão do catálogo: a linha inicial e os gatilhos em produtos
+@event.listens_for(Base.metadata, "after_create")
+def _criar_versao_catalogo(target, connection, **kw):
+    connection.execute(text(FUNCAO_ALTERACAO_CATALOGO))
+    for gatilho in GATILHOS_CATALOGO:
+        connection.execute(text(gatilho))
+    connection.execute(text(VERSAO_INICIAL))
@@ -0,0 +1,63 @@
+# app/models/catalogo.py
+"""
+Versão do catálogo de produtos, mantida pelo banco.
+
+Toda transação que inclui, exclui ou altera nome, descrição ou preço de produtos (API,
+importação, app.cli, em qualquer worker) incrementa a versão no commit, por um gatilho
+adiado: a escrita e a nova versão ficam visíveis juntas. O estoque fica de fora: as vendas
+só o baixam e não passam por esta linha (ver app/cache.py). O ETag/Last-Modified do
+catálogo e as chaves do cache em memória vêm desta linha. O gatilho é criado pela migração 6be6aed3006e e, nos bancos montados com
+create_all, pelo evento after_create registrado em app/models/__init__.py.
+"""
+from sqlalchemy import BigInteger, Column, DateTime, Integer
+from app.database import Base
+
+class CatalogoVersao(Base):
+    """Linha única (id = 1) com a versão e o instante da última alteração do catálogo"""
+    __tablename__ = "catalogo_versao"
+
+    id = Column(Integer, primary_key=True)
+    versao = Column(BigInteger, nullable=False, default=0)
+    atualizado_em = Column(DateTime(timezone=True), nullable=False)
+
+# Uma vez por transação (a marca em set_config vale só até o fim dela), no commit; a linha
+# fica travada só durante o commit, não durante a transação que alterou os produtos
+FUNCAO_ALTERACAO_CATALOGO = """
+CREATE OR REPLACE FUNCTION registrar_alteracao_catalogo() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF current_setting('catalogo.alterado', true) IS DISTINCT FROM 'sim' THEN
+        PERFORM set_config('catalogo.alterado', 'sim', true);
+        UPDATE catalogo_versao SET versao = versao + 1, atualizado_em = clock_timestamp() WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+# UPDATE só de quantidade_em_estoque (a baixa de cada venda) não dispara nada
+GATILHOS_CATALOGO = (
+    """
+    CREATE CONSTRAINT TRIGGER catalogo_alterado
+    AFTER INSERT OR DELETE ON produtos
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION registrar_alteracao_catalogo()
+    """,
+    """
+    CREATE CONSTRAINT TRIGGER catalogo_atualizado
+    AFTER UPDATE OF nome, descricao, preco ON produtos
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW
+    WHEN (OLD.nome IS DISTINCT FROM NEW.nome
+          OR OLD.descricao IS DISTINCT FROM NEW.descricao
+          OR OLD.preco IS DISTINCT FROM NEW.preco)
+    EXECUTE FUNCTION registrar_alteracao_catalogo()
+    """,
+    """
+    CREATE TRIGGER catalogo_truncado
+    AFTER TRUNCATE ON produtos
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_alteracao_catalogo()
+    """,
+)
+
+VERSAO_INICIAL = "INSERT INTO catalogo_versao (id, versao, atualizado_em) VALUES (1, 0, clock_timestamp())"
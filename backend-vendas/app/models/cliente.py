@@ -1,5 +1,5 @@
 # app/models/cliente.py
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -16,3 +16,18 @@ class Cliente(Base):
 
     def __repr__(self):
         return f"<Cliente(nome={self.nome}, email={self.email})>"
+
+# Índices da busca (/clientes/busca): trigramas para substring e busca aproximada,
+# text_pattern_ops em lower() para prefixo
+Index('ix_clientes_nome_trgm', Cliente.nome, postgresql_using='gin', postgresql_ops={'nome': 'gin_trgm_ops'})
+Index('ix_clientes_email_trgm', Cliente.email, postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+Index(
+    'ix_clientes_nome_prefixo',
+    func.lower(Cliente.nome).label('nome_minusculo'),
+    postgresql_ops={'nome_minusculo': 'text_pattern_ops'}
+)
+Index(
+    'ix_clientes_email_prefixo',
+    func.lower(Cliente.email).label('email_minusculo'),
+    postgresql_ops={'email_minusculo': 'text_pattern_ops'}
+)
@@ -1,5 +1,5 @@
 # app/models/estoque.py (Produto)
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Index, Integer, String, Float, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -17,3 +17,12 @@ class Produto(Base):
 
     def __repr__(self):
         return f"<Produto(nome={self.nome}, preco={self.preco}, quantidade={self.quantidade_em_estoque})>"
+
+# Índices da busca (/produtos/busca): trigramas para substring e busca aproximada,
+# text_pattern_ops em lower() para prefixo
+Index('ix_produtos_nome_trgm', Produto.nome, postgresql_using='gin', postgresql_ops={'nome': 'gin_trgm_ops'})
+Index(
+    'ix_produtos_nome_prefixo',
+    func.lower(Produto.nome).label('nome_minusculo'),
+    postgresql_ops={'nome_minusculo': 'text_pattern_ops'}
+)
@@ -0,0 +1,50 @@
+"""
+Funções SQL do particionamento mensal de vendas e venda_produto.
+
+Cada mês tem uma partição em cada tabela (vendas_pAAAA_MM e venda_produto_pAAAA_MM), com
+a faixa [primeiro dia do mês, primeiro dia do mês seguinte). As funções são criadas pela
+migração b4a20ce57bc7 e, nos bancos montados com create_all, pelo evento after_create
+registrado em app/models/__init__.py.
+"""
+
+TABELAS_PARTICIONADAS = ("vendas", "venda_produto")
+
+# Cria as partições do mês de `mes` nas duas tabelas, se ainda não existirem. Chamadas
+# concorrentes para o mesmo mês são inofensivas: quem perde a corrida ignora o erro
+FUNCAO_CRIAR_PARTICOES = """
+CREATE OR REPLACE FUNCTION criar_particoes_mes(mes date) RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    inicio date := date_trunc('month', mes)::date;
+    fim date := (date_trunc('month', mes) + interval '1 month')::date;
+    tabela text;
+    particao text;
+BEGIN
+    FOREACH tabela IN ARRAY ARRAY['vendas', 'venda_produto'] LOOP
+        particao := tabela || '_p' || to_char(inicio, 'YYYY_MM');
+        IF to_regclass(quote_ident(particao)) IS NULL THEN
+            BEGIN
+                EXECUTE 'CREATE TABLE IF NOT EXISTS ' || quote_ident(particao)
+                    || ' PARTITION OF ' || quote_ident(tabela)
+                    || ' FOR VALUES FROM (' || quote_literal(inicio) || ') TO (' || quote_literal(fim) || ')';
+            EXCEPTION WHEN duplicate_table OR unique_violation THEN
+                NULL;
+            END;
+        END IF;
+    END LOOP;
+END;
+$$
+"""
+
+# Gatilho das partições arquivadas: qualquer escrita falha com SQLSTATE 25006
+# (read_only_sql_transaction), que a API devolve como 409
+FUNCAO_REJEITAR_ESCRITA = """
+CREATE OR REPLACE FUNCTION rejeitar_escrita_arquivada() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    RAISE EXCEPTION USING
+        MESSAGE = 'Partição ' || TG_TABLE_NAME || ' arquivada: período somente leitura',
+        ERRCODE = 'read_only_sql_transaction';
+END;
+$$
+"""
@@ -0,0 +1,18 @@
+# app/models/produto_venda_diaria.py
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from app.database import Base
+
+class ProdutoVendaDiaria(Base):
+    """Quantidade e receita por produto e dia, mantidas junto com as escritas dos itens (ranking de mais vendidos)"""
+    __tablename__ = 'produtos_vendas_diarias'
+
+    # Chave (data, produto_id): o ranking de um período lê só a faixa de datas pedida
+    data = Column(Date, primary_key=True)
+    produto_id = Column(Integer, ForeignKey('produtos.id', ondelete='CASCADE'), primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+    receita = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return (f"<ProdutoVendaDiaria(data={self.data}, "
+                f"produto_id={self.produto_id}, "
+                f"quantidade={self.quantidade})>")
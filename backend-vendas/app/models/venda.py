@@ -1,29 +1,29 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float, String, Date
+from sqlalchemy import Column, Integer, ForeignKey, Float, String, Date, Index
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import date
 from app.database import Base
 
 class Venda(Base):
     __tablename__ = 'vendas'
+    __table_args__ = (
+        # Atende tanto os filtros por período quanto a paginação por (data_venda, id)
+        Index('ix_vendas_data_venda_id', 'data_venda', 'id'),
+        # Particionada por mês de data_venda (partições vendas_pAAAA_MM, ver app/models/particoes.py):
+        # consultas com faixa de datas leem só as partições do período
+        {'postgresql_partition_by': 'RANGE (data_venda)'},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     cliente_id = Column(Integer, ForeignKey('clientes.id'))
-    data_venda = Column(Date, default=datetime.now().date())
+    # A chave da partição faz parte da chave primária no banco; para o ORM a venda continua
+    # identificada só pelo id (ver __mapper_args__)
+    data_venda = Column(Date, primary_key=True, nullable=False, default=date.today)
     total = Column(Float)
 
     cliente = relationship("Cliente", back_populates="vendas")
     produtos = relationship("VendaProduto", back_populates="venda", cascade="all, delete-orphan")
 
-    def calcular_total(self):
-        """Calcula o total baseado nos produtos associados"""
-        if self.produtos:
-            self.total = sum(
-                vp.produto.preco * vp.quantidade 
-                for vp in self.produtos
-                if vp.produto and vp.produto.preco
-            )
-        else:
-            self.total = 0.0
+    __mapper_args__ = {"primary_key": [id]}
 
     def __repr__(self):
-        return f"<Venda(id={self.id}, cliente_id={self.cliente_id}, total={self.total})>"
\ No newline at end of file
+        return f"<Venda(id={self.id}, cliente_id={self.cliente_id}, total={self.total})>"
@@ -0,0 +1,17 @@
+# app/models/venda_diaria.py
+from sqlalchemy import Column, Integer, Float, Date
+from app.database import Base
+
+class VendaDiaria(Base):
+    """Totais de vendas por dia, mantidos junto com as escritas de vendas (usado pelo dashboard)"""
+    __tablename__ = 'vendas_diarias'
+
+    data = Column(Date, primary_key=True)
+    quantidade_vendas = Column(Integer, nullable=False, default=0)
+    receita = Column(Float, nullable=False, default=0.0)
+    itens_vendidos = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (f"<VendaDiaria(data={self.data}, "
+                f"quantidade_vendas={self.quantidade_vendas}, "
+                f"receita={self.receita})>")
@@ -1,22 +1,37 @@
 # app/models/venda_produto.py
-from sqlalchemy import Column, Integer, ForeignKey, Float
+from sqlalchemy import Column, Date, Float, Integer, ForeignKey, ForeignKeyConstraint, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class VendaProduto(Base):
     __tablename__ = 'venda_produto'
+    __table_args__ = (
+        # data_venda repete a da venda: os itens ficam na partição do mesmo mês da venda e a
+        # chave estrangeira acompanha a troca de data (ON UPDATE CASCADE)
+        ForeignKeyConstraint(
+            ["venda_id", "data_venda"], ["vendas.id", "vendas.data_venda"],
+            onupdate="CASCADE", ondelete="CASCADE"
+        ),
+        # A chave primária começa por venda_id: consultas por produto precisam do próprio índice
+        Index('ix_venda_produto_produto_id', 'produto_id'),
+        {'postgresql_partition_by': 'RANGE (data_venda)'},
+    )
 
-    venda_id = Column(Integer, ForeignKey("vendas.id"), primary_key=True)
+    venda_id = Column(Integer, primary_key=True)
     produto_id = Column(Integer, ForeignKey("produtos.id"), primary_key=True)
+    data_venda = Column(Date, primary_key=True, nullable=False)
     quantidade = Column(Integer, nullable=False, default=1)
-    
+    # Preço do produto no momento da venda: totais e relatórios não dependem do preço atual
+    preco_unitario = Column(Float, nullable=False)
 
     # Relacionamentos
     venda = relationship("Venda", back_populates="produtos")
     produto = relationship("Produto", back_populates="vendas")
 
+    __mapper_args__ = {"primary_key": [venda_id, produto_id]}
+
     def __repr__(self):
         return (f"<VendaProduto(venda_id={self.venda_id}, "
                 f"produto_id={self.produto_id}, "
                 f"quantidade={self.quantidade}, "
-                f"preco_unitario={self.preco_unitario})>")
\ No newline at end of file
+                f"preco_unitario={self.preco_unitario})>")
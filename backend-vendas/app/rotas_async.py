@@ -0,0 +1,490 @@
+"""
+Rotas do modo assíncrono (DB_MODE=async): mesmos caminhos e contratos das rotas de
+app/main.py, executadas no event loop com AsyncSession/asyncpg em vez do threadpool.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date
+import logging
+
+from app import eventos, schemas
+from app.cache import condicional_catalogo
+from app.serializacao import resposta_lista
+from app.crud import (
+    cliente as crud_cliente,
+    exportacao as crud_exportacao,
+    particoes as crud_particoes,
+    produto as crud_produto,
+    venda as crud_venda_sync
+)
+from app.crud_async import (
+    cliente as crud_cliente_async,
+    produto as crud_produto_async,
+    venda as crud_venda,
+    venda_produto as crud_venda_produto,
+    relatorio as crud_relatorio,
+    venda_diaria as crud_venda_diaria,
+    produto_venda_diaria as crud_produto_venda_diaria
+)
+from app.crud.busca import normalizar_busca
+from app.crud.estoque import EstoqueInsuficiente
+from app.crud.paginacao import CursorInvalido, proximo_cursor
+from app.crud.venda_produto import publicar_alteracao_item, publicar_item, variacao_itens_vendas
+from app import database
+from app.database import AsyncSessionLocal
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Dependência para obter a sessão assíncrona do banco de dados (primário)
+async def get_async_db(request: Request, response: Response):
+    database.registrar_escrita(request, response)
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependência das rotas somente de leitura: réplica ou primário (ver get_db_leitura em app/main.py)
+async def get_async_db_leitura(request: Request):
+    db = await database.abrir_sessao_leitura_async(primario=database.escrita_recente(request))
+    async with db:
+        yield db
+
+async def listar_paginado(response: Response, listar, chave, limit: int, cursor: Optional[str]):
+    try:
+        itens = await listar(cursor=cursor)
+    except CursorInvalido:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    next_cursor = proximo_cursor(itens, limit, chave)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return itens
+
+# Rotas para Clientes
+@router.post("/clientes/", response_model=schemas.Cliente)
+async def create_cliente(cliente: schemas.ClienteCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_cliente_async.create_cliente(db=db, cliente=cliente)
+
+@router.get("/clientes/busca", response_model=List[schemas.Cliente])
+async def buscar_clientes(q: str, limit: int = 10, db: AsyncSession = Depends(get_async_db_leitura)):
+    termo, limit = normalizar_busca(q, limit)
+    if not termo:
+        return []
+    return await crud_cliente_async.buscar_clientes(db, termo=termo, limit=limit)
+
+@router.get("/clientes/{cliente_id}", response_model=schemas.Cliente)
+async def read_cliente(cliente_id: int, db: AsyncSession = Depends(get_async_db_leitura)):
+    db_cliente = await crud_cliente_async.get_cliente(db, cliente_id=cliente_id)
+    if not db_cliente:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return db_cliente
+
+@router.get("/clientes/", response_model=List[schemas.Cliente])
+async def read_clientes(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    colunas = crud_cliente.colunas_listagem(fields)
+    itens = await listar_paginado(
+        response,
+        lambda cursor: crud_cliente_async.get_clientes(db=db, skip=skip, limit=limit, cursor=cursor, colunas=colunas),
+        crud_cliente.chave_cursor,
+        limit,
+        cursor
+    )
+    return resposta_lista(itens, response)
+
+# Rotas para Produtos
+@router.post("/produtos/", response_model=schemas.Produto)
+async def create_produto(produto: schemas.ProdutoCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_produto_async.create_produto(db=db, produto=produto)
+
+@router.get("/produtos/busca", response_model=List[schemas.Produto])
+async def buscar_produtos(q: str, limit: int = 10, db: AsyncSession = Depends(get_async_db_leitura)):
+    termo, limit = normalizar_busca(q, limit)
+    if not termo:
+        return []
+    return await crud_produto_async.buscar_produtos(db, termo=termo, limit=limit)
+
+# Vários produtos numa só consulta: ?ids=1,2,3 (declarada antes de /produtos/{produto_id})
+@router.get("/produtos/batch", response_model=List[schemas.Produto])
+async def read_produtos_lote(
+    request: Request,
+    response: Response,
+    ids: List[str] = Query(...),
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    try:
+        ids = crud_produto.ler_ids_lote(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    versao = await crud_produto_async.get_versao_catalogo(db)
+    nao_modificado = condicional_catalogo(request, response, versao)
+    if nao_modificado:
+        return nao_modificado
+    return resposta_lista(await crud_produto_async.get_produtos_por_ids(db, ids, versao.versao), response)
+
+@router.get("/produtos/mais-vendidos", response_model=List[schemas.ProdutoMaisVendido])
+async def read_produtos_mais_vendidos(
+    response: Response,
+    criterio: schemas.CriterioRanking = schemas.CriterioRanking.quantidade,
+    limit: int = 10,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise HTTPException(status_code=400, detail="data_inicio deve ser anterior ou igual a data_fim")
+    linhas = await crud_produto_venda_diaria.get_mais_vendidos(
+        db, criterio=criterio, limit=limit, data_inicio=data_inicio, data_fim=data_fim
+    )
+    return resposta_lista(linhas, response)
+
+@router.get("/produtos/{produto_id}", response_model=schemas.Produto)
+async def read_produto(produto_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db_leitura)):
+    # O produto (em geral do cache) é procurado antes: id inexistente é 404, não 304
+    versao = await crud_produto_async.get_versao_catalogo(db)
+    db_produto = await crud_produto_async.get_produto(db, produto_id=produto_id, versao=versao.versao)
+    if not db_produto:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    nao_modificado = condicional_catalogo(request, response, versao)
+    if nao_modificado:
+        return nao_modificado
+    return db_produto
+
+@router.get("/produtos/", response_model=List[schemas.Produto])
+async def read_produtos(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    colunas = crud_produto.colunas_listagem(fields)
+    versao = await crud_produto_async.get_versao_catalogo(db)
+    nao_modificado = condicional_catalogo(request, response, versao)
+    if nao_modificado:
+        return nao_modificado
+    itens = await listar_paginado(
+        response,
+        lambda cursor: crud_produto_async.get_produtos(
+            db=db, skip=skip, limit=limit, cursor=cursor, colunas=colunas, versao=versao.versao
+        ),
+        crud_produto.chave_cursor,
+        limit,
+        cursor
+    )
+    return resposta_lista(itens, response)
+
+@router.put("/produtos/{produto_id}", response_model=schemas.Produto)
+async def update_produto(produto_id: int, produto: schemas.ProdutoUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_produto = await crud_produto_async.update_produto(db, produto_id=produto_id, produto=produto)
+    if not db_produto:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    return db_produto
+
+@router.delete("/produtos/{produto_id}", response_model=schemas.Produto)
+async def delete_produto(produto_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_produto = await crud_produto_async.delete_produto(db, produto_id=produto_id)
+    if not db_produto:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    return db_produto
+
+# Rotas para Vendas
+@router.post("/vendas/", response_model=schemas.VendaWithProdutos)
+async def create_venda(venda: schemas.VendaCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        if not venda.data_venda:
+            venda.data_venda = date.today()
+
+        # Venda e itens numa única transação: ou grava tudo, ou nada
+        db_venda = await crud_venda.create_venda(db, venda=venda, commit=False)
+
+        await crud_venda_diaria.registrar_variacao(
+            db,
+            db_venda["data_venda"],
+            vendas=1,
+            receita=db_venda["total"] or 0.0,
+            itens=sum(item["quantidade"] for item in db_venda["produtos"])
+        )
+        eventos.publicar(db, "venda_criada", {
+            "id": db_venda["id"],
+            "cliente_id": db_venda["cliente_id"],
+            "data_venda": db_venda["data_venda"],
+            "total": db_venda["total"],
+            "itens": len(db_venda["produtos"]),
+        })
+        await db.commit()
+        return db_venda
+    except EstoqueInsuficiente:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        if crud_particoes.periodo_arquivado(e):
+            raise
+        logger.error(f"Erro ao criar venda: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/vendas/export")
+async def exportar_vendas(
+    request: Request,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    itens: bool = False,
+    formato: schemas.FormatoExportacao = schemas.FormatoExportacao.csv
+):
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise HTTPException(status_code=400, detail="data_inicio deve ser anterior ou igual a data_fim")
+    formatador = crud_exportacao.formatador(formato, itens)
+    primario = database.escrita_recente(request)
+
+    async def gerar():
+        yield formatador.cabecalho()
+        # Sessão própria: a da dependência é fechada antes de o streaming começar
+        async with await database.abrir_sessao_leitura_async(primario=primario) as db:
+            resultado = await db.stream(crud_exportacao.stmt_exportar_vendas(data_inicio, data_fim, itens))
+            async for linhas in resultado.partitions():
+                yield formatador.lote(linhas)
+            yield formatador.fim()
+
+    return StreamingResponse(
+        gerar(),
+        media_type=formatador.media_type,
+        headers={"Content-Disposition": f'attachment; filename="vendas.{formatador.extensao}"'}
+    )
+
+@router.get(
+    "/vendas/{venda_id}",
+    response_model=None,
+    responses={200: {"model": schemas.VendaComItens}},
+)
+async def read_venda(venda_id: int, detalhar_itens: bool = False, db: AsyncSession = Depends(get_async_db_leitura)):
+    if detalhar_itens:
+        db_venda = await crud_venda.get_venda_detalhada(db, venda_id=venda_id)
+        modelo = schemas.VendaDetalhada
+    else:
+        db_venda = await crud_venda.get_venda(db, venda_id=venda_id, carregar_produtos=True)
+        modelo = schemas.VendaWithProdutos
+    if not db_venda:
+        raise HTTPException(status_code=404, detail="Venda não encontrada")
+    return modelo.model_validate(db_venda)
+
+@router.get("/vendas/", response_model=List[schemas.Venda])
+async def read_vendas(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    colunas = crud_venda_sync.colunas_listagem(fields)
+    itens = await listar_paginado(
+        response,
+        lambda cursor: crud_venda.get_vendas(db=db, skip=skip, limit=limit, cursor=cursor, colunas=colunas),
+        crud_venda_sync.chave_cursor,
+        limit,
+        cursor
+    )
+    return resposta_lista(itens, response)
+
+@router.put("/vendas/{venda_id}", response_model=schemas.Venda)
+async def update_venda(venda_id: int, venda: schemas.VendaUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_venda = await crud_venda.update_venda(db, venda_id=venda_id, venda=venda, commit=False)
+    if not db_venda:
+        raise HTTPException(status_code=404, detail="Venda não encontrada")
+
+    # Mantém o resumo diário: troca de data move a venda inteira de um dia para outro
+    total = db_venda.total or 0.0
+    total_anterior = db_venda.total_anterior or 0.0
+    if db_venda.data_venda != db_venda.data_anterior:
+        itens = db_venda.quantidade_itens
+        await crud_venda_diaria.registrar_variacao(
+            db, db_venda.data_anterior, vendas=-1, receita=-total_anterior, itens=-itens
+        )
+        await crud_venda_diaria.registrar_variacao(
+            db, db_venda.data_venda, vendas=1, receita=total, itens=itens
+        )
+    else:
+        await crud_venda_diaria.registrar_variacao(
+            db, db_venda.data_venda, receita=total - total_anterior
+        )
+    eventos.publicar(db, "venda_alterada", {
+        "id": db_venda.id,
+        "cliente_id": db_venda.cliente_id,
+        "data_venda": db_venda.data_venda,
+        "total": db_venda.total,
+    })
+    await db.commit()
+    return db_venda
+
+@router.delete("/vendas/{venda_id}", response_model=schemas.Venda)
+async def delete_venda(venda_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_venda = await crud_venda.delete_venda(db, venda_id=venda_id, commit=False)
+    if not db_venda:
+        raise HTTPException(status_code=404, detail="Venda não encontrada")
+
+    await crud_venda_diaria.registrar_variacao(
+        db, db_venda.data_venda, vendas=-1, receita=-(db_venda.total or 0.0), itens=-db_venda.quantidade_itens
+    )
+    eventos.publicar(db, "venda_excluida", {"id": db_venda.id, "data_venda": db_venda.data_venda})
+    await db.commit()
+    return db_venda
+
+# Rotas para VendaProduto
+@router.post("/venda_produto/", response_model=schemas.VendaProduto)
+async def create_venda_produto(
+    venda_produto: schemas.VendaProdutoCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        venda = await crud_venda.get_venda(db, venda_id=venda_produto.venda_id)
+        if not venda:
+            raise HTTPException(status_code=404, detail="Venda não encontrada")
+
+        db_venda_produto = await crud_venda_produto.create_venda_produto(
+            db=db, venda_produto=venda_produto, commit=False
+        )
+
+        # Atualiza o total da venda e o resumo diário na mesma transação
+        totais = await crud_venda.recalcular_total(db, venda_id=venda.id, data_venda=venda.data_venda)
+        await crud_venda_diaria.registrar_variacao(
+            db,
+            venda.data_venda,
+            receita=totais.total - (totais.total_anterior or 0.0),
+            itens=db_venda_produto.quantidade
+        )
+        publicar_item(db, venda.id, db_venda_produto.produto_id, db_venda_produto.quantidade, totais.total)
+        await db.commit()
+
+        return db_venda_produto
+    except EstoqueInsuficiente:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        if crud_particoes.periodo_arquivado(e):
+            raise
+        logger.error(f"Erro ao adicionar produto à venda: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/vendas/{venda_id}/produtos/", response_model=List[schemas.VendaProduto])
+async def read_venda_produtos(venda_id: int, db: AsyncSession = Depends(get_async_db_leitura)):
+    return await crud_venda_produto.get_venda_produtos(db, venda_id=venda_id)
+
+@router.get("/venda_produto/{venda_id}/{produto_id}", response_model=schemas.VendaProduto)
+async def read_venda_produto(
+    venda_id: int,
+    produto_id: int,
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    db_venda_produto = await crud_venda_produto.get_venda_produto(db, venda_id=venda_id, produto_id=produto_id)
+    if not db_venda_produto:
+        raise HTTPException(status_code=404, detail="Relação Venda-Produto não encontrada")
+    return db_venda_produto
+
+@router.put("/venda_produto/{venda_id}/{produto_id}", response_model=schemas.VendaProduto)
+async def update_venda_produto(
+    venda_id: int,
+    produto_id: int,
+    venda_produto: schemas.VendaProdutoUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Item trocado de venda: a venda nova precisa existir
+    if venda_produto.venda_id != venda_id and not await crud_venda.get_venda(db, venda_id=venda_produto.venda_id):
+        raise HTTPException(status_code=404, detail="Venda não encontrada")
+
+    db_venda_produto = await crud_venda_produto.update_venda_produto(
+        db,
+        venda_id=venda_id,
+        produto_id=produto_id,
+        venda_produto=venda_produto,
+        commit=False
+    )
+    if not db_venda_produto:
+        raise HTTPException(status_code=404, detail="Relação Venda-Produto não encontrada")
+
+    itens_origem, itens_destino = variacao_itens_vendas(db_venda_produto, venda_id)
+    totais = await crud_venda.recalcular_total(db, venda_id=venda_id, data_venda=db_venda_produto.data_anterior)
+    if totais:
+        await crud_venda_diaria.registrar_variacao(
+            db,
+            totais.data_venda,
+            receita=totais.total - (totais.total_anterior or 0.0),
+            itens=itens_origem
+        )
+    # Se o item foi para outra venda, o total e o dia dela também mudam
+    totais_destino = None
+    if db_venda_produto.venda_id != venda_id:
+        totais_destino = await crud_venda.recalcular_total(
+            db, venda_id=db_venda_produto.venda_id, data_venda=db_venda_produto.data_venda
+        )
+        if totais_destino:
+            await crud_venda_diaria.registrar_variacao(
+                db,
+                totais_destino.data_venda,
+                receita=totais_destino.total - (totais_destino.total_anterior or 0.0),
+                itens=itens_destino
+            )
+    publicar_alteracao_item(db, venda_id, produto_id, db_venda_produto, totais, totais_destino)
+    await db.commit()
+
+    return db_venda_produto
+
+@router.delete("/venda_produto/{venda_id}/{produto_id}", response_model=schemas.VendaProduto)
+async def delete_venda_produto(
+    venda_id: int,
+    produto_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_venda_produto = await crud_venda_produto.delete_venda_produto(
+        db, venda_id=venda_id, produto_id=produto_id, commit=False
+    )
+    if not db_venda_produto:
+        raise HTTPException(status_code=404, detail="Relação Venda-Produto não encontrada")
+
+    totais = await crud_venda.recalcular_total(db, venda_id=venda_id, data_venda=db_venda_produto.data_venda)
+    if totais:
+        await crud_venda_diaria.registrar_variacao(
+            db,
+            totais.data_venda,
+            receita=totais.total - (totais.total_anterior or 0.0),
+            itens=-db_venda_produto.quantidade
+        )
+    publicar_item(db, venda_id, produto_id, 0, totais.total if totais else None)
+    await db.commit()
+
+    return db_venda_produto
+
+# Rotas para Relatórios
+@router.get("/relatorios/vendas", response_model=schemas.RelatorioVendas)
+async def read_relatorio_vendas(
+    agrupamento: schemas.Agrupamento = schemas.Agrupamento.dia,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise HTTPException(status_code=400, detail="data_inicio deve ser anterior ou igual a data_fim")
+    return await crud_relatorio.relatorio_vendas(
+        db,
+        agrupamento=agrupamento,
+        data_inicio=data_inicio,
+        data_fim=data_fim
+    )
+
+# Rotas para Dashboard
+@router.get("/dashboard/resumo", response_model=schemas.ResumoDashboard)
+async def read_dashboard_resumo(
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db_leitura)
+):
+    return await crud_venda_diaria.get_resumo(db, data_inicio=data_inicio, data_fim=data_fim)
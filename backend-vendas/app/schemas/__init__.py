@@ -1,13 +1,24 @@
 # app/schemas/__init__.py
-from .venda import Venda, VendaCreate, VendaUpdate, VendaWithProdutos
+from .venda import Venda, VendaCreate, VendaUpdate, VendaWithProdutos, ItemVendaCreate, ItemVendaDetalhado, VendaDetalhada, VendaComItens
 from .venda_produto import VendaProduto, VendaProdutoCreate, VendaProdutoUpdate
 from .produto import ProdutoBase, ProdutoCreate, ProdutoUpdate, Produto
 from .cliente import ClienteBase, ClienteCreate, ClienteUpdate, Cliente
+from .relatorio import Agrupamento, LinhaRelatorioVendas, RelatorioVendas, CriterioRanking, ProdutoMaisVendido
+from .dashboard import ResumoMensal, ResumoDashboard
+from .importacao import ProdutoImportacao, ErroImportacao, ResultadoImportacao
+from .exportacao import FormatoExportacao
+from .analise import PeriodoAnalise, MediasMoveis, Crescimento, AnaliseRFM, PrevisaoReceita
 
 # Exporte apenas o necessário
 __all__ = [
     'VendaProdutoBase', 'VendaProdutoCreate', 'VendaProdutoResponse',
-    'VendaBase', 'VendaCreate', 'VendaUpdate', 'VendaResponse',
+    'VendaBase', 'VendaCreate', 'VendaUpdate', 'VendaResponse', 'ItemVendaCreate',
+    'ItemVendaDetalhado', 'VendaDetalhada', 'VendaComItens',
     'ProdutoBase', 'ProdutoCreate', 'ProdutoUpdate', 'Produto',
-    'ClienteBase', 'ClienteCreate', 'ClienteUpdate', 'Cliente'
+    'ClienteBase', 'ClienteCreate', 'ClienteUpdate', 'Cliente',
+    'Agrupamento', 'LinhaRelatorioVendas', 'RelatorioVendas', 'CriterioRanking', 'ProdutoMaisVendido',
+    'ResumoMensal', 'ResumoDashboard',
+    'ProdutoImportacao', 'ErroImportacao', 'ResultadoImportacao',
+    'FormatoExportacao',
+    'PeriodoAnalise', 'MediasMoveis', 'Crescimento', 'AnaliseRFM', 'PrevisaoReceita'
 ]
\ No newline at end of file
@@ -0,0 +1,73 @@
+from pydantic import BaseModel
+from datetime import date
+from enum import Enum
+from typing import List, Optional
+
+# Períodos comparados na análise de crescimento
+class PeriodoAnalise(str, Enum):
+    dia = "dia"
+    semana = "semana"
+    mes = "mes"
+
+# Um dia da série, com as médias dos últimos `janela` dias (nulas antes de a janela fechar)
+class PontoMediaMovel(BaseModel):
+    data: date
+    receita: float
+    vendas: int
+    itens: int
+    media_receita: Optional[float] = None
+    media_vendas: Optional[float] = None
+
+class MediasMoveis(BaseModel):
+    data_inicio: date
+    data_fim: date
+    janela: int
+    pontos: List[PontoMediaMovel] = []
+
+# Crescimento em % sobre o período anterior (nulo no primeiro ou se o anterior foi zero)
+class PeriodoCrescimento(BaseModel):
+    periodo: date
+    receita: float
+    vendas: int
+    itens: int
+    ticket_medio: float
+    crescimento_receita: Optional[float] = None
+    crescimento_vendas: Optional[float] = None
+
+class Crescimento(BaseModel):
+    data_inicio: date
+    data_fim: date
+    agrupamento: PeriodoAnalise
+    periodos: List[PeriodoCrescimento] = []
+
+# Recência em dias desde a última compra; notas de 1 a 5 por quintil (5 é o melhor)
+class ClienteRFM(BaseModel):
+    id: int
+    nome: Optional[str] = None
+    recencia: int
+    frequencia: int
+    monetario: float
+    nota_recencia: int
+    nota_frequencia: int
+    nota_monetario: int
+    rfm: str
+
+class AnaliseRFM(BaseModel):
+    data_inicio: date
+    data_fim: date
+    clientes_analisados: int
+    clientes: List[ClienteRFM] = []
+
+class PontoPrevisao(BaseModel):
+    data: date
+    receita_prevista: float
+    minimo: float
+    maximo: float
+
+# Previsão a partir do histórico [data_inicio, data_fim]: tendência linear e efeito do dia da semana
+class PrevisaoReceita(BaseModel):
+    data_inicio: date
+    data_fim: date
+    dias: int
+    tendencia_diaria: float
+    pontos: List[PontoPrevisao] = []
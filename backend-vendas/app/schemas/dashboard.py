@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List
+
+class ResumoMensal(BaseModel):
+    mes: date
+    quantidade_vendas: int
+    receita: float
+    itens_vendidos: int
+
+class ResumoDashboard(BaseModel):
+    quantidade_vendas: int
+    receita: float
+    itens_vendidos: int
+    ticket_medio: float
+    media_mensal: float
+    meses: List[ResumoMensal] = []
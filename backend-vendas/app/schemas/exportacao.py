@@ -0,0 +1,5 @@
+from enum import Enum
+
+class FormatoExportacao(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
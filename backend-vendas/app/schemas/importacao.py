@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from .produto import ProdutoCreate
+
+# Linha do CSV de produtos: com id, atualiza o produto existente; sem id, cria um novo
+class ProdutoImportacao(ProdutoCreate):
+    id: Optional[int] = None
+
+class ErroImportacao(BaseModel):
+    linha: int
+    erro: str
+
+class ResultadoImportacao(BaseModel):
+    linhas_lidas: int
+    inseridos: int
+    atualizados: int
+    rejeitados: int
+    # Linhas válidas substituídas por outra posterior com a mesma chave (id ou email)
+    repetidos: int = 0
+    erros: List[ErroImportacao] = []
@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+from datetime import date
+from enum import Enum
+from typing import List, Optional
+
+class Agrupamento(str, Enum):
+    dia = "dia"
+    semana = "semana"
+    mes = "mes"
+    cliente = "cliente"
+    produto = "produto"
+
+# Uma linha agregada do relatório: o período (dia/semana/mês) ou o cliente/produto
+class LinhaRelatorioVendas(BaseModel):
+    periodo: Optional[date] = None
+    id: Optional[int] = None
+    nome: Optional[str] = None
+    quantidade_vendas: int
+    total: float
+    ticket_medio: float
+
+class RelatorioVendas(BaseModel):
+    data_inicio: Optional[date] = None
+    data_fim: Optional[date] = None
+    agrupamento: Agrupamento
+    quantidade_vendas: int
+    total: float
+    ticket_medio: float
+    linhas: List[LinhaRelatorioVendas] = []
+
+# Critério do ranking de produtos mais vendidos
+class CriterioRanking(str, Enum):
+    quantidade = "quantidade"
+    receita = "receita"
+
+class ProdutoMaisVendido(BaseModel):
+    id: int
+    nome: str
+    quantidade: int
+    receita: float
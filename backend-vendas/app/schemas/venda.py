@@ -1,12 +1,14 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date
-from typing import List, Optional
+from typing import List, Optional, Union
 from pydantic import ConfigDict
 
 class VendaProduto(BaseModel):
     venda_id: int
     produto_id: int
     quantidade: int = 1
+    # Preço do produto gravado quando o item entrou na venda
+    preco_unitario: Optional[float] = None
     model_config = ConfigDict(from_attributes=True)
 
 class VendaBase(BaseModel):
@@ -15,8 +17,13 @@ class VendaBase(BaseModel):
     data_venda: Optional[date] = None
     total: Optional[float] = None
 
+# Item informado junto com a criação da venda
+class ItemVendaCreate(BaseModel):
+    produto_id: int
+    quantidade: int = Field(default=1, gt=0)
+
 class VendaCreate(VendaBase):
-    pass
+    produtos: List[ItemVendaCreate] = []
 
 class VendaUpdate(VendaBase):
     pass
@@ -28,6 +35,22 @@ class Venda(VendaBase):
 class VendaWithProdutos(Venda):
     produtos: List[VendaProduto] = []
 
+# Item com o nome e o preço do produto (GET /vendas/{id}?detalhar_itens=true)
+class ItemVendaDetalhado(BaseModel):
+    venda_id: int
+    produto_id: int
+    quantidade: int
+    # Vem de um LEFT JOIN com produtos: opcional como o preço
+    nome: Optional[str] = None
+    preco_unitario: Optional[float] = None
+
+class VendaDetalhada(Venda):
+    produtos: List[ItemVendaDetalhado] = []
+
+# Formas de resposta de GET /vendas/{id} (documentação); a rota escolhe a forma pelo
+# parâmetro detalhar_itens e devolve o schema já montado
+VendaComItens = Union[VendaDetalhada, VendaWithProdutos]
+
 # Resolve a referência circular após a definição
 from .venda_produto import VendaProduto
 VendaWithProdutos.model_rebuild()
\ No newline at end of file
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class VendaProdutoBase(BaseModel):
     venda_id: int
@@ -12,6 +13,9 @@ class VendaProdutoUpdate(VendaProdutoBase):
     pass
 
 class VendaProduto(VendaProdutoBase):
+    # Preço do produto gravado quando o item entrou na venda
+    preco_unitario: Optional[float] = None
+
     class Config:
         from_attributes = True
 
@@ -0,0 +1,23 @@
+"""
+Serialização rápida das listagens.
+
+As listagens consultam só as colunas do schema de resposta (linhas, sem objetos ORM nem
+identity map) e as linhas vão direto para o orjson, sem passar pelo response_model
+(validação modelo a modelo + jsonable_encoder), que custava mais que a própria consulta.
+Os tipos já vêm das colunas do banco, na forma do schema; o response_model das rotas
+continua documentando o contrato no OpenAPI.
+"""
+from typing import Sequence
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+def resposta_lista(linhas: Sequence, response: Response) -> ORJSONResponse:
+    """
+    Monta a resposta JSON de uma listagem a partir das linhas (Row) de um SELECT de colunas,
+    mantendo os cabeçalhos já definidos em `response` (X-Next-Cursor, ETag...).
+    """
+    chaves = tuple(linhas[0]._fields) if linhas else ()
+    resposta = ORJSONResponse([dict(zip(chaves, linha)) for linha in linhas])
+    resposta.headers.raw.extend(response.headers.raw)
+    return resposta
@@ -0,0 +1 @@
+# Benchmarks da API de vendas (executados fora do servidor, contra uma instância local)
@@ -0,0 +1,106 @@
+"""
+Compara a vazão da API no modo síncrono (threadpool) e no modo assíncrono (asyncpg)
+sob alta concorrência.
+
+Sobe um uvicorn para cada valor de DB_MODE, usando o banco configurado em app/config.py,
+e mede as mesmas rotas de leitura com o mesmo número de conexões simultâneas.
+
+Uso (a partir de backend-vendas/):
+    python -m benchmarks.async_vs_sync --concorrencia 256 --duracao 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.cliente_http import ConexaoHTTP, gerar_carga
+
+HOST = "127.0.0.1"
+
+def subir_servidor(modo: str, porta: int) -> subprocess.Popen:
+    ambiente = dict(os.environ, DB_MODE=modo)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", HOST, "--port", str(porta), "--log-level", "warning", "--no-access-log"],
+        env=ambiente,
+    )
+
+async def aguardar_servidor(porta: int, tempo_limite: float = 30.0):
+    limite = time.monotonic() + tempo_limite
+    while time.monotonic() < limite:
+        conexao = ConexaoHTTP(HOST, porta)
+        try:
+            await conexao.requisitar("GET", "/produtos/?limit=1")
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+        finally:
+            await conexao.fechar()
+    raise RuntimeError(f"Servidor na porta {porta} não respondeu em {tempo_limite}s")
+
+async def preparar_dados(porta: int, quantidade: int = 50) -> list:
+    """
+    Garante alguns produtos e vendas para as leituras; retorna os ids das vendas.
+    """
+    conexao = ConexaoHTTP(HOST, porta)
+    try:
+        produtos = []
+        for i in range(quantidade):
+            _, _, corpo = await conexao.requisitar("POST", "/produtos/", {
+                "nome": f"Produto benchmark {i}", "preco": 10.0 + i, "quantidade_em_estoque": 1000,
+            })
+            produtos.append(json.loads(corpo)["id"])
+        vendas = []
+        for i in range(quantidade):
+            _, _, corpo = await conexao.requisitar("POST", "/vendas/", {
+                "produtos": [{"produto_id": produtos[(i + j) % len(produtos)], "quantidade": 1} for j in range(3)],
+            })
+            vendas.append(json.loads(corpo)["id"])
+        return vendas
+    finally:
+        await conexao.fechar()
+
+def montar_requisicao(vendas_ids: list):
+    def requisicao(indice: int):
+        if indice % 2:
+            return "GET", f"/vendas/{vendas_ids[indice % len(vendas_ids)]}", None
+        return "GET", "/produtos/?limit=20", None
+    return requisicao
+
+async def medir(modo: str, porta: int, concorrencia: int, duracao: float, vendas_ids=None):
+    processo = subir_servidor(modo, porta)
+    try:
+        await aguardar_servidor(porta)
+        if vendas_ids is None:
+            vendas_ids = await preparar_dados(porta)
+        # Aquecimento: abre as conexões do pool antes da medição
+        await gerar_carga(HOST, porta, montar_requisicao(vendas_ids), concorrencia, 2.0)
+        resultado = await gerar_carga(HOST, porta, montar_requisicao(vendas_ids), concorrencia, duracao)
+        return resultado, vendas_ids
+    finally:
+        processo.terminate()
+        processo.wait(timeout=10)
+
+async def principal(args):
+    resultados = {}
+    vendas_ids = None
+    for modo in ("sync", "async"):
+        resultados[modo], vendas_ids = await medir(modo, args.porta, args.concorrencia, args.duracao, vendas_ids)
+
+    print(f"\nConcorrência: {args.concorrencia} conexões, {args.duracao:.0f}s por modo")
+    print(f"{'modo':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>8}")
+    for modo, r in resultados.items():
+        print(f"{modo:<8}{r['vazao']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['erros']:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: modo síncrono x assíncrono")
+    parser.add_argument("--concorrencia", type=int, default=256)
+    parser.add_argument("--duracao", type=float, default=15.0)
+    parser.add_argument("--porta", type=int, default=8765)
+    asyncio.run(principal(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Cenários de carga por rota da API.
+
+Cada cenário é uma função `requisicao(indice) -> (metodo, caminho, corpo)` no formato de
+`gerar_carga`. Os ids usados saem do resumo de `benchmarks.dados.gerar_dados`, então todas
+as leituras acertam registros existentes; o índice percorre os ids com um passo primo para
+espalhar os acessos.
+
+Os cenários de leitura vêm antes dos de escrita: as escritas aumentam as tabelas e rodam
+por último para não alterar o que as leituras medem.
+"""
+import itertools
+from datetime import date, timedelta
+
+PASSO = 7919
+TERMOS_BUSCA_PRODUTOS = ["ar", "caf", "sabo", "leite", "choc", "feij", "prime", "estrela"]
+TERMOS_BUSCA_CLIENTES = ["ana", "bru", "souza", "lima", "cliente1", "mar", "exemplo", "gab"]
+
+def _id(indice: int, total: int) -> int:
+    return 1 + (indice * PASSO) % total
+
+def montar_cenarios(dados: dict) -> dict:
+    """
+    Retorna {nome: requisicao} na ordem de execução.
+    """
+    clientes, produtos, vendas = dados["clientes"], dados["produtos"], dados["vendas"]
+    data_inicio = date.fromisoformat(dados["data_inicio"])
+    data_fim = date.fromisoformat(dados["data_fim"])
+    meses = max(1, (data_fim - data_inicio).days // 30)
+    # Contador próprio das escritas: índices únicos mesmo entre aquecimento e medição
+    sequencia = itertools.count(1)
+    # O que os cenários de inclusão criaram, para os de alteração e exclusão que rodam depois
+    itens_criados = []
+    vendas_criadas = 0
+    exclusoes = None
+
+    def mes(indice: int):
+        inicio = data_inicio + timedelta(days=30 * (indice % meses))
+        return inicio, inicio + timedelta(days=29)
+
+    def periodo(indice: int) -> str:
+        inicio, fim = mes(indice)
+        return f"data_inicio={inicio.isoformat()}&data_fim={fim.isoformat()}"
+
+    def nova_venda(indice: int):
+        nonlocal vendas_criadas
+        numero = next(sequencia)
+        vendas_criadas += 1
+        primeiro = _id(numero, produtos)
+        return "POST", "/vendas/", {
+            "cliente_id": _id(numero, clientes),
+            "produtos": [
+                {"produto_id": 1 + (primeiro - 1 + deslocamento) % produtos, "quantidade": 1 + deslocamento}
+                for deslocamento in range(min(3, produtos))
+            ],
+        }
+
+    def novo_item(indice: int):
+        numero = next(sequencia)
+        # Produtos avulsos não estão em nenhuma venda gerada: cada número dá um par novo
+        avulsos = dados["produtos_avulsos"]
+        par = (1 + numero % vendas, avulsos[(numero // vendas) % len(avulsos)])
+        itens_criados.append(par)
+        return "POST", "/venda_produto/", {"venda_id": par[0], "produto_id": par[1], "quantidade": 1}
+
+    def alterar_item(indice: int):
+        numero = next(sequencia)
+        # Pares incluídos por venda_produto_criar (que roda antes); a quantidade alterna
+        # entre 1 e 2 para que toda alteração mexa no estoque e no total
+        venda_id, produto_id = itens_criados[numero % len(itens_criados)] if itens_criados else (1, 0)
+        return "PUT", f"/venda_produto/{venda_id}/{produto_id}", {
+            "venda_id": venda_id, "produto_id": produto_id, "quantidade": 1 + numero % 2,
+        }
+
+    def excluir_venda(indice: int):
+        nonlocal exclusoes
+        if exclusoes is None:
+            # Primeiro as vendas de vendas_criar_varios_itens (ids seguintes aos gerados), depois
+            # as geradas, da mais nova para a mais antiga
+            exclusoes = itertools.chain(range(vendas + 1, vendas + vendas_criadas + 1), range(vendas, 0, -1))
+        return "DELETE", f"/vendas/{next(exclusoes, 0)}", None
+
+    def novo_cliente(indice: int):
+        numero = next(sequencia)
+        return "POST", "/clientes/", {"nome": f"Cliente benchmark {numero}", "email": f"bench{numero}@exemplo.com"}
+
+    def novo_produto(indice: int):
+        numero = next(sequencia)
+        return "POST", "/produtos/", {"nome": f"Produto benchmark {numero}", "preco": 10.0, "quantidade_em_estoque": 100}
+
+    return {
+        # Leituras
+        "clientes_listar": lambda i: ("GET", "/clientes/?limit=100", None),
+        "clientes_obter": lambda i: ("GET", f"/clientes/{_id(i, clientes)}", None),
+        "clientes_buscar": lambda i: ("GET", f"/clientes/busca?q={TERMOS_BUSCA_CLIENTES[i % len(TERMOS_BUSCA_CLIENTES)]}", None),
+        "produtos_listar": lambda i: ("GET", "/produtos/?limit=100", None),
+        "produtos_obter": lambda i: ("GET", f"/produtos/{_id(i, produtos)}", None),
+        "produtos_lote": lambda i: ("GET", "/produtos/batch?ids=" + ",".join(str(_id(i + k, produtos)) for k in range(30)), None),
+        "produtos_buscar": lambda i: ("GET", f"/produtos/busca?q={TERMOS_BUSCA_PRODUTOS[i % len(TERMOS_BUSCA_PRODUTOS)]}", None),
+        "vendas_listar": lambda i: ("GET", "/vendas/?limit=100", None),
+        # Páginas grandes: o custo dominante é a serialização, não a consulta
+        "clientes_listar_1000": lambda i: ("GET", "/clientes/?limit=1000", None),
+        "produtos_listar_1000": lambda i: ("GET", "/produtos/?limit=1000", None),
+        "vendas_listar_1000": lambda i: ("GET", "/vendas/?limit=1000", None),
+        "vendas_obter": lambda i: ("GET", f"/vendas/{_id(i, vendas)}", None),
+        "vendas_obter_detalhada": lambda i: ("GET", f"/vendas/{_id(i, vendas)}?detalhar_itens=true", None),
+        "vendas_itens": lambda i: ("GET", f"/vendas/{_id(i, vendas)}/produtos/", None),
+        "vendas_exportar_mes": lambda i: ("GET", f"/vendas/export?itens=true&{periodo(i)}", None),
+        # Relatórios
+        "relatorio_dia": lambda i: ("GET", f"/relatorios/vendas?agrupamento=dia&{periodo(i)}", None),
+        "relatorio_mes": lambda i: ("GET", "/relatorios/vendas?agrupamento=mes", None),
+        "relatorio_cliente": lambda i: ("GET", f"/relatorios/vendas?agrupamento=cliente&{periodo(i)}", None),
+        "relatorio_produto": lambda i: ("GET", f"/relatorios/vendas?agrupamento=produto&{periodo(i)}", None),
+        "dashboard_resumo": lambda i: ("GET", "/dashboard/resumo", None),
+        "produtos_mais_vendidos": lambda i: ("GET", "/produtos/mais-vendidos?limit=10", None),
+        "produtos_mais_vendidos_mes": lambda i: ("GET", f"/produtos/mais-vendidos?criterio=receita&{periodo(i)}", None),
+        # Escritas
+        "clientes_criar": novo_cliente,
+        "produtos_criar": novo_produto,
+        "vendas_criar_varios_itens": nova_venda,
+        "venda_produto_criar": novo_item,
+        "produtos_atualizar": lambda i: ("PUT", f"/produtos/{_id(i, produtos)}", {"preco": 10.0 + i % 90}),
+        "vendas_atualizar": lambda i: ("PUT", f"/vendas/{_id(i, vendas)}", {"cliente_id": _id(i + 1, clientes)}),
+        "venda_produto_atualizar": alterar_item,
+        "vendas_excluir": excluir_venda,
+    }
@@ -0,0 +1,124 @@
+"""
+Cliente HTTP/1.1 mínimo sobre asyncio, com conexão persistente (keep-alive).
+
+Evita que o próprio gerador de carga (httpx/requests) vire o gargalo da medição.
+"""
+import asyncio
+import json
+import time
+from typing import Optional
+
+class ConexaoHTTP:
+    def __init__(self, host: str, porta: int):
+        self.host = host
+        self.porta = porta
+        self._leitor = None
+        self._escritor = None
+
+    async def abrir(self):
+        self._leitor, self._escritor = await asyncio.open_connection(self.host, self.porta)
+
+    async def fechar(self):
+        if self._escritor:
+            self._escritor.close()
+            try:
+                await self._escritor.wait_closed()
+            except ConnectionError:
+                pass
+            self._escritor = None
+
+    async def requisitar(self, metodo: str, caminho: str, corpo=None, cabecalhos: Optional[dict] = None):
+        """
+        Envia uma requisição e retorna (status, cabecalhos, corpo_em_bytes).
+        """
+        if self._escritor is None:
+            await self.abrir()
+
+        dados = b""
+        linhas = [f"{metodo} {caminho} HTTP/1.1", f"Host: {self.host}:{self.porta}"]
+        if corpo is not None:
+            dados = json.dumps(corpo).encode()
+            linhas += ["Content-Type: application/json", f"Content-Length: {len(dados)}"]
+        for nome, valor in (cabecalhos or {}).items():
+            linhas.append(f"{nome}: {valor}")
+        self._escritor.write(("\r\n".join(linhas) + "\r\n\r\n").encode() + dados)
+        await self._escritor.drain()
+
+        status_linha = await self._leitor.readline()
+        if not status_linha:
+            raise ConnectionError("Conexão encerrada pelo servidor")
+        status = int(status_linha.split()[1])
+
+        resposta_cabecalhos = {}
+        while True:
+            linha = await self._leitor.readline()
+            if linha in (b"\r\n", b"\n", b""):
+                break
+            nome, _, valor = linha.decode("latin-1").partition(":")
+            resposta_cabecalhos[nome.strip().lower()] = valor.strip()
+
+        if resposta_cabecalhos.get("transfer-encoding") == "chunked":
+            partes = []
+            while True:
+                tamanho = int((await self._leitor.readline()).strip(), 16)
+                if tamanho == 0:
+                    await self._leitor.readline()
+                    break
+                partes.append(await self._leitor.readexactly(tamanho))
+                await self._leitor.readline()
+            conteudo = b"".join(partes)
+        else:
+            conteudo = await self._leitor.readexactly(int(resposta_cabecalhos.get("content-length", 0)))
+
+        if resposta_cabecalhos.get("connection") == "close":
+            await self.fechar()
+        return status, resposta_cabecalhos, conteudo
+
+def percentil(valores, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+async def gerar_carga(host: str, porta: int, requisicao, concorrencia: int, duracao: float):
+    """
+    Dispara `requisicao(indice)` -> (metodo, caminho, corpo) em `concorrencia` conexões
+    paralelas durante `duracao` segundos. Retorna vazão, erros e percentis de latência (ms).
+    """
+    latencias = []
+    erros = 0
+    fim = time.perf_counter() + duracao
+
+    async def trabalhador(numero: int):
+        nonlocal erros
+        conexao = ConexaoHTTP(host, porta)
+        indice = numero
+        try:
+            while time.perf_counter() < fim:
+                metodo, caminho, corpo = requisicao(indice)
+                indice += concorrencia
+                inicio = time.perf_counter()
+                try:
+                    status, _, _ = await conexao.requisitar(metodo, caminho, corpo)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    erros += 1
+                    await conexao.fechar()
+                    continue
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                if status >= 400:
+                    erros += 1
+        finally:
+            await conexao.fechar()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador(n) for n in range(concorrencia)))
+    decorrido = time.perf_counter() - inicio
+    return {
+        "requisicoes": len(latencias),
+        "erros": erros,
+        "vazao": len(latencias) / decorrido if decorrido else 0.0,
+        "p50_ms": percentil(latencias, 50),
+        "p95_ms": percentil(latencias, 95),
+        "p99_ms": percentil(latencias, 99),
+    }
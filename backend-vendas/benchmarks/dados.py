@@ -0,0 +1,168 @@
+"""
+Gerador determinístico de dados para os benchmarks.
+
+A mesma semente e a mesma escala geram sempre os mesmos clientes, produtos, vendas e
+itens, com os mesmos ids, para que medições de versões diferentes do código sejam
+comparáveis. Na escala 1: 200 clientes, 100 produtos e 2000 vendas com 1 a 5 itens.
+
+Apaga os dados das tabelas antes de gerar: use um banco dedicado aos benchmarks. Num banco
+vazio, cria antes o esquema (o mesmo de `python -m app.cli criar-banco`).
+
+Uso (a partir de backend-vendas/, com o banco de app/config.py):
+    python -m benchmarks.dados --escala 10 --semente 42 --recriar
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.crud import particoes as crud_particoes
+from app.crud import produto_venda_diaria as crud_produto_venda_diaria
+from app.crud import venda_diaria as crud_venda_diaria
+from app.models import Cliente, Produto, Venda, VendaProduto
+
+POR_ESCALA = {"clientes": 200, "produtos": 100, "vendas": 2000}
+DATA_INICIAL = date(2023, 1, 1)
+DIAS = 730
+# Estoque grande o bastante para as vendas do benchmark nunca esbarrarem na falta de estoque
+ESTOQUE = 1_000_000_000
+TAMANHO_LOTE = 5000
+# Produtos que nunca aparecem nas vendas geradas: o cenário de inclusão de itens usa
+# esses produtos para criar pares (venda, produto) que ainda não existem
+PRODUTOS_AVULSOS = 10
+
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Hugo", "Isabel", "João",
+         "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Tiago", "Vitória", "Yuri"]
+SOBRENOMES = ["Almeida", "Barbosa", "Cardoso", "Dias", "Ferreira", "Gomes", "Lima", "Martins",
+              "Nunes", "Oliveira", "Pereira", "Ribeiro", "Santos", "Souza", "Teixeira"]
+TIPOS = ["Arroz", "Feijão", "Café", "Açúcar", "Sabonete", "Detergente", "Macarrão", "Biscoito",
+         "Leite", "Óleo", "Farinha", "Sabão", "Shampoo", "Chocolate", "Suco"]
+MARCAS = ["Bom Dia", "Da Casa", "Estrela", "Campeão", "Prime", "Nativo", "Sol", "Vale Verde"]
+
+def contagens(escala: float) -> dict:
+    return {tabela: max(1, int(quantidade * escala)) for tabela, quantidade in POR_ESCALA.items()}
+
+def _inserir_em_lotes(db: Session, modelo, linhas: list):
+    for inicio in range(0, len(linhas), TAMANHO_LOTE):
+        db.execute(insert(modelo), linhas[inicio:inicio + TAMANHO_LOTE])
+
+def tabelas_vazias(db: Session) -> bool:
+    return all(db.scalar(select(func.count()).select_from(modelo)) == 0 for modelo in (Cliente, Produto, Venda))
+
+def gerar_dados(db: Session, escala: float = 1.0, semente: int = 42) -> dict:
+    """
+    Recria o conteúdo das tabelas com dados gerados a partir da semente e faz o commit.
+    Retorna o resumo usado pelos cenários de carga (quantidades e período das vendas).
+    """
+    sorteio = random.Random(semente)
+    quantidades = contagens(escala)
+
+    # Partições mensais de todo o período gerado (faz o commit)
+    crud_particoes.garantir_particoes(db, DATA_INICIAL, DATA_INICIAL + timedelta(days=DIAS - 1))
+    db.execute(text(
+        "TRUNCATE venda_produto, vendas, clientes, produtos, vendas_diarias, produtos_vendas_diarias RESTART IDENTITY CASCADE"
+    ))
+
+    clientes = [
+        {
+            "id": i,
+            "nome": f"{sorteio.choice(NOMES)} {sorteio.choice(SOBRENOMES)}",
+            "email": f"cliente{i}@exemplo.com",
+            "telefone": f"11 9{sorteio.randrange(10**7, 10**8)}",
+        }
+        for i in range(1, quantidades["clientes"] + 1)
+    ]
+    produtos = [
+        {
+            "id": i,
+            "nome": f"{sorteio.choice(TIPOS)} {sorteio.choice(MARCAS)} {i}",
+            "descricao": None,
+            "preco": round(sorteio.uniform(1, 200), 2),
+            "quantidade_em_estoque": ESTOQUE,
+        }
+        for i in range(1, quantidades["produtos"] + PRODUTOS_AVULSOS + 1)
+    ]
+    precos = {produto["id"]: produto["preco"] for produto in produtos}
+
+    vendas = []
+    itens = []
+    for venda_id in range(1, quantidades["vendas"] + 1):
+        escolhidos = sorteio.sample(range(1, quantidades["produtos"] + 1), k=min(sorteio.randint(1, 5), quantidades["produtos"]))
+        linhas = [
+            {"venda_id": venda_id, "produto_id": produto_id, "quantidade": sorteio.randint(1, 5), "preco_unitario": precos[produto_id]}
+            for produto_id in sorted(escolhidos)
+        ]
+        venda = {
+            "id": venda_id,
+            # Cerca de 5% das vendas sem cliente identificado
+            "cliente_id": sorteio.randint(1, quantidades["clientes"]) if sorteio.random() >= 0.05 else None,
+            "data_venda": DATA_INICIAL + timedelta(days=sorteio.randrange(DIAS)),
+            "total": round(sum(precos[item["produto_id"]] * item["quantidade"] for item in linhas), 2),
+        }
+        # Os itens ficam na partição do mês da venda
+        for item in linhas:
+            item["data_venda"] = venda["data_venda"]
+        itens.extend(linhas)
+        vendas.append(venda)
+
+    _inserir_em_lotes(db, Cliente, clientes)
+    _inserir_em_lotes(db, Produto, produtos)
+    _inserir_em_lotes(db, Venda, vendas)
+    _inserir_em_lotes(db, VendaProduto, itens)
+
+    # Os ids foram gravados explicitamente: alinha as sequências para as próximas inserções
+    for tabela in ("clientes", "produtos", "vendas"):
+        db.execute(text(f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), (SELECT max(id) FROM {tabela}))"))
+
+    # Preenche os resumos diários a partir das vendas geradas (fazem o commit)
+    crud_venda_diaria.reconstruir_vendas_diarias(db)
+    crud_produto_venda_diaria.reconstruir_produtos_vendas_diarias(db)
+    db.execute(text("ANALYZE"))
+    db.commit()
+
+    return {
+        "escala": escala,
+        "semente": semente,
+        "clientes": len(clientes),
+        "produtos": quantidades["produtos"],
+        "produtos_avulsos": list(range(quantidades["produtos"] + 1, quantidades["produtos"] + PRODUTOS_AVULSOS + 1)),
+        "vendas": len(vendas),
+        "itens": len(itens),
+        "data_inicio": DATA_INICIAL.isoformat(),
+        "data_fim": (DATA_INICIAL + timedelta(days=DIAS - 1)).isoformat(),
+    }
+
+def preparar_esquema():
+    """
+    Cria as tabelas se o banco estiver vazio (app.cli.criar_esquema: create_all e
+    alembic stamp head); num banco já criado, não faz nada.
+    """
+    from app.cli import criar_esquema
+
+    if criar_esquema():
+        print("Banco vazio: esquema criado (alembic stamp head)")
+
+def main():
+    from app.database import SessionLocal, iniciar_banco
+
+    parser = argparse.ArgumentParser(description="Gera os dados determinísticos dos benchmarks")
+    parser.add_argument("--escala", type=float, default=1.0)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--recriar", action="store_true", help="Apaga os dados existentes, se houver")
+    args = parser.parse_args()
+
+    iniciar_banco()
+    preparar_esquema()
+    db = SessionLocal()
+    try:
+        if not args.recriar and not tabelas_vazias(db):
+            raise SystemExit("O banco já tem dados; use --recriar para apagá-los (use um banco dedicado)")
+        resumo = gerar_dados(db, escala=args.escala, semente=args.semente)
+    finally:
+        db.close()
+    print(", ".join(f"{chave}={valor}" for chave, valor in resumo.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Teste de estresse da baixa de estoque: muitas conexões comprando o mesmo produto ao mesmo tempo.
+
+Cada requisição é um POST /vendas/ com um carrinho de dois itens: 1 unidade do produto
+"quente" (estoque limitado) e 1 unidade de um produto comum, em ordem aleatória no corpo,
+o que exercita a ordem fixa dos UPDATEs (sem deadlock entre carrinhos cruzados).
+
+Ao final confere, pela API, que não houve venda acima do estoque:
+    vendas aceitas == estoque inicial - estoque final == vendas do produto no relatório
+e que as recusas vieram como 409, nunca como erro do servidor.
+
+Uso (a partir de backend-vendas/, com o banco de app/config.py):
+    python -m benchmarks.estoque_concorrente --concorrencia 64 --estoque 500 --requisicoes 2000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.async_vs_sync import HOST, aguardar_servidor, subir_servidor
+from benchmarks.cliente_http import ConexaoHTTP, percentil
+
+async def criar_produto(conexao: ConexaoHTTP, nome: str, estoque: int) -> int:
+    _, _, corpo = await conexao.requisitar("POST", "/produtos/", {
+        "nome": nome, "preco": 10.0, "quantidade_em_estoque": estoque,
+    })
+    return json.loads(corpo)["id"]
+
+async def consultar_estoque(conexao: ConexaoHTTP, produto_id: int) -> int:
+    _, _, corpo = await conexao.requisitar("GET", f"/produtos/{produto_id}")
+    return json.loads(corpo)["quantidade_em_estoque"]
+
+async def vendas_do_produto(conexao: ConexaoHTTP, produto_id: int) -> int:
+    _, _, corpo = await conexao.requisitar("GET", "/relatorios/vendas?agrupamento=produto")
+    for linha in json.loads(corpo)["linhas"]:
+        if linha["id"] == produto_id:
+            return linha["quantidade_vendas"]
+    return 0
+
+async def martelar(porta: int, concorrencia: int, total: int, quente: int, comuns: list):
+    """
+    Dispara `total` vendas em `concorrencia` conexões; retorna contagem por status e latências.
+    """
+    status_contagem = {}
+    latencias = []
+    restantes = total
+    sorteio = random.Random(42)
+
+    async def trabalhador():
+        nonlocal restantes
+        conexao = ConexaoHTTP(HOST, porta)
+        try:
+            while restantes > 0:
+                restantes -= 1
+                itens = [
+                    {"produto_id": quente, "quantidade": 1},
+                    {"produto_id": sorteio.choice(comuns), "quantidade": 1},
+                ]
+                sorteio.shuffle(itens)
+                inicio = time.perf_counter()
+                try:
+                    status, _, _ = await conexao.requisitar("POST", "/vendas/", {"produtos": itens})
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    status = "conexão"
+                    await conexao.fechar()
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                status_contagem[status] = status_contagem.get(status, 0) + 1
+        finally:
+            await conexao.fechar()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    return status_contagem, latencias, time.perf_counter() - inicio
+
+async def principal(args) -> bool:
+    processo = subir_servidor(args.modo, args.porta)
+    try:
+        await aguardar_servidor(args.porta)
+        conexao = ConexaoHTTP(HOST, args.porta)
+        try:
+            quente = await criar_produto(conexao, "Produto quente (estresse)", args.estoque)
+            comuns = [
+                await criar_produto(conexao, f"Produto comum (estresse) {i}", args.requisicoes)
+                for i in range(args.produtos_comuns)
+            ]
+
+            # A conexão de preparo fica ociosa durante a carga e o servidor a encerra (keep-alive)
+            await conexao.fechar()
+            status_contagem, latencias, decorrido = await martelar(
+                args.porta, args.concorrencia, args.requisicoes, quente, comuns
+            )
+
+            estoque_final = await consultar_estoque(conexao, quente)
+            vendidas_relatorio = await vendas_do_produto(conexao, quente)
+        finally:
+            await conexao.fechar()
+    finally:
+        processo.terminate()
+        processo.wait(timeout=10)
+
+    aceitas = status_contagem.get(200, 0)
+    recusadas = status_contagem.get(409, 0)
+    outros = {status: n for status, n in status_contagem.items() if status not in (200, 409)}
+    baixado = args.estoque - estoque_final
+
+    print(f"\nModo {args.modo}: {args.requisicoes} vendas em {args.concorrencia} conexões, "
+          f"estoque inicial {args.estoque} do produto quente")
+    print(f"aceitas: {aceitas}  recusadas (409): {recusadas}  outros: {outros or 0}")
+    print(f"estoque final: {estoque_final}  baixado: {baixado}  vendas no relatório: {vendidas_relatorio}")
+    print(f"vazão: {len(latencias) / decorrido:.1f} req/s  p50 {percentil(latencias, 50):.1f} ms  "
+          f"p95 {percentil(latencias, 95):.1f} ms  p99 {percentil(latencias, 99):.1f} ms")
+
+    ok = (
+        estoque_final >= 0
+        and aceitas == baixado == vendidas_relatorio
+        and aceitas == min(args.estoque, args.requisicoes)
+        and not outros
+    )
+    print("OK: nenhuma venda acima do estoque" if ok else "FALHA: estoque inconsistente ou erros do servidor")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Estresse: baixa concorrente de estoque num único produto")
+    parser.add_argument("--modo", choices=("sync", "async"), default="sync")
+    parser.add_argument("--concorrencia", type=int, default=64)
+    parser.add_argument("--estoque", type=int, default=500)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--produtos-comuns", type=int, default=10)
+    parser.add_argument("--porta", type=int, default=8766)
+    if not asyncio.run(principal(parser.parse_args())):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
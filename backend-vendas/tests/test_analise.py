@@ -0,0 +1,101 @@
+import threading
+import time
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.crud import analise
+
+def test_media_movel():
+    media = analise.media_movel(np.array([1.0, 2.0, 3.0, 4.0, 5.0]), 3)
+    assert np.isnan(media[:2]).all()
+    assert media[2:].tolist() == [2.0, 3.0, 4.0]
+
+def test_media_movel_janela_maior_que_a_serie():
+    assert np.isnan(analise.media_movel(np.array([1.0, 2.0]), 7)).all()
+
+def test_variacao_percentual():
+    variacao = analise.variacao_percentual(np.array([100.0, 150.0, 0.0, 50.0]))
+    assert np.isnan(variacao[0])
+    assert variacao[1] == 50.0
+    assert variacao[2] == -100.0
+    # Sobre um período zerado não há variação
+    assert np.isnan(variacao[3])
+
+def test_notas_quintil():
+    notas = analise.notas_quintil(np.arange(10))
+    assert notas.tolist() == [1, 1, 2, 2, 3, 3, 4, 4, 5, 5]
+
+def test_notas_quintil_empates_no_topo():
+    notas = analise.notas_quintil(np.array([1, 2, 3, 9, 9, 9]))
+    assert notas[3:].tolist() == [5, 5, 5]
+    assert notas[0] == 1
+
+def test_notas_quintil_empates_recebem_a_mesma_nota():
+    notas = analise.notas_quintil(np.array([5, 1, 5, 3, 1]))
+    assert notas[0] == notas[2]
+    assert notas[1] == notas[4]
+
+def test_notas_quintil_vazio():
+    assert len(analise.notas_quintil(np.array([]))) == 0
+
+def test_prever_reproduz_tendencia_e_dia_da_semana():
+    inicio = date(2024, 1, 1)
+    efeito = np.array([0.0, 5.0, 10.0, 15.0, 20.0, 50.0, 30.0])
+    t = np.arange(28 + 7)
+    serie = 100.0 + 2.0 * t + efeito[(np.datetime64(inicio) + t).astype(np.int64) % 7]
+
+    previsto, desvio, tendencia = analise.prever(serie[:28], inicio, 7)
+
+    assert previsto == pytest.approx(serie[28:])
+    assert desvio == pytest.approx(0.0, abs=1e-6)
+    assert tendencia == pytest.approx(2.0)
+
+def test_prever_exige_historico_minimo():
+    with pytest.raises(ValueError):
+        analise.prever(np.ones(analise.HISTORICO_MINIMO - 1), date(2024, 1, 1), 7)
+
+def _copy_binario(linhas) -> bytes:
+    conteudo = analise._ASSINATURA_COPY + (0).to_bytes(4, "big") + (0).to_bytes(4, "big")
+    for dia, quantidade in linhas:
+        conteudo += (2).to_bytes(2, "big")
+        conteudo += (4).to_bytes(4, "big") + dia.to_bytes(4, "big", signed=True)
+        conteudo += (4).to_bytes(4, "big") + quantidade.to_bytes(4, "big", signed=True)
+    return conteudo + (-1).to_bytes(2, "big", signed=True)
+
+def test_ler_copy_binario():
+    linhas = analise.ler_copy_binario(_copy_binario([(10, 3), (11, -2)]), analise._LINHA_ITEM)
+    assert linhas["dia"].tolist() == [10, 11]
+    assert linhas["quantidade"].tolist() == [3, -2]
+
+def test_ler_copy_binario_sem_linhas():
+    assert len(analise.ler_copy_binario(_copy_binario([]), analise._LINHA_ITEM)) == 0
+
+def test_ler_copy_binario_rejeita_outro_formato():
+    with pytest.raises(ValueError):
+        analise.ler_copy_binario(b"dia,quantidade\n10,3\n", analise._LINHA_ITEM)
+
+def test_carregar_dados_concorrente_faz_uma_carga(monkeypatch):
+    chamadas = []
+
+    def buscar(db, data_inicio, data_fim):
+        chamadas.append(data_inicio)
+        time.sleep(0.05)
+        return object()
+
+    monkeypatch.setattr(analise, "_buscar_dados", buscar)
+    chave = (date(1990, 1, 1), date(1990, 1, 31))
+    resultados = []
+    threads = [
+        threading.Thread(target=lambda: resultados.append(analise.carregar_dados(None, *chave)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(chamadas) == 1
+    assert len(set(map(id, resultados))) == 1
+    assert chave not in analise._cargas
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app import cache
+
+def test_janela_estoque_muda_a_cada_duracao():
+    duracao = cache.DURACAO_JANELA_ESTOQUE
+    assert cache.janela_estoque(10 * duracao) == cache.janela_estoque(11 * duracao - 0.5)
+    assert cache.janela_estoque(11 * duracao) == cache.janela_estoque(10 * duracao) + 1
+
+def test_etag_catalogo_muda_com_a_janela():
+    versao = SimpleNamespace(versao=3, atualizado_em=datetime(2026, 1, 1, tzinfo=timezone.utc))
+    assert cache.etag_catalogo(versao, 10) != cache.etag_catalogo(versao, 11)
+
+def test_cache_catalogo_separa_versoes(monkeypatch):
+    monkeypatch.setattr(cache, "janela_estoque", lambda: 7)
+    catalogo = cache.CacheCatalogo(10, 60)
+    catalogo.guardar(1, "lista", ["a"])
+    assert catalogo.obter(1, "lista") == (True, ["a"])
+    assert catalogo.obter(2, "lista") == (False, None)
+    monkeypatch.setattr(cache, "janela_estoque", lambda: 8)
+    assert catalogo.obter(1, "lista") == (False, None)
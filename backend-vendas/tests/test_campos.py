@@ -0,0 +1,24 @@
+import pytest
+
+from app import models
+from app.crud.campos import CamposInvalidos, selecionar_colunas
+from app.crud.produto import COLUNAS_LISTAGEM
+
+def _nomes(colunas):
+    return [coluna.key for coluna in colunas]
+
+def test_sem_campos_retorna_todas():
+    assert selecionar_colunas(COLUNAS_LISTAGEM, None) == COLUNAS_LISTAGEM
+    assert selecionar_colunas(COLUNAS_LISTAGEM, "") == COLUNAS_LISTAGEM
+
+def test_campos_na_ordem_da_listagem():
+    colunas = selecionar_colunas(COLUNAS_LISTAGEM, " preco , nome,,")
+    assert _nomes(colunas) == ["nome", "preco"]
+
+def test_chave_entra_sempre():
+    colunas = selecionar_colunas(COLUNAS_LISTAGEM, "preco", chave=(models.Produto.id,))
+    assert _nomes(colunas) == ["id", "preco"]
+
+def test_campo_desconhecido():
+    with pytest.raises(CamposInvalidos, match="senha"):
+        selecionar_colunas(COLUNAS_LISTAGEM, "nome,senha")
@@ -0,0 +1,34 @@
+import pytest
+
+from app import compressao
+
+@pytest.fixture
+def com_brotli(monkeypatch):
+    monkeypatch.setattr(compressao, "brotli", object())
+
+@pytest.fixture
+def sem_brotli(monkeypatch):
+    monkeypatch.setattr(compressao, "brotli", None)
+
+@pytest.mark.parametrize("accept_encoding, esperado", [
+    ("gzip, deflate, br", "br"),
+    ("gzip;q=1.0, br;q=0.5", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("*", "br"),
+    ("*, br;q=0", "gzip"),
+    ("identity", None),
+    ("", None),
+    ("gzip;q=0, br;q=0", None),
+    ("GZIP;Q=0.8", "gzip"),
+    ("gzip;q=abc", None),
+])
+def test_escolher_codificacao(com_brotli, accept_encoding, esperado):
+    assert compressao.escolher_codificacao(accept_encoding) == esperado
+
+@pytest.mark.parametrize("accept_encoding, esperado", [
+    ("gzip, br", "gzip"),
+    ("br", None),
+    ("*", "gzip"),
+])
+def test_escolher_codificacao_sem_brotli(sem_brotli, accept_encoding, esperado):
+    assert compressao.escolher_codificacao(accept_encoding) == esperado
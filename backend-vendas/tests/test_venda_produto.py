@@ -0,0 +1,12 @@
+from types import SimpleNamespace
+
+from app.crud.venda_produto import variacao_itens_vendas
+
+def _item(venda_id, quantidade, quantidade_anterior):
+    return SimpleNamespace(venda_id=venda_id, quantidade=quantidade, quantidade_anterior=quantidade_anterior)
+
+def test_variacao_itens_na_mesma_venda():
+    assert variacao_itens_vendas(_item(1, 5, 2), venda_id=1) == (3, 0)
+
+def test_variacao_itens_trocando_de_venda():
+    assert variacao_itens_vendas(_item(2, 5, 2), venda_id=1) == (-2, 5)
@@ -130,26 +130,19 @@ const FormVenda: React.FC<FormVendaProps> = ({ onSubmit, onCancel }) => {
       // 1. Calcular total
       const total = calcularTotal();
       
-      // 2. Preparar dados para enviar
+      // 2. Preparar dados para enviar (a venda e seus itens vão juntos)
       const vendaData = {
         cliente_id: clienteId || null,
         data_venda: new Date().toISOString().split('T')[0],
-        total: total
+        total: total,
+        produtos: produtosSelecionados.map(produto => ({
+          produto_id: produto.id,
+          quantidade: produto.quantidade
+        }))
       };
   
-      // 3. Criar a venda
+      // 3. Criar a venda com os itens numa única transação
       const response = await api.post<Venda>('/vendas/', vendaData);
-      
-      // 4. Criar os itens de venda_produto
-      await Promise.all(
-        produtosSelecionados.map(produto => {
-          return api.post('/venda_produto/', {
-            venda_id: response.data.id,
-            produto_id: produto.id,
-            quantidade: produto.quantidade
-          });
-        })
-      );
   
       onSubmit(response.data);
       // Resetar o formulário
@@ -10,9 +10,27 @@ const api = axios.create({
   }
 });
 
+// Leitura após escrita: as escritas devolvem até quando as leituras deste cliente devem ir
+// ao banco primário (com réplicas configuradas); o valor volta em todas as requisições
+const CABECALHO_LEITURA_PRIMARIO = 'X-Leitura-Primario-Ate';
+let leituraPrimarioAte: string | null = null;
+
+api.interceptors.request.use(config => {
+  if (leituraPrimarioAte) {
+    config.headers[CABECALHO_LEITURA_PRIMARIO] = leituraPrimarioAte;
+  }
+  return config;
+});
+
 // Interceptores para tratamento de erros
 api.interceptors.response.use(
-  response => response,
+  response => {
+    const ate = response.headers[CABECALHO_LEITURA_PRIMARIO.toLowerCase()];
+    if (ate) {
+      leituraPrimarioAte = ate;
+    }
+    return response;
+  },
   error => {
     if (error.response) {
       console.error('Erro na resposta:', error.response.status, error.response.data);